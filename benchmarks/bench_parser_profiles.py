@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Markdown扩展配置基准
+对比按需加载扩展（profile=auto）与加载全部扩展（profile=full）在大文档上的耗时。
+两者解析结果的一致性由 tests/test_markdown_parser_profiles.py 校验
+
+用法：
+    python benchmarks/bench_parser_profiles.py [--size-mb 1] [--repeat 3]
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_parser import build_corpus  # noqa: E402
+from converters.markdown_parser import MarkdownParser  # noqa: E402
+
+
+def run(parser: MarkdownParser, text: str, repeat: int):
+    """多次解析取最短耗时，返回 (HTML渲染秒数, 完整解析秒数)"""
+    processed_text = parser._preprocess(text)
+    markdown_instance = parser._get_markdown_instance(parser.select_extensions(processed_text))
+
+    best_convert = best_parse = None
+    for _ in range(repeat):
+        markdown_instance.reset()
+        start = time.perf_counter()
+        markdown_instance.convert(processed_text)
+        elapsed = time.perf_counter() - start
+        best_convert = elapsed if best_convert is None else min(best_convert, elapsed)
+
+        start = time.perf_counter()
+        parser.parse(text)
+        elapsed = time.perf_counter() - start
+        best_parse = elapsed if best_parse is None else min(best_parse, elapsed)
+    return best_convert, best_parse
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Markdown扩展配置基准')
+    arg_parser.add_argument('--size-mb', type=float, default=1.0, help='测试文档大小（MB）')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='重复次数（取最短耗时）')
+    args = arg_parser.parse_args()
+
+    auto_parser = MarkdownParser({'engine': 'markdown', 'profile': 'auto'})
+    full_parser = MarkdownParser({'engine': 'markdown', 'profile': 'full'})
+
+    # 去掉代码块后的大文档（只含标题、段落、列表、表格和引用），只需加载表格扩展
+    plain_corpus = re.sub(r'```python\n.*?```\n', '', build_corpus(int(args.size_mb * 1024 * 1024)),
+                          flags=re.DOTALL)
+    extensions = auto_parser.select_extensions(auto_parser._preprocess(plain_corpus))
+    print(f"文档大小: {len(plain_corpus.encode('utf-8')) / 1024 / 1024:.2f} MB，"
+          f"按需加载的扩展: {[name.rsplit('.', 1)[-1] for name in extensions]}")
+    full_convert, full_parse = run(full_parser, plain_corpus, args.repeat)
+    auto_convert, auto_parse = run(auto_parser, plain_corpus, args.repeat)
+    print(f"    full: HTML渲染 {full_convert:.3f} s，完整解析 {full_parse:.3f} s")
+    print(f"    auto: HTML渲染 {auto_convert:.3f} s，完整解析 {auto_parse:.3f} s")
+    print(f"加速比: HTML渲染 {full_convert / auto_convert:.2f}x，完整解析 {full_parse / auto_parse:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
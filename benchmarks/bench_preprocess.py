@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Markdown预处理基准
+校验单遍预处理（preprocess_markdown）与逐步预处理的结果一致，
+并对比两者在大文档上的耗时
+
+用法：
+    python benchmarks/bench_preprocess.py [--size-mb 4] [--repeat 5] [--fuzz 20000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_parser import build_corpus  # noqa: E402
+from converters.markdown_parser import MarkdownParser  # noqa: E402
+from converters.preprocessor import preprocess_markdown  # noqa: E402
+
+
+# 随机语料的组成片段：换行符的各种写法、公式、图片、列表标记及其边界情况
+FUZZ_PIECES = [
+    '$', '$$', '![', '](', ')', ']', '[', '\n', '\r', '\r\n', '\\n', '\\',
+    '- ', '-', '1. ', '12.', '* ', '+\t', ' ', '  ', '\t', '\x0b', '　',
+    'a', 'x', '中',
+]
+
+# 含公式和图片的段落，插入大文档中
+MARKUP_SECTION = (
+    "质能方程 $E=mc^2$ 与增长率 $g = (x_1 - x_0) / x_0$ 见下图：\r\n"
+    "![趋势图](images/trend.png)\r\n"
+    "- 指标一 $a^2$\r\n"
+    "- 指标二 ![图标](icon.png)\r\n"
+    "\r\n"
+)
+
+
+def check_fuzz(stepwise, count: int, seed: int = 0):
+    """随机文本上比较两种预处理结果，返回 (不一致的样例, 回退到逐步处理的次数)"""
+    rng = random.Random(seed)
+    fallbacks = 0
+    for _ in range(count):
+        text = ''.join(rng.choice(FUZZ_PIECES) for _ in range(rng.randint(0, 30)))
+        result = preprocess_markdown(text)
+        if result is None:
+            fallbacks += 1
+            continue
+        if result != stepwise(text):
+            return text, fallbacks
+    return None, fallbacks
+
+
+def best_time(function, text: str, repeat: int) -> float:
+    """多次执行取最短耗时"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Markdown预处理基准')
+    arg_parser.add_argument('--size-mb', type=float, default=4.0, help='测试文档大小（MB）')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='重复次数（取最短耗时）')
+    arg_parser.add_argument('--fuzz', type=int, default=20000, help='随机一致性校验的样例数')
+    args = arg_parser.parse_args()
+
+    stepwise = MarkdownParser({'engine': 'markdown'})._preprocess_stepwise
+    failed = False
+
+    mismatch, fallbacks = check_fuzz(stepwise, args.fuzz)
+    if mismatch is not None:
+        failed = True
+        print(f"随机校验: 不一致 {mismatch!r}")
+    else:
+        print(f"随机校验: {args.fuzz} 个样例一致（其中 {fallbacks} 个回退到逐步处理）")
+
+    size_bytes = int(args.size_mb * 1024 * 1024)
+    plain_corpus = build_corpus(size_bytes)
+    markup_corpus = plain_corpus.replace('### ', MARKUP_SECTION + '### ')
+    for name, corpus in (('普通文档', plain_corpus), ('含公式/图片/CRLF', markup_corpus)):
+        if preprocess_markdown(corpus) != stepwise(corpus):
+            failed = True
+            print(f"{name}: 结果不一致")
+            continue
+        stepwise_time = best_time(stepwise, corpus, args.repeat)
+        fused_time = best_time(preprocess_markdown, corpus, args.repeat)
+        print(f"{name} ({len(corpus.encode('utf-8')) / 1024 / 1024:.2f} MB): "
+              f"逐步 {stepwise_time:.3f} s，单遍 {fused_time:.3f} s，"
+              f"加速比 {stepwise_time / fused_time:.2f}x")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式生成基准
+对比先构建整篇文档树再生成（tree）与逐块解析、逐块写入（stream）两种方式的
+内存峰值和耗时，并校验两者生成的文档内容一致
+
+用法：
+    python benchmarks/bench_streaming.py [--size-mb 0.25]
+"""
+
+import argparse
+import gc
+import io
+import sys
+import time
+import tracemalloc
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_parser import build_corpus  # noqa: E402
+from config import ConfigManager  # noqa: E402
+from converters.markdown_parser import MarkdownParser  # noqa: E402
+from converters.word_generator import WordGenerator  # noqa: E402
+
+
+def generate(text: str, streaming: bool, config):
+    """解析并生成文档，返回 (document.xml, 内存峰值字节数, 秒)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    parser = MarkdownParser()
+    content = parser.iter_blocks(text) if streaming else parser.parse(text)
+    buffer = io.BytesIO()
+    if not WordGenerator(config).generate(content, buffer):
+        raise RuntimeError("生成Word文档失败")
+
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    with zipfile.ZipFile(buffer) as archive:
+        document_xml = archive.read('word/document.xml')
+    return document_xml, peak, elapsed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='流式生成基准')
+    arg_parser.add_argument('--size-mb', type=float, default=0.25, help='测试文档大小（MB）')
+    args = arg_parser.parse_args()
+
+    text = build_corpus(int(args.size_mb * 1024 * 1024))
+    config = ConfigManager().load_config()
+    print(f"文档大小: {len(text.encode('utf-8')) / 1024 / 1024:.2f} MB")
+
+    tree_xml, tree_peak, tree_time = generate(text, False, config)
+    stream_xml, stream_peak, stream_time = generate(text, True, config)
+    print(f"    tree: 内存峰值 {tree_peak / 1024 / 1024:.1f} MB，耗时 {tree_time:.2f} s")
+    print(f"  stream: 内存峰值 {stream_peak / 1024 / 1024:.1f} MB，耗时 {stream_time:.2f} s")
+
+    same = tree_xml == stream_xml
+    print(f"文档内容: {'一致' if same else '不一致'}")
+    sys.exit(0 if same else 1)
+
+
+if __name__ == '__main__':
+    main()
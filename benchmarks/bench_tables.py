@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大表格生成基准
+按行数成倍增长的表格测量 Markdown → Word 的耗时和每行耗时，
+每行耗时基本不变即耗时与行数成线性关系
+
+用法：
+    python benchmarks/bench_tables.py [--rows 10000 20000 40000] [--cols 8] [--split-rows 0]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from converters.conversion_engine import ConversionEngine  # noqa: E402
+
+
+def build_table_markdown(rows: int, cols: int) -> str:
+    """生成包含一个 rows 行数据的表格的文档"""
+    header = '| ' + ' | '.join(f'字段{j}' for j in range(cols)) + ' |'
+    separator = '|' + '---|' * cols
+    lines = ['# 数据导出', '', header, separator]
+    for i in range(rows):
+        # 首列每 5 行相同，覆盖首列合并
+        cells = [f'分组{i // 5}'] + [f'r{i}c{j} 数据{i * 7 % 1000}' for j in range(1, cols)]
+        lines.append('| ' + ' | '.join(cells) + ' |')
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='大表格生成基准')
+    arg_parser.add_argument('--rows', type=int, nargs='+', default=[10000, 20000, 40000], help='数据行数')
+    arg_parser.add_argument('--cols', type=int, default=8, help='列数')
+    arg_parser.add_argument('--split-rows', type=int, default=0, help='每个表格的最大数据行数（0 为不拆分）')
+    args = arg_parser.parse_args()
+
+    engine = ConversionEngine()
+    style_config = json.dumps({'table': {'split_rows': args.split_rows}})
+    per_row = []
+    for rows in args.rows:
+        text = build_table_markdown(rows, args.cols)
+        start = time.perf_counter()
+        content = engine.convert_to_bytes(text, style_config=style_config)
+        elapsed = time.perf_counter() - start
+        if content is None:
+            raise RuntimeError("生成Word文档失败")
+        per_row.append(elapsed / rows)
+        print(f"{rows:>7} 行: 耗时 {elapsed:.2f} s，每行 {elapsed / rows * 1e6:.1f} µs，"
+              f"文档 {len(content) / 1024 / 1024:.1f} MB")
+
+    print(f"每行耗时（最多/最少）: {max(per_row) / min(per_row):.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -10,6 +10,7 @@ from .models import (
     ParagraphStyle,
     PageStyle,
     HeadingStyles,
+    CodeHighlightStyle,
     ChartStyle,
 )
 from .manager import ConfigManager
@@ -21,6 +22,7 @@ __all__ = [
     'ParagraphStyle',
     'PageStyle',
     'HeadingStyles',
+    'CodeHighlightStyle',
     'ChartStyle',
     'ConfigManager',
 ]
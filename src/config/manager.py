@@ -5,8 +5,13 @@
 负责加载、解析、合并和管理样式配置
 """
 
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+import copy
+import hashlib
+import logging
+import threading
 import yaml
 import json
 
@@ -21,15 +26,18 @@ from .models import (
     TableStyle,
 )
 
+logger = logging.getLogger('smart_doc.config')
+
 
 class ConfigManager:
     """统一配置管理器"""
     
-    def __init__(self, config_dir: Optional[Path] = None):
+    def __init__(self, config_dir: Optional[Path] = None, cache_size: int = 128):
         """初始化配置管理器
         
         Args:
             config_dir: 配置文件目录，默认为项目根目录的 config/
+            cache_size: 合并配置 LRU 缓存的最大条目数，0 表示不缓存
         """
         if config_dir is None:
             # 默认配置目录
@@ -44,11 +52,20 @@ class ConfigManager:
         self.default_config_file = self.config_dir / "style.yaml"
         self.themes_dir = self.config_dir / "themes"
         self.themes_dir.mkdir(exist_ok=True, parents=True)
+        
+        # 配置缓存（缓存中的对象只读，对外总是返回副本）
+        # 合并结果：{(theme, json_digest): (file_signature, StyleConfig)}
+        # 基础配置：{theme: (file_signature, StyleConfig)}
+        self.cache_size = cache_size
+        self._config_cache: "OrderedDict[Tuple[str, str], Tuple[tuple, StyleConfig]]" = OrderedDict()
+        self._base_cache: Dict[str, Tuple[tuple, StyleConfig]] = {}
+        self._cache_lock = threading.Lock()
     
     def load_config(
         self,
         json_config: Optional[str] = None,
-        theme: Optional[str] = None
+        theme: Optional[str] = None,
+        use_cache: bool = True
     ) -> StyleConfig:
         """加载配置
         
@@ -58,32 +75,152 @@ class ConfigManager:
         3. 主题配置 (config/themes/{theme}.yaml)
         4. JSON 配置 (API 传入的 style_config 参数)
         
+        合并结果按（主题, 规范化 JSON 摘要）做 LRU 缓存，配置文件修改时间
+        变化后自动失效。返回值总是缓存对象的独立副本，调用方可以随意修改。
+        
         Args:
             json_config: JSON 格式的配置字符串
             theme: 主题名称
+            use_cache: 是否使用缓存
         
         Returns:
             合并后的完整配置
         """
+        if not use_cache or self.cache_size <= 0:
+            # 1-3. 默认配置 + 系统配置 + 主题配置
+            config = self.load_base_config(theme)
+            # 4. 应用 JSON 配置（最高优先级）
+            return self.apply_json_config(config, json_config)
+        
+        theme_key = theme or 'default'
+        signature = self._file_signature(theme)
+        cache_key = (theme_key, self._json_config_digest(json_config))
+        
+        with self._cache_lock:
+            entry = self._config_cache.get(cache_key)
+            if entry is not None and entry[0] == signature:
+                self._config_cache.move_to_end(cache_key)
+                return copy.deepcopy(entry[1])
+        
+        # 未命中：在缓存的基础配置副本上应用 JSON 配置
+        config = self.apply_json_config(
+            copy.deepcopy(self._get_base_config(theme, signature)),
+            json_config
+        )
+        
+        with self._cache_lock:
+            self._config_cache[cache_key] = (signature, config)
+            self._config_cache.move_to_end(cache_key)
+            while len(self._config_cache) > self.cache_size:
+                self._config_cache.popitem(last=False)
+        
+        return copy.deepcopy(config)
+    
+    def clear_cache(self):
+        """清空配置缓存"""
+        with self._cache_lock:
+            self._config_cache.clear()
+            self._base_cache.clear()
+    
+    def _get_base_config(self, theme: Optional[str], signature: tuple) -> StyleConfig:
+        """获取缓存的基础配置（只读，调用方需要自行复制）"""
+        theme_key = theme or 'default'
+        with self._cache_lock:
+            entry = self._base_cache.get(theme_key)
+            if entry is not None and entry[0] == signature:
+                return entry[1]
+        
+        config = self.load_base_config(theme)
+        with self._cache_lock:
+            self._base_cache[theme_key] = (signature, config)
+        return config
+    
+    def _file_signature(self, theme: Optional[str]) -> tuple:
+        """获取配置文件的修改时间签名，用于缓存失效判断"""
+        files = [self.default_config_file]
+        if theme and theme != 'default':
+            files.append(self.themes_dir / f"{theme}.yaml")
+        
+        signature = []
+        for file_path in files:
+            try:
+                stat = file_path.stat()
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+    
+    def _json_config_digest(self, json_config: Optional[str]) -> str:
+        """计算 JSON 配置的规范化摘要
+        
+        键顺序、空白等不影响语义的差异会得到相同的摘要。
+        """
+        if not json_config:
+            return ''
+        
+        data = json_config
+        if isinstance(json_config, str):
+            # 与 _parse_json_config 相同的清理规则
+            text = json_config.replace('\\n', '\n').replace('\\t', '\t')
+            text = text.replace('\xa0', ' ').strip()
+            try:
+                data = json.loads(text)
+            except ValueError:
+                # 无法解析的配置按原文计算摘要
+                return 'raw:' + hashlib.sha1(text.encode('utf-8')).hexdigest()
+        
+        try:
+            normalized = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        except (TypeError, ValueError):
+            normalized = repr(data)
+        return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+    def load_base_config(self, theme: Optional[str] = None) -> StyleConfig:
+        """加载基础配置（不含 JSON 覆盖）
+
+        依次合并内置默认配置、系统配置文件和主题配置。结果只依赖于
+        配置文件内容，可以被常驻进程缓存复用。
+
+        Args:
+            theme: 主题名称
+
+        Returns:
+            合并后的基础配置
+        """
         # 1. 从默认配置开始
         config = StyleConfig()
-        
+
         # 2. 加载系统配置文件（如果存在）
         if self.default_config_file.exists():
             system_config_dict = self._load_yaml(self.default_config_file)
             config = self._apply_dict_to_config(config, system_config_dict)
-        
+
         # 3. 加载主题配置（如果指定）
         if theme and theme != 'default':
             theme_dict = self._load_theme(theme)
             if theme_dict:
                 config = self._apply_dict_to_config(config, theme_dict)
-        
-        # 4. 应用 JSON 配置（最高优先级）
+
+        return config
+
+    def apply_json_config(
+        self,
+        config: StyleConfig,
+        json_config: Optional[str] = None
+    ) -> StyleConfig:
+        """将 JSON 配置应用到已有配置上（原地修改）
+
+        Args:
+            config: 基础配置对象
+            json_config: JSON 格式的配置字符串
+
+        Returns:
+            更新后的配置对象
+        """
         if json_config:
             json_dict = self._parse_json_config(json_config)
             config = self._apply_dict_to_config(config, json_dict)
-        
+
         return config
     
     def _parse_json_config(self, json_str: str) -> Dict[str, Any]:
@@ -117,10 +254,10 @@ class ConfigManager:
                 return data
         
         except json.JSONDecodeError as e:
-            print(f"JSON 解析失败: {e}")
+            logger.warning("JSON 解析失败: %s", e)
             return {}
         except Exception as e:
-            print(f"配置解析错误: {e}")
+            logger.warning("配置解析错误: %s", e)
             return {}
     
     def _migrate_old_format(self, old_config: Dict[str, Any]) -> Dict[str, Any]:
@@ -300,6 +437,13 @@ class ConfigManager:
                 config.code_block
             )
         
+        if "code_highlight" in config_dict:
+            highlight_data = config_dict["code_highlight"]
+            if isinstance(highlight_data, dict):
+                for key, value in highlight_data.items():
+                    if hasattr(config.code_highlight, key):
+                        setattr(config.code_highlight, key, value)
+        
         # 应用表格配置
         if "table" in config_dict:
             table_data = config_dict["table"]
@@ -378,7 +522,7 @@ class ConfigManager:
             with open(file_path, 'r', encoding='utf-8') as f:
                 return yaml.safe_load(f) or {}
         except Exception as e:
-            print(f"加载 YAML 文件失败 {file_path}: {e}")
+            logger.warning("加载 YAML 文件失败 %s: %s", file_path, e)
             return {}
     
     def _load_theme(self, theme_name: str) -> Optional[Dict[str, Any]]:
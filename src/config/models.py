@@ -138,6 +138,15 @@ class TableStyle:
     header_font_color: str = "#ffffff"
     header_font_bold: bool = True
     alternate_row_color: str = "#fff3e0"
+    large_table_rows: int = 1000      # 数据行数超过此值的表格按大表格输出（表头跨页重复），0 为不启用
+    split_rows: int = 0               # 大表格每 N 个数据行拆分为一个表格（每个表格重复表头），0 为不拆分
+
+
+@dataclass
+class CodeHighlightStyle:
+    """代码高亮样式"""
+    enabled: bool = True              # 是否对标注了语言的代码块做语法高亮
+    style: str = "default"            # Pygments 配色方案（default、friendly、monokai 等）
 
 
 @dataclass
@@ -185,6 +194,7 @@ class StyleConfig:
     # 代码
     code_inline: ElementStyle = field(default_factory=ElementStyle)
     code_block: ElementStyle = field(default_factory=ElementStyle)
+    code_highlight: CodeHighlightStyle = field(default_factory=CodeHighlightStyle)
     
     # 表格
     table: TableStyle = field(default_factory=TableStyle)
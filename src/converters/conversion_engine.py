@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+转换引擎模块
+进程内常驻的 Markdown → Word 转换引擎，跨请求复用解析器、主题配置和Word模板
+"""
+
+import io
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional, Union
+
+from docx import Document
+
+from .markdown_parser import DocumentMetadata, MarkdownParser, MarkdownElement
+from .parser_pool import MarkdownParserPool
+from .style_compiler import CompiledTemplateCache
+from .word_generator import WordGenerator
+
+try:
+    # 绝对导入（src 已在 sys.path 中）
+    from config import ConfigManager, StyleConfig
+except ImportError:
+    from ..config import ConfigManager, StyleConfig
+
+
+class ConversionEngine:
+    """常驻转换引擎（线程安全）
+
+    构造开销较大的对象只在引擎创建时准备一次：
+    - 配置管理器（内部缓存合并后的主题/JSON配置）
+    - 预先构建的 MarkdownParser 池（达到使用上限的解析器自动回收）
+    - 按主题配置编译好命名样式的Word模板（序列化后缓存，见 style_compiler）
+
+    单次请求只做配置合并、Markdown解析和Word生成。解析与生成以流水线方式进行：
+    解析器每完成一个顶层块就交给生成器写入文档，不构建整篇文档树。
+    """
+
+    def __init__(self, config_dir: Optional[Path] = None, parser_pool_size: int = 4,
+                 parser_max_uses: int = 1000, parser_max_chars: int = 64 * 1024 * 1024,
+                 chart_render_workers: Optional[int] = None):
+        """初始化转换引擎
+
+        Args:
+            config_dir: 配置文件目录，默认为项目根目录的 config/
+            parser_pool_size: 解析器池大小
+            parser_max_uses: 单个解析器最多解析的文档数，超过后回收重建
+            parser_max_chars: 单个解析器最多累计解析的字符数，超过后回收重建
+            chart_render_workers: 并行渲染图表的工作进程数（不超过CPU核数），
+                None 时读取环境变量 CHART_RENDER_WORKERS，0 或 1 表示顺序渲染
+        """
+        self.config_manager = ConfigManager(config_dir)
+
+        # 预构建解析器池
+        self.parser_pool = MarkdownParserPool(
+            size=parser_pool_size,
+            max_uses=parser_max_uses,
+            max_parsed_chars=parser_max_chars
+        )
+
+        # 预加载默认模板（只读字节），各主题配置首次使用时编译样式并缓存，每次请求从内存打开
+        template_buffer = io.BytesIO()
+        Document().save(template_buffer)
+        self._template_bytes = template_buffer.getvalue()
+        self.template_cache = CompiledTemplateCache(self._template_bytes)
+
+        # 图表渲染进程池由所有请求共享，工作进程数不随请求的样式配置变化
+        self.chart_render_workers = chart_render_workers
+
+    def load_config(self, theme: Optional[str] = None, json_config: Optional[str] = None) -> StyleConfig:
+        """获取请求使用的完整配置
+
+        合并结果由 ConfigManager 缓存，每次请求拿到独立副本，
+        并发请求之间互不影响。
+
+        Args:
+            theme: 主题名称
+            json_config: JSON 格式的配置字符串
+
+        Returns:
+            合并后的完整配置
+        """
+        return self.config_manager.load_config(json_config=json_config, theme=theme)
+
+    @contextmanager
+    def acquire_parser(self) -> Iterator[MarkdownParser]:
+        """从解析器池借出一个解析器，用完自动重置并归还
+
+        池为空时临时创建新的解析器，不阻塞请求。
+        """
+        with self.parser_pool.acquire() as parser:
+            yield parser
+
+    def parse(self, markdown_text: str) -> MarkdownElement:
+        """使用池中的解析器解析Markdown文本"""
+        with self.acquire_parser() as parser:
+            return parser.parse(markdown_text)
+
+    def iter_blocks(self, markdown_text: str,
+                    metadata: Optional[DocumentMetadata] = None) -> Iterator[MarkdownElement]:
+        """使用池中的解析器流式解析Markdown文本，逐个产出顶层块
+
+        解析器在迭代结束（或迭代器被关闭）后才归还到池中。
+        传入 metadata 时产出块的同时记录文档元数据。
+        """
+        with self.acquire_parser() as parser:
+            yield from parser.iter_blocks(markdown_text, metadata)
+
+    def create_generator(self, config: StyleConfig, enable_charts: bool = False,
+                         chart_data: str = '') -> WordGenerator:
+        """基于已编译主题样式的模板创建Word生成器"""
+        return WordGenerator(
+            config=config,
+            enable_charts=enable_charts,
+            chart_data=chart_data,
+            template=io.BytesIO(self.template_cache.get(config)),
+            styles_compiled=True,
+            render_workers=self.chart_render_workers
+        )
+
+    def convert(
+        self,
+        markdown_text: str,
+        output_path: Union[str, IO[bytes]],
+        theme: Optional[str] = None,
+        style_config: Optional[str] = None,
+        enable_charts: bool = False,
+        chart_data: str = '',
+        metadata: Optional[DocumentMetadata] = None
+    ) -> bool:
+        """将Markdown文本转换为Word文档
+
+        Args:
+            markdown_text: Markdown文本
+            output_path: 输出文件路径，或可写的二进制流
+            theme: 主题名称
+            style_config: JSON 格式的样式配置
+            enable_charts: 是否启用图表生成
+            chart_data: 图表数据（JSON格式）
+            metadata: 可选的元数据对象，解析时一并记录文档元数据（标题、大纲等）
+
+        Returns:
+            是否生成成功
+        """
+        config = self.load_config(theme=theme, json_config=style_config)
+        word_generator = self.create_generator(config, enable_charts, chart_data)
+        blocks = self.iter_blocks(markdown_text, metadata)
+        try:
+            return word_generator.generate(
+                blocks,
+                output_path,
+                markdown_text=markdown_text
+            )
+        finally:
+            blocks.close()
+
+    def convert_to_bytes(
+        self,
+        markdown_text: str,
+        theme: Optional[str] = None,
+        style_config: Optional[str] = None,
+        enable_charts: bool = False,
+        chart_data: str = '',
+        stream: Optional[IO[bytes]] = None,
+        metadata: Optional[DocumentMetadata] = None
+    ) -> Optional[bytes]:
+        """将Markdown文本转换为Word文档，直接返回文档内容（全程不落盘）
+
+        Args:
+            markdown_text: Markdown文本
+            theme: 主题名称
+            style_config: JSON 格式的样式配置
+            enable_charts: 是否启用图表生成
+            chart_data: 图表数据（JSON格式）
+            stream: 可选的可写二进制流，文档同时写入其中
+            metadata: 可选的元数据对象，解析时一并记录文档元数据（标题、大纲等）
+
+        Returns:
+            文档的字节内容，生成失败时返回 None
+        """
+        config = self.load_config(theme=theme, json_config=style_config)
+        word_generator = self.create_generator(config, enable_charts, chart_data)
+        blocks = self.iter_blocks(markdown_text, metadata)
+        try:
+            return word_generator.generate_bytes(
+                blocks,
+                stream=stream,
+                markdown_text=markdown_text
+            )
+        finally:
+            blocks.close()
+
+
+_engine: Optional[ConversionEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> ConversionEngine:
+    """获取进程级共享的转换引擎（首次调用时创建）"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = ConversionEngine()
+    return _engine
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+行内Markdown解析模块
+从左到右单遍扫描行内文本，构建包含文本、粗体、斜体、行内代码、链接、公式和图片的
+行内节点树（支持嵌套），供解析器计算纯文本、Word生成器输出带格式的文字
+"""
+
+import html
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+# 出现这些字符时才需要处理行内标记，否则文本原样返回
+INLINE_SPECIAL = re.compile(r'[\\`*_\[<$&!]')
+
+# 行内标记（从左到右依次匹配）：不参与强调匹配的片段，以及强调分隔符
+_INLINE_TOKEN = re.compile(
+    r'(?P<escape>\\[!-/:-@\[-`{-~])'
+    r'|(?P<code>(?P<ticks>`+)(?P<code_text>.+?)(?<!`)(?P=ticks)(?!`))'
+    r'|(?P<image>!\[(?P<alt>[^\]]*)\]\((?P<src>(?:[^()]|\([^()]*\))*)\))'
+    r'|(?P<link>\[(?P<link_text>(?:\\.|[^\[\]\\]|\[[^\]]*\])*)\]'
+    r'\((?P<href>(?:[^()]|\([^()]*\))*)\))'
+    r'|(?P<autolink><(?P<url>[A-Za-z][A-Za-z0-9+.-]{1,31}:[^<>\s]*)>)'
+    r'|(?P<tag></?[A-Za-z][A-Za-z0-9-]*(?:\s[^<>]*)?/?>)'
+    r'|(?P<math>\$(?P<math_text>[^$]+)\$)'
+    r'|(?P<delimiter>\*+|_+)',
+    re.DOTALL
+)
+
+_WORD_CHAR = re.compile(r'\w')
+
+
+@dataclass(slots=True)
+class InlineNode:
+    """行内节点
+
+    kind 取值：
+    - text / code / math：文字在 text 中
+    - strong / em：子节点在 children 中
+    - link：子节点为链接文字，url 为链接地址（引用式链接 [文字][编号] 不识别，
+      含链接定义的文档由HTML解析处理，见 markdown_parser.native_supported）
+    - image：text 为替代文字，url 为图片地址
+    """
+    kind: str
+    text: str = ''
+    children: Optional[List['InlineNode']] = None
+    url: str = ''
+
+
+class _Delimiter:
+    """未配对的强调分隔符（* 或 _ 的连续序列）"""
+
+    __slots__ = ('char', 'length', 'count', 'can_open', 'can_close')
+
+    def __init__(self, char: str, count: int, can_open: bool, can_close: bool):
+        self.char = char
+        self.length = count  # 原始长度（配对的“3 的倍数”规则按原始长度判断）
+        self.count = count
+        self.can_open = can_open
+        self.can_close = can_close
+
+
+def _link_target(destination: str) -> str:
+    """链接/图片括号内的地址（去掉标题和尖括号）"""
+    parts = destination.strip().split(None, 1)
+    return parts[0].strip('<>') if parts else ''
+
+
+def _append_text(items: list, text: str):
+    """追加文字，与前一个文字节点合并"""
+    if not text:
+        return
+    if items and isinstance(items[-1], InlineNode) and items[-1].kind == 'text':
+        items[-1].text += text
+    else:
+        items.append(InlineNode('text', text))
+
+
+def parse_inline(text: str) -> List[InlineNode]:
+    """解析行内Markdown为节点树
+
+    单遍扫描：转义、行内代码、图片、链接、自动链接、HTML标签和公式按出现顺序识别，
+    * 和 _ 作为分隔符入栈，每遇到可闭合的分隔符就与最近的同类开启分隔符配对
+    （双方都不少于两个时为粗体，否则为斜体），未配对的分隔符按原文输出。
+    配对遵循 CommonMark 的“3 的倍数”规则：任一方既能开启又能闭合时，双方原始长度之和
+    为 3 的倍数（且两者不都是 3 的倍数）则不能配对，如 **a*b** 中的单个 * 不与 ** 配对。
+
+    Args:
+        text: 行内Markdown文本
+
+    Returns:
+        行内节点列表
+    """
+    items: list = []
+    position = 0
+    for match in _INLINE_TOKEN.finditer(text):
+        start = match.start()
+        if start > position:
+            _append_text(items, _unescape(text[position:start]))
+        position = match.end()
+
+        kind = match.lastgroup
+        if kind == 'delimiter':
+            run = match.group('delimiter')
+            before = text[start - 1] if start > 0 else ' '
+            after = text[position] if position < len(text) else ' '
+            can_open = not after.isspace()
+            can_close = not before.isspace()
+            if run[0] == '_':
+                # 下划线形式不能在单词内部开启或闭合
+                can_open = can_open and not _WORD_CHAR.match(before)
+                can_close = can_close and not _WORD_CHAR.match(after)
+            items.append(_Delimiter(run[0], len(run), can_open, can_close))
+        elif kind == 'escape':
+            _append_text(items, match.group('escape')[1])
+        elif kind == 'code':
+            items.append(InlineNode('code', match.group('code_text').strip()))
+        elif kind == 'image':
+            items.append(InlineNode('image', _unescape(match.group('alt')),
+                                    url=_link_target(match.group('src'))))
+        elif kind == 'link':
+            items.append(InlineNode('link', children=parse_inline(match.group('link_text')),
+                                    url=_link_target(match.group('href'))))
+        elif kind == 'autolink':
+            url = match.group('url')
+            items.append(InlineNode('link', children=[InlineNode('text', url)], url=url))
+        elif kind == 'math':
+            # 与预处理相同，只识别 $...$（$$x$$ 中间的 $x$ 为公式，两侧的 $ 保留为文字）
+            items.append(InlineNode('math', match.group('math_text')))
+        # HTML 标签不产生内容
+
+    if position < len(text):
+        _append_text(items, _unescape(text[position:]))
+    return _resolve_emphasis(items)
+
+
+def _unescape(text: str) -> str:
+    """还原HTML实体"""
+    return html.unescape(text) if '&' in text else text
+
+
+def _resolve_emphasis(items: list) -> List[InlineNode]:
+    """按从左到右的顺序配对强调分隔符，返回节点列表"""
+    # 最近一次找不到开启分隔符的位置，之前不会再有可配对的开启分隔符
+    # （“3 的倍数”规则与闭合分隔符的长度和能否开启有关，按这些条件分别记录）
+    openers_bottom = {}
+    i = 0
+    while i < len(items):
+        closer = items[i]
+        if not isinstance(closer, _Delimiter) or not closer.can_close or not closer.count:
+            i += 1
+            continue
+
+        bottom_key = (closer.char, closer.can_open, closer.length % 3)
+        j = i - 1
+        while j > openers_bottom.get(bottom_key, -1):
+            opener = items[j]
+            if isinstance(opener, _Delimiter) and opener.char == closer.char \
+                    and opener.can_open and opener.count and _can_pair(opener, closer):
+                break
+            j -= 1
+        else:
+            # 能开启的闭合分隔符之后仍可作为开启分隔符
+            openers_bottom[bottom_key] = i - 1 if closer.can_open else i
+            i += 1
+            continue
+
+        use = 2 if opener.count >= 2 and closer.count >= 2 else 1
+        opener.count -= use
+        closer.count -= use
+        node = InlineNode('strong' if use == 2 else 'em', children=_finalize(items[j + 1:i]))
+        items[j + 1:i] = [node]
+        # 闭合分隔符现在位于 j + 2，剩余的分隔符继续参与配对
+        i = j + 2
+
+    return _finalize(items)
+
+
+def _can_pair(opener: _Delimiter, closer: _Delimiter) -> bool:
+    """CommonMark 的“3 的倍数”规则"""
+    if not (opener.can_close or closer.can_open):
+        return True
+    total = opener.length + closer.length
+    return total % 3 != 0 or (opener.length % 3 == 0 and closer.length % 3 == 0)
+
+
+def _finalize(items: list) -> List[InlineNode]:
+    """未配对的分隔符还原为文字，合并相邻的文字节点"""
+    nodes: List[InlineNode] = []
+    for item in items:
+        if isinstance(item, _Delimiter):
+            _append_text(nodes, item.char * item.count)
+        elif item.kind == 'text':
+            _append_text(nodes, item.text)
+        else:
+            nodes.append(item)
+    return nodes
+
+
+def inline_plain_text(nodes: List[InlineNode]) -> str:
+    """节点树的纯文本（与 HTML 渲染后 get_text() 得到的文字一致，图片不产生文字）"""
+    parts = []
+    for node in nodes:
+        if node.children is not None:
+            parts.append(inline_plain_text(node.children))
+        elif node.kind != 'image':
+            parts.append(node.text)
+    return ''.join(parts)
+
+
+def has_formatting(nodes: List[InlineNode]) -> bool:
+    """节点树中是否有需要单独设置格式的节点（只有文字和公式时返回 False）"""
+    return any(node.kind not in ('text', 'math') for node in nodes)
+
+
+def strip_inline(nodes: List[InlineNode]) -> List[InlineNode]:
+    """去掉节点树首尾的空白（与纯文本的 strip() 对应）"""
+    _strip_edge(nodes, leading=True)
+    _strip_edge(nodes, leading=False)
+    return nodes
+
+
+def _strip_edge(nodes: List[InlineNode], leading: bool):
+    """去掉首（尾）端的空白文字，空白节点整个移除"""
+    while nodes:
+        index = 0 if leading else -1
+        node = nodes[index]
+        if node.children is not None:
+            _strip_edge(node.children, leading)
+            if node.children or node.kind == 'link':
+                return
+        elif node.kind in ('text', 'code', 'math'):
+            node.text = node.text.lstrip() if leading else node.text.rstrip()
+            if node.text:
+                return
+        else:
+            return
+        del nodes[index]
+
+
+def inline_text(text: str) -> str:
+    """将行内Markdown转换为纯文本
+
+    去掉强调、行内代码、链接、图片、HTML标签和公式的标记，
+    结果与 HTML 渲染后 get_text() 得到的文字一致。
+
+    Args:
+        text: 行内Markdown文本
+
+    Returns:
+        纯文本
+    """
+    if not INLINE_SPECIAL.search(text):
+        return text
+    return inline_plain_text(parse_inline(text))
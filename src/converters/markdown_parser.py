@@ -5,68 +5,479 @@ Markdown解析器模块
 负责解析Markdown文档，构建语法树，处理各种Markdown元素
 """
 
+import logging
 import re
+import sys
 import markdown
-from markdown.extensions import codehilite, tables, toc
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from array import array
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Any, Mapping, Optional, Sequence, Union
+from dataclasses import dataclass, field
+
+from .inline_parser import InlineNode, has_formatting, inline_plain_text, strip_inline
+from .preprocessor import normalize_newlines, preprocess_markdown
+
+logger = logging.getLogger('smart_doc.markdown_parser')
+
+
+# 标题元素类型（按级别预先生成的驻留字符串）
+HEADING_TYPES = tuple(sys.intern(f'heading{level}') for level in range(1, 7))
+
+# 没有属性或子元素的元素共享的只读空容器
+_EMPTY_ATTRIBUTES: Mapping[str, Any] = MappingProxyType({})
+_EMPTY_CHILDREN: Sequence['MarkdownElement'] = ()
 
 
-@dataclass
 class MarkdownElement:
-    """Markdown元素基类"""
-    element_type: str
-    content: str
-    attributes: Dict[str, Any] = None
-    children: List['MarkdownElement'] = None
+    """Markdown元素基类
+
+    使用 __slots__，实例不带 __dict__；元素类型为驻留字符串，同类元素共享同一对象。
+    没有属性或子元素的元素不分配字典和列表，读取 attributes / children 得到共享的只读空容器。
+
+    attributes / children 只用于读取：修改属性和子元素一律通过 set_attribute、add_child、
+    extend_children 或整体赋值，对空容器直接写入会抛出 TypeError。
+    """
+
+    __slots__ = ('element_type', 'content', '_attributes', '_children')
+
+    def __init__(self, element_type: str, content: str,
+                 attributes: Optional[Dict[str, Any]] = None,
+                 children: Optional[List['MarkdownElement']] = None):
+        self.element_type = sys.intern(element_type)
+        self.content = content
+        self._attributes = attributes or None
+        self._children = children or None
+
+    @property
+    def attributes(self) -> Mapping[str, Any]:
+        """属性（只读，修改使用 set_attribute）"""
+        attributes = self._attributes
+        return attributes if attributes is not None else _EMPTY_ATTRIBUTES
+
+    @attributes.setter
+    def attributes(self, value: Optional[Dict[str, Any]]):
+        self._attributes = value or None
+
+    @property
+    def children(self) -> Sequence['MarkdownElement']:
+        """子元素（只读，修改使用 add_child / extend_children）"""
+        children = self._children
+        return children if children is not None else _EMPTY_CHILDREN
+
+    @children.setter
+    def children(self, value: Optional[Iterable['MarkdownElement']]):
+        self._children = list(value) if value else None
+
+    def set_attribute(self, key: str, value: Any):
+        """设置属性（首次设置时分配属性字典）"""
+        if self._attributes is None:
+            self._attributes = {key: value}
+        else:
+            self._attributes[key] = value
+
+    def add_child(self, child: 'MarkdownElement'):
+        """添加子元素（首次添加时分配子元素列表）"""
+        if self._children is None:
+            self._children = [child]
+        else:
+            self._children.append(child)
+
+    def extend_children(self, children: Iterable['MarkdownElement']):
+        """依次添加多个子元素"""
+        for child in children:
+            self.add_child(child)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, MarkdownElement):
+            return NotImplemented
+        return (self.element_type == other.element_type and self.content == other.content
+                and (self._attributes or {}) == (other._attributes or {})
+                and (self._children or []) == (other._children or []))
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (f"MarkdownElement(element_type={self.element_type!r}, content={self.content!r}, "
+                f"attributes={self._attributes or {}!r}, children={self._children or []!r})")
+
+
+class TableData:
+    """表格单元格数据（扁平存储）
+
+    所有单元格按行优先顺序存放在一个列表中，每行的起始位置记录在整数数组里，
+    不为每一行单独分配列表。按行访问时返回该行单元格的新列表，兼容原先
+    List[List[str]] 的用法（len、下标、遍历）；只需要单元格时使用 iter_cells。
+    """
+
+    __slots__ = ('cells', 'row_starts', 'cols')
+
+    def __init__(self, rows: Iterable[Sequence[str]] = ()):
+        """初始化表格数据
+
+        Args:
+            rows: 初始的行（每行为单元格文本序列，各行长度可以不同）
+        """
+        self.cells: List[str] = []
+        self.row_starts = array('L', [0])
+        self.cols = 0  # 最长一行的单元格数
+        for row in rows:
+            self.append_row(row)
+
+    def append_row(self, row: Sequence[str]):
+        """追加一行"""
+        self.cells.extend(row)
+        self.row_starts.append(len(self.cells))
+        if len(row) > self.cols:
+            self.cols = len(row)
+
+    def iter_cells(self) -> Iterator[str]:
+        """按行优先顺序遍历所有单元格"""
+        return iter(self.cells)
+
+    def __len__(self) -> int:
+        return len(self.row_starts) - 1
+
+    def __getitem__(self, index: int) -> List[str]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("表格行号超出范围")
+        return self.cells[self.row_starts[index]:self.row_starts[index + 1]]
+
+    def __iter__(self) -> Iterator[List[str]]:
+        cells = self.cells
+        starts = self.row_starts
+        for index in range(len(starts) - 1):
+            yield cells[starts[index]:starts[index + 1]]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, TableData):
+            return self.cells == other.cells and self.row_starts == other.row_starts
+        if isinstance(other, (list, tuple)):
+            return list(self) == [list(row) for row in other]
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"TableData(rows={len(self)}, cols={self.cols})"
+
+
+def element_text(element: MarkdownElement) -> str:
+    """元素及其子元素的纯文本（用于引用等容器元素的 content）
+
+    Args:
+        element: 文档元素
+
+    Returns:
+        各层文本按换行拼接的结果，表格取所有非空单元格
+    """
+    if element.element_type == 'table':
+        data = element.attributes.get('data')
+        if data is None:
+            return ''
+        cells = data.iter_cells() if isinstance(data, TableData) else (cell for row in data for cell in row)
+        return '\n'.join(cell for cell in cells if cell)
+    texts = [element.content] if element.content else []
+    for child in element.children:
+        text = element_text(child)
+        if text:
+            texts.append(text)
+    return '\n'.join(texts)
+
+
+@dataclass
+class DocumentMetadata:
+    """文档元数据：标题、标题大纲以及图片、链接、代码块、表格清单
 
-    def __post_init__(self):
-        if self.attributes is None:
-            self.attributes = {}
-        if self.children is None:
-            self.children = []
+    解析器每产出一个顶层块就顺带记录（见 collect），不再对原文做额外扫描；
+    解析完整文档时存放在根元素的 attributes['metadata'] 中，文件名、大纲和目录直接读取。
+    """
+    title: Optional[str] = None
+    headings: List[Dict[str, Any]] = field(default_factory=list)
+    images: List[Dict[str, str]] = field(default_factory=list)
+    links: List[Dict[str, str]] = field(default_factory=list)
+    code_blocks: List[Dict[str, str]] = field(default_factory=list)
+    tables: List[Dict[str, Any]] = field(default_factory=list)
+    # 已记录的顶层块数（标题的 block 为其所在顶层块的序号）
+    block_count: int = 0
+
+    def collect(self, blocks: Iterable[MarkdownElement]) -> Iterator[MarkdownElement]:
+        """原样产出顶层块，同时记录每个块的元数据
+
+        Args:
+            blocks: 顶层块序列
+
+        Yields:
+            顶层块元素
+        """
+        for block in blocks:
+            self.add_block(block)
+            yield block
+
+    def add_block(self, block: MarkdownElement):
+        """记录一个顶层块（含其中嵌套的元素）"""
+        self._add_element(block, top_level=True)
+        self.block_count += 1
+
+    def _add_element(self, element: MarkdownElement, top_level: bool = False):
+        element_type = element.element_type
+        attributes = element.attributes
+        if element_type in HEADING_TYPES:
+            level = HEADING_TYPES.index(element_type) + 1
+            self.headings.append({
+                'level': level,
+                'title': element.content,
+                'block': self.block_count,
+                # 嵌套在引用、列表项中的标题为 False
+                'top_level': top_level
+            })
+            if level == 1 and self.title is None:
+                self.title = element.content
+        elif element_type == 'image':
+            self.images.append({'alt': attributes.get('alt', ''), 'src': attributes.get('src', '')})
+        elif element_type == 'code_block':
+            self.code_blocks.append({
+                'language': attributes.get('language') or 'text',
+                'code': element.content
+            })
+        elif element_type == 'table':
+            self.tables.append({'rows': attributes.get('rows', 0), 'cols': attributes.get('cols', 0)})
+
+        inline = attributes.get('inline')
+        if inline:
+            self._add_inline(inline)
+        for child in element.children:
+            self._add_element(child)
+
+    def _add_inline(self, nodes: List[InlineNode]):
+        """记录行内节点树中的链接和图片（引用式链接没有地址，不记录）"""
+        for node in nodes:
+            if node.kind == 'image':
+                self.images.append({'alt': node.text, 'src': node.url})
+            elif node.kind == 'link' and node.url:
+                self.links.append({'text': inline_plain_text(node.children), 'url': node.url})
+            if node.children:
+                self._add_inline(node.children)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """字典形式的元数据（与 MarkdownParser.extract_metadata 的返回值相同）
+
+        与早期逐行扫描原文的版本不兼容：标题项为 {level, title, block, top_level}
+        （block 为所在顶层块的序号，取代原先的行号 line），表格项为 {rows, cols}
+        （不再包含表格原文 content）。
+        """
+        return {
+            'title': self.title,
+            'headings': self.headings,
+            'images': self.images,
+            'links': self.links,
+            'code_blocks': self.code_blocks,
+            'tables': self.tables
+        }
+
+
+# HTML 行内标签对应的行内节点类型
+_INLINE_TAG_KINDS = {
+    'strong': 'strong', 'b': 'strong',
+    'em': 'em', 'i': 'em',
+    'code': 'code',
+    'a': 'link',
+    'img': 'image', 'img-placeholder': 'image',
+    'math-inline': 'math',
+}
+
+
+def _html_inline_nodes(nodes) -> List[InlineNode]:
+    """将 HTML 行内内容转换为行内节点树（文字与 get_text() 一致）
+
+    Args:
+        nodes: BeautifulSoup 节点序列（通常为某个元素的 children）
+
+    Returns:
+        行内节点列表
+    """
+    result: List[InlineNode] = []
+    for node in nodes:
+        name = getattr(node, 'name', None)
+        if name is None:
+            text = str(node)
+            if result and result[-1].kind == 'text':
+                result[-1].text += text
+            elif text:
+                result.append(InlineNode('text', text))
+            continue
+
+        kind = _INLINE_TAG_KINDS.get(name)
+        if kind in ('code', 'math'):
+            result.append(InlineNode(kind, node.get_text()))
+        elif kind == 'image':
+            result.append(InlineNode('image', node.get('alt', ''), url=node.get('src', '')))
+        elif kind == 'link':
+            result.append(InlineNode('link', children=_html_inline_nodes(node.children), url=node.get('href', '')))
+        elif kind is not None:
+            result.append(InlineNode(kind, children=_html_inline_nodes(node.children)))
+        else:
+            # 其他标签只保留其中的内容
+            for child in _html_inline_nodes(node.children):
+                if child.kind == 'text' and result and result[-1].kind == 'text':
+                    result[-1].text += child.text
+                else:
+                    result.append(child)
+    return result
+
+
+def _inline_attributes(nodes) -> Optional[Dict[str, Any]]:
+    """含粗体、斜体、代码或链接时返回 {'inline': 行内节点树}，否则返回 None"""
+    inline = _html_inline_nodes(nodes)
+    return {'inline': strip_inline(inline)} if has_formatting(inline) else None
+
+
+# HTML 标题标签
+_HEADING_TAGS = frozenset(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+
+# 列表项中按块级元素处理的标签，其余标签视为行内内容
+_BLOCK_TAGS = _HEADING_TAGS | frozenset(['p', 'pre', 'blockquote', 'ul', 'ol', 'table', 'div', 'dl', 'hr'])
+
+# 图片标签（img-placeholder 为预处理生成的图片占位符）
+_IMAGE_TAGS = ('img', 'img-placeholder')
+
+# 不产生内容、也不需要遍历子节点的标签
+_SKIPPED_TAGS = frozenset(['hr', 'script', 'style'])
+
+# 完整的扩展列表（顺序即注册顺序）
+_FULL_EXTENSIONS = (
+    'markdown.extensions.tables',
+    'markdown.extensions.toc',
+    'markdown.extensions.fenced_code',
+    'markdown.extensions.attr_list',
+    'markdown.extensions.def_list',
+    'markdown.extensions.footnotes',
+    'markdown.extensions.md_in_html'
+)
+
+# 代码高亮在生成Word时完成（见 utils.code_highlighter），这里不再加载 codehilite，
+# 围栏代码块的语言保留在 <code class="language-xxx"> 中
+_EXTENSION_CONFIGS = {
+    'toc': {
+        'permalink': True
+    }
+}
+
+# 各扩展对应语法的特征：文档中不出现时该扩展不影响解析结果，可以不加载。
+# 特征只需宁多勿少（误判为存在时仅多加载扩展，结果不变）
+_FENCE_PATTERN = re.compile(r'^[ \t]*(?:```|~~~)', re.MULTILINE)
+_DEFINITION_PATTERN = re.compile(r'^ {0,3}:[ \t]', re.MULTILINE)
+
+_EXTENSION_FEATURES = {
+    'markdown.extensions.tables': lambda text: '|' in text,
+    'markdown.extensions.toc': lambda text: '[TOC]' in text,
+    'markdown.extensions.fenced_code': lambda text: _FENCE_PATTERN.search(text) is not None,
+    'markdown.extensions.attr_list': lambda text: '{' in text,
+    'markdown.extensions.def_list': lambda text: _DEFINITION_PATTERN.search(text) is not None,
+    'markdown.extensions.footnotes': lambda text: '[^' in text,
+    'markdown.extensions.md_in_html': lambda text: 'markdown=' in text,
+}
+
+# 原生解析器未实现的语法的特征：文档中出现时改用HTML解析（同样宁多勿少，误判只影响速度）。
+# 属性列表只在行尾生效；原始 HTML（含 md_in_html）以标签开头的尖括号判断；
+# 引用式链接 [文字][编号] 需要文档中的链接定义 [编号]: 地址
+_ATTRIBUTE_LIST_PATTERN = re.compile(r'\{:?[ \t]*[^}\s][^\n]*\}[ \t]*$', re.MULTILINE)
+_HTML_TAG_PATTERN = re.compile(r'<[A-Za-z/!?]')
+_LINK_REFERENCE_PATTERN = re.compile(r'^ {0,3}\[[^\[\]\n]*\]:', re.MULTILINE)
+
+_NATIVE_UNSUPPORTED = (
+    _EXTENSION_FEATURES['markdown.extensions.toc'],
+    _EXTENSION_FEATURES['markdown.extensions.def_list'],
+    _EXTENSION_FEATURES['markdown.extensions.footnotes'],
+    lambda text: _ATTRIBUTE_LIST_PATTERN.search(text) is not None,
+    lambda text: _HTML_TAG_PATTERN.search(text) is not None,
+    lambda text: _LINK_REFERENCE_PATTERN.search(text) is not None,
+)
+
+
+def native_supported(text: str) -> bool:
+    """原生解析器能否得到与HTML解析相同的文档树
+
+    Args:
+        text: 已标准化换行符的Markdown文本
+
+    Returns:
+        文档中不含脚注、定义列表、目录、属性列表、原始 HTML 和链接定义时返回 True
+    """
+    return not any(feature(text) for feature in _NATIVE_UNSUPPORTED)
 
 
 class MarkdownParser:
-    """Markdown解析器"""
+    """Markdown解析器
+
+    默认使用原生解析器直接从源文本构建文档树（文档含原生解析器不支持的语法时
+    自动改用HTML解析，见 native_supported）；配置 engine 为 "markdown" 时
+    总是使用 Python-Markdown 渲染 HTML 再由 BeautifulSoup 构建文档树。
+    """
     
     def __init__(self, config: Optional[Dict] = None):
         """初始化解析器
         
         Args:
-            config: 解析器配置
+            config: 解析器配置，engine 可选 "native"（默认）或 "markdown"
         """
         self.config = config or {}
-        self.markdown_instance = self._create_markdown_instance()
-        
-    def _create_markdown_instance(self) -> markdown.Markdown:
-        """创建Markdown实例"""
-        extensions = [
-            'markdown.extensions.tables',
-            'markdown.extensions.codehilite',
-            'markdown.extensions.toc',
-            'markdown.extensions.fenced_code',
-            'markdown.extensions.attr_list',
-            'markdown.extensions.def_list',
-            'markdown.extensions.footnotes',
-            'markdown.extensions.md_in_html'
-        ]
-        
-        extension_configs = {
-            'codehilite': {
-                'css_class': 'highlight',
-                'use_pygments': True
-            },
-            'toc': {
-                'permalink': True
-            }
-        }
+        self.engine = self.config.get('engine', 'native')
+        # profile 为 "auto"（默认）时按文档内容只加载用到的扩展，"full" 时总是加载全部扩展
+        self.profile = self.config.get('profile', 'auto')
+        
+        # 按扩展组合缓存的 Markdown 实例 {扩展元组: Markdown}
+        self.markdown_instances: Dict[tuple, markdown.Markdown] = {}
+        if self.engine == 'markdown':
+            # 预先构建完整配置和最常见的仅表格配置；原生解析模式下只在回退时才需要，延迟创建
+            self._get_markdown_instance(_FULL_EXTENSIONS)
+            if self.profile == 'auto':
+                self._get_markdown_instance(('markdown.extensions.tables',))
+        self.native_parser = self._create_native_parser() if self.engine == 'native' else None
+        
+        # 使用统计（供解析器池判断是否需要回收）
+        self.parse_count = 0
+        self.parsed_chars = 0
+        
+    def _create_markdown_instance(self, extensions=_FULL_EXTENSIONS) -> markdown.Markdown:
+        """创建Markdown实例
         
+        Args:
+            extensions: 加载的扩展列表
+        """
         return markdown.Markdown(
-            extensions=extensions,
-            extension_configs=extension_configs
+            extensions=list(extensions),
+            extension_configs=_EXTENSION_CONFIGS
         )
     
+    def _get_markdown_instance(self, extensions: tuple) -> markdown.Markdown:
+        """获取（必要时创建）指定扩展组合的 Markdown 实例"""
+        instance = self.markdown_instances.get(extensions)
+        if instance is None:
+            instance = self._create_markdown_instance(extensions)
+            self.markdown_instances[extensions] = instance
+        return instance
+    
+    def select_extensions(self, text: str) -> tuple:
+        """根据文档内容选择需要加载的扩展
+        
+        Args:
+            text: 预处理后的Markdown文本
+            
+        Returns:
+            扩展名元组（保持完整列表中的顺序）
+        """
+        if self.profile == 'full':
+            return _FULL_EXTENSIONS
+        return tuple(
+            extension for extension in _FULL_EXTENSIONS
+            if _EXTENSION_FEATURES[extension](text)
+        )
+    
+    def _create_native_parser(self):
+        """创建原生解析器（延迟导入，避免与 MarkdownElement 循环导入）"""
+        from .native_parser import NativeMarkdownParser
+        return NativeMarkdownParser()
+    
     def parse(self, markdown_text: str) -> MarkdownElement:
         """解析Markdown文本
         
@@ -76,25 +487,117 @@ class MarkdownParser:
         Returns:
             解析后的文档树
         """
+        self.parse_count += 1
+        self.parsed_chars += len(markdown_text)
+        
+        if self.native_parser is not None:
+            text = self._normalize_newlines(markdown_text)
+            if native_supported(text):
+                try:
+                    return self.native_parser.parse(text)
+                except Exception as e:
+                    logger.warning("原生解析失败，使用HTML解析: %s", e)
+        
+        return self._parse_html(markdown_text)
+    
+    def iter_blocks(self, markdown_text: str,
+                    metadata: Optional[DocumentMetadata] = None) -> Iterator[MarkdownElement]:
+        """流式解析Markdown文本，逐个产出顶层块元素
+        
+        原生解析模式下每个顶层块解析完成即产出，不构建整篇文档树，
+        调用方处理完一个块后即可释放，常驻内存只与最大的块有关。
+        
+        限制：HTML解析模式（以及文档含原生解析器不支持的语法、原生解析在产出第一个块之前
+        失败而回退时）无法流式处理，仍会一次生成整篇 HTML、BeautifulSoup 树和文档树，
+        峰值内存与文档大小成正比；之后逐个产出顶层块，已产出的块不再被解析器引用。
+        
+        Args:
+            markdown_text: Markdown文本内容
+            metadata: 可选的元数据对象，产出块的同时记录元数据，迭代结束后即完整
+            
+        Yields:
+            顶层块元素
+        """
+        blocks = self._iter_blocks(markdown_text)
+        if metadata is not None:
+            blocks = metadata.collect(blocks)
+        yield from blocks
+    
+    def _iter_blocks(self, markdown_text: str) -> Iterator[MarkdownElement]:
+        """逐个产出顶层块元素（见 iter_blocks）"""
+        self.parse_count += 1
+        self.parsed_chars += len(markdown_text)
+        
+        text = self._normalize_newlines(markdown_text) if self.native_parser is not None else None
+        if text is not None and native_supported(text):
+            emitted = False
+            try:
+                for block in self.native_parser.iter_blocks(text):
+                    emitted = True
+                    yield block
+                return
+            except Exception as e:
+                # 已产出的块无法撤回，只能在开始前回退
+                if emitted:
+                    raise
+                logger.warning("原生解析失败，使用HTML解析: %s", e)
+        
+        # 元数据由 iter_blocks 在产出时记录（调用方需要时），这里不再另外构建
+        blocks = list(self._parse_html(markdown_text, collect_metadata=False).children)
+        blocks.reverse()
+        while blocks:
+            yield blocks.pop()
+    
+    def _parse_html(self, markdown_text: str, collect_metadata: bool = True) -> MarkdownElement:
+        """经 Python-Markdown 渲染 HTML 后构建文档树
+        
+        Args:
+            markdown_text: Markdown文本内容
+            collect_metadata: 是否记录文档元数据（存放在根元素的 attributes['metadata'] 中）
+        """
         # 预处理
         processed_text = self._preprocess(markdown_text)
         
-        # 解析为HTML
-        html_content = self.markdown_instance.convert(processed_text)
+        # 解析为HTML（复用实例时先重置脚注、目录等状态）
+        markdown_instance = self._get_markdown_instance(self.select_extensions(processed_text))
+        markdown_instance.reset()
+        html_content = markdown_instance.convert(processed_text)
         
         # 构建文档树
         document = self._build_document_tree(html_content, processed_text)
         
+        # HTML路径一次构建整篇文档树，建成后遍历顶层块记录元数据
+        if collect_metadata:
+            metadata = DocumentMetadata()
+            for block in document.children:
+                metadata.add_block(block)
+            document.set_attribute('metadata', metadata)
+        
         return document
     
+    def reset(self):
+        """清除上一次解析留下的状态（脚注、目录、HTML暂存块等）"""
+        for markdown_instance in self.markdown_instances.values():
+            markdown_instance.reset()
+    
+    def _normalize_newlines(self, text: str) -> str:
+        """标准化换行符（字面上的 \\n 也转换为真正的换行符，兼容 \\n 格式）"""
+        return normalize_newlines(text)
+    
     def _preprocess(self, text: str) -> str:
-        """预处理Markdown文本"""
-        # 处理转义的换行符（兼容 \\n 格式）
-        # 将字面上的 \n 转换为真正的换行符
-        text = text.replace('\\n', '\n')
+        """预处理Markdown文本
         
-        # 标准化换行符
-        text = text.replace('\r\n', '\n').replace('\r', '\n')
+        单遍扫描完成全部预处理（见 preprocessor.preprocess_markdown），
+        公式与图片标记相互嵌套或出现连续三个 $ 时改为逐步处理，两者结果一致。
+        """
+        processed_text = preprocess_markdown(text)
+        if processed_text is None:
+            processed_text = self._preprocess_stepwise(text)
+        return processed_text
+    
+    def _preprocess_stepwise(self, text: str) -> str:
+        """逐步预处理Markdown文本（每个步骤完整扫描一遍文本）"""
+        text = self._normalize_newlines(text)
         
         # 处理数学公式
         text = self._process_math_formulas(text)
@@ -169,16 +672,9 @@ class MarkdownParser:
             soup = BeautifulSoup(html_content, 'html.parser')
             
             # 创建文档根元素
-            document = MarkdownElement(
-                element_type='document',
-                content='',
-                attributes={'original_text': original_text}
-            )
+            document = MarkdownElement(element_type='document', content='')
             
             # 不再自动提取和添加标题，标题应该由 Markdown 中的 H1 标题处理
-            # title = self._extract_title(original_text)
-            # if title:
-            #     document.attributes['title'] = title
             
             # 解析HTML元素并构建文档树
             self._parse_html_elements(soup, document)
@@ -189,116 +685,158 @@ class MarkdownParser:
             # 直接从原始Markdown文本解析
             return self._build_document_tree_from_markdown(original_text)
         except Exception as e:
-            print(f"解析HTML失败，使用备用方法: {e}")
+            logger.warning("解析HTML失败，使用备用方法: %s", e)
             return self._build_document_tree_from_markdown(original_text)
     
-    def _parse_html_elements(self, soup, parent: MarkdownElement):
-        """解析HTML元素并添加到文档树"""
-        for element in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'pre', 'blockquote', 'ul', 'ol', 'table', 'img']):
-            if element.name.startswith('h'):
-                # 处理标题
-                level = int(element.name[1])
-                heading = MarkdownElement(
-                    element_type=f'heading{level}',
-                    content=element.get_text().strip(),
-                    attributes={}
-                )
-                parent.children.append(heading)
-            elif element.name == 'p':
-                # 处理段落
-                text = element.get_text().strip()
-                if text:  # 只添加非空段落
-                    paragraph = MarkdownElement(
-                        element_type='paragraph',
-                        content=text,
-                        attributes={}
-                    )
-                    parent.children.append(paragraph)
-            elif element.name == 'pre':
-                # 处理代码块
-                code_text = element.get_text().strip()
-                code_element = element.find('code')
-                language = code_element.get('class', [''])[0].replace('language-', '') if code_element else ''
-                code_block = MarkdownElement(
-                    element_type='code_block',
-                    content=code_text,
-                    attributes={'language': language} if language else {}
-                )
-                parent.children.append(code_block)
-            elif element.name == 'blockquote':
-                # 处理引用
-                quote_text = element.get_text().strip()
-                quote = MarkdownElement(
-                    element_type='quote',
-                    content=quote_text,
-                    attributes={}
+    def _parse_html_elements(self, node, parent: MarkdownElement):
+        """解析HTML节点的直接子节点并添加到文档树
+
+        只遍历直接子节点，列表、列表项和引用的内部内容递归构建为子元素，
+        每个节点只处理一次（嵌套内容不会再作为顶层元素重复输出）。
+        """
+        for element in node.children:
+            # 容器层级的文本节点（通常是换行符）不产生元素
+            if getattr(element, 'name', None) is not None:
+                self._convert_html_element(element, parent)
+    
+    def _convert_html_element(self, element, parent: MarkdownElement):
+        """将单个HTML节点转换为文档元素并添加到 parent"""
+        name = element.name
+        if name in _HEADING_TAGS:
+            # 处理标题
+            level = int(name[1])
+            heading = MarkdownElement(
+                element_type=HEADING_TYPES[level - 1],
+                content=element.get_text().strip()
+            )
+            parent.add_child(heading)
+        elif name == 'p':
+            # 处理段落
+            text = element.get_text().strip()
+            if text:  # 只添加非空段落
+                paragraph = MarkdownElement(
+                    element_type='paragraph',
+                    content=text,
+                    attributes=_inline_attributes(element.children)
                 )
-                parent.children.append(quote)
-            elif element.name in ['ul', 'ol']:
-                # 处理列表
-                list_type = 'ordered' if element.name == 'ol' else 'unordered'
-                list_element = MarkdownElement(
-                    element_type='list',
+                parent.add_child(paragraph)
+            # 段落中的图片；只有图片的段落中预处理生成的图片占位符同样输出为图片元素
+            for img in element.find_all('img' if text else _IMAGE_TAGS):
+                self._append_image(img, parent)
+        elif name == 'pre':
+            # 处理代码块
+            code_text = element.get_text().strip()
+            code_element = element.find('code')
+            language = code_element.get('class', [''])[0].replace('language-', '') if code_element else ''
+            code_block = MarkdownElement(
+                element_type='code_block',
+                content=code_text,
+                attributes={'language': language} if language else None
+            )
+            parent.add_child(code_block)
+        elif name == 'blockquote':
+            # 处理引用：内部块作为子元素，content 为其纯文本
+            quote = MarkdownElement(
+                element_type='quote',
+                content=''
+            )
+            self._parse_html_elements(element, quote)
+            quote.content = element_text(quote)
+            parent.add_child(quote)
+        elif name in ('ul', 'ol'):
+            # 处理列表
+            list_type = 'ordered' if name == 'ol' else 'unordered'
+            list_element = MarkdownElement(
+                element_type='list',
+                content='',
+                attributes={'type': list_type}
+            )
+            for li in element.find_all('li', recursive=False):
+                list_item = self._build_list_item(li)
+                if list_item.content or list_item.children:
+                    list_element.add_child(list_item)
+            if list_element.children:
+                parent.add_child(list_element)
+        elif name == 'table':
+            # 处理表格
+            table_data = TableData()
+            for row in element.find_all('tr'):
+                cells = row.find_all(['td', 'th'], recursive=False)
+                row_data = [cell.get_text().strip() for cell in cells]
+                if row_data:
+                    table_data.append_row(row_data)
+            
+            if len(table_data):
+                table = MarkdownElement(
+                    element_type='table',
                     content='',
-                    attributes={'type': list_type}
+                    attributes={
+                        'rows': len(table_data),
+                        'cols': table_data.cols,
+                        'data': table_data
+                    }
                 )
-                for li in element.find_all('li', recursive=False):
-                    item_text = li.get_text().strip()
-                    if item_text:
-                        list_item = MarkdownElement(
-                            element_type='list_item',
-                            content=item_text,
-                            attributes={}
-                        )
-                        list_element.children.append(list_item)
-                if list_element.children:
-                    parent.children.append(list_element)
-            elif element.name == 'table':
-                # 处理表格
-                rows = element.find_all('tr')
-                if rows:
-                    table_data = []
-                    for row in rows:
-                        cells = row.find_all(['td', 'th'])
-                        row_data = [cell.get_text().strip() for cell in cells]
-                        if row_data:
-                            table_data.append(row_data)
-                    
-                    if table_data:
-                        table = MarkdownElement(
-                            element_type='table',
-                            content='',
-                            attributes={
-                                'rows': len(table_data),
-                                'cols': max(len(row) for row in table_data) if table_data else 0,
-                                'data': table_data
-                            }
-                        )
-                        parent.children.append(table)
-            elif element.name == 'img':
-                # 处理图片
-                src = element.get('src', '')
-                alt = element.get('alt', '')
-                if src:
-                    image = MarkdownElement(
-                        element_type='image',
-                        content=alt,
-                        attributes={'src': src, 'alt': alt}
-                    )
-                    parent.children.append(image)
+                parent.add_child(table)
+        elif name in _IMAGE_TAGS:
+            # 处理图片
+            self._append_image(element, parent)
+        elif name not in _SKIPPED_TAGS:
+            # 其他容器（代码高亮的 div、md_in_html 等）：继续遍历其子节点
+            self._parse_html_elements(element, parent)
+    
+    def _build_list_item(self, li) -> MarkdownElement:
+        """构建列表项：行内内容（或首个段落）作为 content，嵌套块作为子元素"""
+        list_item = MarkdownElement(
+            element_type='list_item',
+            content=''
+        )
+        
+        inline_nodes = []
+        for child in li.children:
+            if getattr(child, 'name', None) in _BLOCK_TAGS:
+                self._convert_html_element(child, list_item)
+            else:
+                inline_nodes.append(child)
+        
+        list_item.content = ''.join(
+            str(node) if getattr(node, 'name', None) is None else node.get_text() for node in inline_nodes
+        ).strip()
+        if list_item.content:
+            list_item.attributes = _inline_attributes(inline_nodes) or list_item.attributes
+        elif list_item.children and list_item.children[0].element_type == 'paragraph':
+            # 松散列表的列表项文字包在 <p> 中
+            first, *rest = list_item.children
+            list_item.children = rest
+            list_item.content = first.content
+            list_item.attributes = first.attributes
+        else:
+            # 只有图片的列表项与只有图片的段落相同，输出图片元素（排在嵌套块之前）
+            blocks = list_item.children
+            list_item.children = None
+            for node in inline_nodes:
+                if getattr(node, 'name', None) is not None:
+                    for img in ([node] if node.name in _IMAGE_TAGS else node.find_all(_IMAGE_TAGS)):
+                        self._append_image(img, list_item)
+            list_item.extend_children(blocks)
+        return list_item
+    
+    def _append_image(self, img, parent: MarkdownElement):
+        """添加图片元素（忽略没有 src 的图片）"""
+        src = img.get('src', '')
+        alt = img.get('alt', '')
+        if src:
+            image = MarkdownElement(
+                element_type='image',
+                content=alt,
+                attributes={'src': src, 'alt': alt}
+            )
+            parent.add_child(image)
     
     def _build_document_tree_from_markdown(self, markdown_text: str) -> MarkdownElement:
         """从Markdown文本直接构建文档树（备用方法）"""
-        document = MarkdownElement(
-            element_type='document',
-            content='',
-            attributes={'original_text': markdown_text}
-        )
+        document = MarkdownElement(element_type='document', content='')
         
         # 不再自动提取和添加标题，标题应该由 Markdown 中的 H1 标题处理
-        # title = self._extract_title(markdown_text)
-        # if title:
-        #     document.attributes['title'] = title
         
         lines = markdown_text.split('\n')
         i = 0
@@ -311,11 +849,10 @@ class MarkdownParser:
                 heading_text = line.lstrip('#').strip()
                 if heading_text and level <= 6:
                     heading = MarkdownElement(
-                        element_type=f'heading{level}',
-                        content=heading_text,
-                        attributes={}
+                        element_type=HEADING_TYPES[level - 1],
+                        content=heading_text
                     )
-                    document.children.append(heading)
+                    document.add_child(heading)
             
             # 处理段落
             elif line and not line.startswith('|') and not line.startswith('```') and not line.startswith('>'):
@@ -331,10 +868,9 @@ class MarkdownParser:
                 if paragraph_text:
                     paragraph = MarkdownElement(
                         element_type='paragraph',
-                        content=paragraph_text,
-                        attributes={}
+                        content=paragraph_text
                     )
-                    document.children.append(paragraph)
+                    document.add_child(paragraph)
             
             # 处理代码块
             elif line.startswith('```'):
@@ -350,19 +886,18 @@ class MarkdownParser:
                     code_block = MarkdownElement(
                         element_type='code_block',
                         content=code_text,
-                        attributes={'language': language} if language else {}
+                        attributes={'language': language} if language else None
                     )
-                    document.children.append(code_block)
+                    document.add_child(code_block)
             
             # 处理引用
             elif line.startswith('>'):
                 quote_text = line[1:].strip()
                 quote = MarkdownElement(
                     element_type='quote',
-                    content=quote_text,
-                    attributes={}
+                    content=quote_text
                 )
-                document.children.append(quote)
+                document.add_child(quote)
             
             # 处理表格
             elif '|' in line:
@@ -378,136 +913,47 @@ class MarkdownParser:
                 i -= 1
                 
                 # 解析表格数据
-                table_data = []
+                table_data = TableData()
                 for table_line in table_lines:
                     if '|' in table_line and not re.match(r'^\|?\s*:?-+:?\s*\|', table_line):
                         cells = [cell.strip() for cell in table_line.split('|') if cell.strip()]
                         if cells:
-                            table_data.append(cells)
+                            table_data.append_row(cells)
                 
-                if table_data:
+                if len(table_data):
                     table = MarkdownElement(
                         element_type='table',
                         content='',
                         attributes={
                             'rows': len(table_data),
-                            'cols': max(len(row) for row in table_data) if table_data else 0,
+                            'cols': table_data.cols,
                             'data': table_data
                         }
                     )
-                    document.children.append(table)
+                    document.add_child(table)
             
             i += 1
         
         return document
     
-    def extract_metadata(self, text: str) -> Dict[str, Any]:
-        """提取文档元数据"""
-        metadata = {
-            'title': self._extract_title(text),
-            'headings': self._extract_headings(text),
-            'images': self._extract_images(text),
-            'links': self._extract_links(text),
-            'code_blocks': self._extract_code_blocks(text),
-            'tables': self._extract_tables(text)
-        }
+    def extract_metadata(self, source: Union[str, MarkdownElement, DocumentMetadata]) -> Dict[str, Any]:
+        """提取文档元数据
         
-        return metadata
-    
-    def _extract_title(self, text: str) -> Optional[str]:
-        """提取文档标题"""
-        lines = text.split('\n')
-        for line in lines:
-            line = line.strip()
-            if line.startswith('# '):
-                return line[2:].strip()
-        return None
-    
-    def _extract_headings(self, text: str) -> List[Dict[str, Any]]:
-        """提取所有标题"""
-        headings = []
-        pattern = r'^(#{1,6})\s+(.+)$'
-        
-        for line_num, line in enumerate(text.split('\n'), 1):
-            match = re.match(pattern, line.strip())
-            if match:
-                level = len(match.group(1))
-                title = match.group(2).strip()
-                headings.append({
-                    'level': level,
-                    'title': title,
-                    'line': line_num
-                })
-        
-        return headings
-    
-    def _extract_images(self, text: str) -> List[Dict[str, str]]:
-        """提取图片信息"""
-        images = []
-        pattern = r'!\[([^\]]*)\]\(([^)]+)\)'
-        
-        for match in re.finditer(pattern, text):
-            images.append({
-                'alt': match.group(1),
-                'src': match.group(2)
-            })
-        
-        return images
-    
-    def _extract_links(self, text: str) -> List[Dict[str, str]]:
-        """提取链接信息"""
-        links = []
-        pattern = r'\[([^\]]+)\]\(([^)]+)\)'
-        
-        for match in re.finditer(pattern, text):
-            links.append({
-                'text': match.group(1),
-                'url': match.group(2)
-            })
-        
-        return links
-    
-    def _extract_code_blocks(self, text: str) -> List[Dict[str, str]]:
-        """提取代码块信息"""
-        code_blocks = []
-        pattern = r'```(\w*)\n([^`]+)```'
-        
-        for match in re.finditer(pattern, text, re.MULTILINE | re.DOTALL):
-            code_blocks.append({
-                'language': match.group(1) or 'text',
-                'code': match.group(2).strip()
-            })
-        
-        return code_blocks
-    
-    def _extract_tables(self, text: str) -> List[Dict[str, Any]]:
-        """提取表格信息"""
-        tables = []
-        lines = text.split('\n')
+        元数据在解析构建文档树时一并记录（见 DocumentMetadata），不再逐项扫描原文。
+        传入 Markdown 文本时解析一次；已有解析结果（parse 返回的文档树，或流式解析时
+        记录的 DocumentMetadata）时直接读取，不再重复解析。
         
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            if '|' in line and i + 1 < len(lines):
-                next_line = lines[i + 1].strip()
-                if re.match(r'^\|?\s*:?-+:?\s*\|', next_line):
-                    # 找到表格
-                    table_lines = [line]
-                    i += 1
-                    
-                    # 跳过分隔行
-                    i += 1
-                    
-                    # 收集表格行
-                    while i < len(lines) and '|' in lines[i]:
-                        table_lines.append(lines[i].strip())
-                        i += 1
-                    
-                    tables.append({
-                        'rows': len(table_lines),
-                        'content': '\n'.join(table_lines)
-                    })
-                    continue
-            i += 1
+        返回值的格式与早期版本不同（标题项以 block 代替 line，表格项以 cols 代替 content），
+        见 DocumentMetadata.to_dict。
         
-        return tables
\ No newline at end of file
+        Args:
+            source: Markdown文本、parse 返回的文档树或 DocumentMetadata
+            
+        Returns:
+            包含 title、headings、images、links、code_blocks、tables 的字典
+        """
+        if isinstance(source, DocumentMetadata):
+            return source.to_dict()
+        if isinstance(source, str):
+            source = self.parse(source)
+        return source.attributes['metadata'].to_dict()
@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+原生Markdown解析模块
+直接从Markdown源文本构建 MarkdownElement 文档树，
+不经过 HTML 渲染和 BeautifulSoup 二次解析
+"""
+
+import re
+from typing import Iterator, List, Optional
+
+from .inline_parser import (
+    INLINE_SPECIAL, InlineNode, has_formatting, inline_plain_text, inline_text, parse_inline, strip_inline
+)
+from .markdown_parser import HEADING_TYPES, DocumentMetadata, MarkdownElement, TableData, element_text
+
+
+# ---------------------------------------------------------------- 块级语法
+
+_ATX_HEADING = re.compile(r'^(#{1,6})(.*?)#*$')
+_FENCE_OPEN = re.compile(r'^( {0,3})(`{3,}|~{3,})[ \t]*\{?\.?([\w#+.-]*)')
+_SETEXT_UNDERLINE = re.compile(r'^(=+|-+)[ \t]*$')
+_THEMATIC_BREAK = re.compile(r'^ {0,3}([-*_])[ \t]*(?:\1[ \t]*){2,}$')
+_LIST_MARKER = re.compile(r'^( {0,3})([*+-]|\d{1,9}\.)[ \t]+(?=\S)')
+_NESTED_LIST_MARKER = re.compile(r'^ {4,7}(?:[*+-]|\d{1,9}\.)[ \t]+(?=\S)')
+_QUOTE_MARKER = re.compile(r'^ {0,3}> ?')
+_TABLE_DELIMITER = re.compile(r'^ {0,3}\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)*\|?[ \t]*$')
+_REFERENCE_DEFINITION = re.compile(r'^ {0,3}\[[^\]^][^\]]*\]:[ \t]*\S+')
+# 预处理在这类行前补空行（任意缩进的列表标记）
+_LIST_LINE = re.compile(r'^\s*(?:\d+\.|[*+-])\s')
+
+# 缩进代码块的缩进宽度
+_CODE_INDENT = 4
+
+
+def _indent_width(line: str) -> int:
+    """行首空格数（制表符已提前展开）"""
+    return len(line) - len(line.lstrip(' '))
+
+
+def _dedent(line: str, width: int) -> str:
+    """去掉至多 width 个行首空格"""
+    return line[min(width, _indent_width(line)):]
+
+
+def _detab(line: str) -> str:
+    """行首有 4 个空格时去掉这 4 个空格，否则原样返回（缩进不足的行是惰性续行）"""
+    return line[_CODE_INDENT:] if line.startswith(' ' * _CODE_INDENT) else line
+
+
+def _inline_element(element_type: str, text: str) -> MarkdownElement:
+    """构建文字元素：content 为纯文本，含粗体、斜体、代码或链接时行内节点树存入 attributes['inline']"""
+    if not INLINE_SPECIAL.search(text):
+        return MarkdownElement(element_type=element_type, content=text.strip())
+    nodes = parse_inline(text)
+    content = inline_plain_text(nodes).strip()
+    if content and has_formatting(nodes):
+        return MarkdownElement(element_type=element_type, content=content,
+                               attributes={'inline': strip_inline(nodes)})
+    return MarkdownElement(element_type=element_type, content=content)
+
+
+def _inline_images(nodes: List[InlineNode]) -> Iterator[InlineNode]:
+    """依次产出行内节点树中的图片节点（包括链接中的图片）"""
+    for node in nodes:
+        if node.kind == 'image':
+            yield node
+        elif node.children:
+            yield from _inline_images(node.children)
+
+
+def _split_table_row(line: str) -> List[str]:
+    """拆分表格行为单元格（忽略转义的竖线和行内代码中的竖线）"""
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|') and not line.endswith('\\|'):
+        line = line[:-1]
+
+    cells = []
+    current = []
+    in_code = False
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if char == '\\' and i + 1 < len(line) and line[i + 1] == '|':
+            current.append('|')
+            i += 2
+            continue
+        if char == '`':
+            in_code = not in_code
+        elif char == '|' and not in_code:
+            cells.append(''.join(current))
+            current = []
+            i += 1
+            continue
+        current.append(char)
+        i += 1
+    cells.append(''.join(current))
+    return [inline_text(cell.strip()).strip() for cell in cells]
+
+
+class _LineWindow:
+    """按需切分的源文本行序列
+
+    行在首次访问时才从源文本中切出（并展开制表符），已解析完的顶层块所占的行
+    通过 release 释放，因此常驻内存的只有当前顶层块的行，而不是整篇文档的行列表。
+    """
+
+    # 释放的行累计到该数量时才真正从缓冲区删除，摊薄删除开销
+    _RELEASE_BATCH = 256
+
+    def __init__(self, text: str):
+        self._text = text
+        self._length = text.count('\n') + 1
+        self._lines: List[str] = []  # 缓冲区，第一项对应第 _base 行
+        self._base = 0
+        self._offset: Optional[int] = 0  # 下一行在源文本中的起始位置，读完后为 None
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> str:
+        position = index - self._base
+        if position < 0:
+            raise IndexError(f"第 {index} 行已释放")
+        while position >= len(self._lines):
+            self._read_line()
+        return self._lines[position]
+
+    def _read_line(self):
+        """从源文本中切出下一行"""
+        if self._offset is None:
+            raise IndexError("行号超出范围")
+        end = self._text.find('\n', self._offset)
+        if end < 0:
+            line = self._text[self._offset:]
+            self._offset = None
+        else:
+            line = self._text[self._offset:end]
+            self._offset = end + 1
+        self._lines.append(line.expandtabs(4))
+
+    def release(self, index: int):
+        """释放 index 之前的行（之后不会再访问）"""
+        count = index - self._base
+        if count >= self._RELEASE_BATCH:
+            del self._lines[:count]
+            self._base = index
+
+
+class NativeMarkdownParser:
+    """原生Markdown解析器
+
+    按行扫描源文本，逐个产出顶层块元素。支持 ATX/Setext 标题、段落、围栏/缩进代码块、
+    引用、有序/无序列表（含嵌套）、管道表格和只有图片的段落，块的划分规则（列表分组、
+    惰性续行等）与 Python-Markdown 一致，元素类型和 content 的取值与 HTML 路径相同
+    （content 为去掉行内标记后的纯文本）。脚注、定义列表、目录、属性列表和原始 HTML
+    不在支持范围内，文档中出现时由 MarkdownParser 改用 HTML 解析（见 native_supported）。
+    """
+
+    def parse(self, markdown_text: str) -> MarkdownElement:
+        """解析Markdown文本
+
+        Args:
+            markdown_text: 已标准化换行符的Markdown文本
+
+        Returns:
+            解析后的文档树，元数据在构建过程中一并记录于 attributes['metadata']
+        """
+        metadata = DocumentMetadata()
+        # 根元素不保留原文，避免源文本与文档树同时常驻内存
+        document = MarkdownElement(
+            element_type='document',
+            content='',
+            attributes={'metadata': metadata}
+        )
+        document.extend_children(metadata.collect(self.iter_blocks(markdown_text)))
+        return document
+
+    def iter_blocks(self, markdown_text: str) -> Iterator[MarkdownElement]:
+        """逐个产出顶层块元素
+
+        Args:
+            markdown_text: 已标准化换行符的Markdown文本
+
+        Yields:
+            顶层块元素（标题、段落、表格、列表、代码块、引用、图片）
+        """
+        return self._parse_blocks(_LineWindow(markdown_text))
+
+    # ------------------------------------------------------------ 块级解析
+
+    def _parse_blocks(self, lines: List[str], lists_interrupt: bool = True) -> Iterator[MarkdownElement]:
+        """解析一组行（文档或容器内部）为块元素
+
+        Args:
+            lines: 行序列
+            lists_interrupt: 列表项能否直接打断段落。HTML 路径的预处理只在以列表标记开头的行前
+                补空行，引用内的行以 > 开头不受影响，因此引用内部为 False
+        """
+        paragraph: List[str] = []
+        i = 0
+        n = len(lines)
+        # 顶层解析时，当前位置之前的行已全部处理完，可以释放
+        release = getattr(lines, 'release', None)
+
+        while i < n:
+            if release is not None:
+                release(i)
+            line = lines[i]
+            stripped = line.strip()
+
+            # 空行结束当前段落
+            if not stripped:
+                yield from self._flush_paragraph(paragraph)
+                i += 1
+                continue
+
+            indent = _indent_width(line)
+
+            # 缩进代码块（不能打断段落）
+            if indent >= _CODE_INDENT and not paragraph:
+                i = yield from self._parse_indented_code(lines, i)
+                continue
+
+            # Setext 标题：只有一行的段落后紧跟 === 或 ---
+            if len(paragraph) == 1 and _SETEXT_UNDERLINE.match(line):
+                level = 1 if stripped[0] == '=' else 2
+                content = inline_text(paragraph[0]).strip()
+                paragraph.clear()
+                yield MarkdownElement(element_type=HEADING_TYPES[level - 1], content=content)
+                i += 1
+                continue
+
+            # ATX 标题（# 必须位于行首）
+            match = _ATX_HEADING.match(line.rstrip())
+            if match:
+                yield from self._flush_paragraph(paragraph)
+                yield MarkdownElement(
+                    element_type=HEADING_TYPES[len(match.group(1)) - 1],
+                    content=inline_text(match.group(2).strip()).strip()
+                )
+                i += 1
+                continue
+
+            # 围栏代码块
+            match = _FENCE_OPEN.match(line)
+            if match:
+                yield from self._flush_paragraph(paragraph)
+                i = yield from self._parse_fenced_code(lines, i, match)
+                continue
+
+            # 分隔线（HTML 路径同样不输出）
+            if _THEMATIC_BREAK.match(line):
+                yield from self._flush_paragraph(paragraph)
+                i += 1
+                continue
+
+            # 引用
+            if _QUOTE_MARKER.match(line):
+                yield from self._flush_paragraph(paragraph)
+                i = yield from self._parse_quote(lines, i)
+                continue
+
+            # 列表（预处理会在紧跟正文的列表项前补空行，因此列表可以直接打断段落）
+            if _LIST_MARKER.match(line) and (lists_interrupt or not paragraph):
+                yield from self._flush_paragraph(paragraph)
+                i = yield from self._parse_list(lines, i)
+                continue
+
+            # 表格：段落开头的表头行 + 列数相同的分隔行
+            if not paragraph and '|' in line and i + 1 < n and _TABLE_DELIMITER.match(lines[i + 1]) \
+                    and len(_split_table_row(lines[i + 1])) == len(_split_table_row(line)):
+                i = yield from self._parse_table(lines, i)
+                continue
+
+            # 链接引用定义不产生内容
+            if not paragraph and _REFERENCE_DEFINITION.match(line):
+                i += 1
+                continue
+
+            # 续行保留行首空白（与 Python-Markdown 的段落文字一致）
+            paragraph.append(line if paragraph else line.lstrip())
+            i += 1
+
+        yield from self._flush_paragraph(paragraph)
+
+    def _flush_paragraph(self, paragraph: List[str]) -> Iterator[MarkdownElement]:
+        """输出已收集的段落行并清空"""
+        if not paragraph:
+            return
+
+        # 行尾两个空格为硬换行，只保留换行符
+        text = '\n'.join(paragraph).replace('  \n', '\n')
+        paragraph.clear()
+        paragraph_element = _inline_element('paragraph', text)
+        if paragraph_element.content:
+            yield paragraph_element
+            return
+
+        # 只有图片的段落输出图片元素
+        for node in _inline_images(parse_inline(text)):
+            if node.url:
+                yield MarkdownElement(
+                    element_type='image',
+                    content=node.text,
+                    attributes={'src': node.url, 'alt': node.text}
+                )
+
+    def _parse_indented_code(self, lines: List[str], start: int) -> Iterator[MarkdownElement]:
+        """解析缩进代码块，返回下一行的位置"""
+        code_lines = []
+        i = start
+        while i < len(lines):
+            line = lines[i]
+            if line.strip():
+                if _indent_width(line) < _CODE_INDENT:
+                    break
+                code_lines.append(line[_CODE_INDENT:])
+            else:
+                code_lines.append('')
+            i += 1
+
+        code_text = '\n'.join(code_lines).strip()
+        if code_text:
+            yield MarkdownElement(element_type='code_block', content=code_text)
+        return i
+
+    def _parse_fenced_code(self, lines: List[str], start: int, match) -> Iterator[MarkdownElement]:
+        """解析围栏代码块（未闭合时持续到末尾），返回下一行的位置"""
+        fence_indent = len(match.group(1))
+        fence = match.group(2)
+        language = match.group(3)
+        closing = re.compile(r'^ {0,3}' + re.escape(fence[0]) + '{' + str(len(fence)) + r',}[ \t]*$')
+
+        code_lines = []
+        i = start + 1
+        while i < len(lines):
+            line = lines[i]
+            if closing.match(line):
+                i += 1
+                break
+            code_lines.append(_dedent(line, fence_indent))
+            i += 1
+
+        yield MarkdownElement(
+            element_type='code_block',
+            content='\n'.join(code_lines).strip(),
+            attributes={'language': language} if language else None
+        )
+        return i
+
+    def _parse_quote(self, lines: List[str], start: int) -> Iterator[MarkdownElement]:
+        """解析引用块（支持惰性续行，只隔空行的相邻引用合并），返回下一行的位置"""
+        inner_lines = []
+        i = start
+        n = len(lines)
+        while i < n:
+            line = lines[i]
+            match = _QUOTE_MARKER.match(line)
+            if match:
+                inner_lines.append(line[match.end():])
+            elif not line.strip():
+                j = i + 1
+                while j < n and not lines[j].strip():
+                    j += 1
+                if j == n or not _QUOTE_MARKER.match(lines[j]):
+                    break
+                inner_lines.extend([''] * (j - i))
+                i = j
+                continue
+            elif inner_lines[-1].strip() and not self._starts_block(line):
+                # 惰性续行：上一行是引用内的文字时，未加 > 的行属于同一段落
+                inner_lines.append(line)
+            else:
+                break
+            i += 1
+
+        quote = MarkdownElement(element_type='quote', content='')
+        quote.extend_children(self._parse_blocks(inner_lines, lists_interrupt=False))
+        quote.content = element_text(quote)
+        yield quote
+        return i
+
+    def _parse_list(self, lines: List[str], start: int) -> Iterator[MarkdownElement]:
+        """解析列表，返回下一行的位置
+
+        分组规则与 Python-Markdown 一致：列表类型由第一项决定，之后缩进不足 4 个空格的
+        列表项不论有序无序都是该列表的兄弟项，只隔空行的列表项仍属于同一列表；
+        缩进 4 到 7 个空格的列表项及其后续行去掉 4 个空格后归入上一项（嵌套列表），
+        空行后缩进 4 个空格以上的块同样归入上一项，其余行是上一项的续行。
+        """
+        first = _LIST_MARKER.match(lines[start])
+        list_element = MarkdownElement(
+            element_type='list',
+            content='',
+            attributes={'type': 'ordered' if first.group(2)[0].isdigit() else 'unordered'}
+        )
+
+        item_lines = [lines[start][first.end():]]
+        nested = False  # 是否处于归入上一项的缩进片段中
+        i = start + 1
+        n = len(lines)
+        while i < n:
+            line = lines[i]
+            if not line.strip():
+                # 空行后是列表项或缩进的块时列表继续
+                j = i + 1
+                while j < n and not lines[j].strip():
+                    j += 1
+                if j == n:
+                    break
+                next_line = lines[j]
+                if _indent_width(next_line) >= _CODE_INDENT:
+                    nested = True
+                elif not _LIST_MARKER.match(next_line) or _THEMATIC_BREAK.match(next_line):
+                    break
+                item_lines.extend([''] * (j - i))
+                i = j
+                continue
+
+            if _ATX_HEADING.match(line.rstrip()) or _THEMATIC_BREAK.match(line):
+                break
+            match = _LIST_MARKER.match(line)
+            if match:
+                self._add_list_item(list_element, item_lines)
+                item_lines = [line[match.end():]]
+                nested = False
+            elif nested or _NESTED_LIST_MARKER.match(line):
+                nested = True
+                item_lines.append(_detab(line))
+            else:
+                item_lines.append(line)
+            i += 1
+
+        self._add_list_item(list_element, item_lines)
+        if list_element.children:
+            yield list_element
+        return i
+
+    def _add_list_item(self, list_element: MarkdownElement, item_lines: List[str]):
+        """解析列表项内容并添加到列表（忽略空列表项）"""
+        list_item = self._build_list_item(item_lines)
+        if list_item.content or list_item.children:
+            list_element.add_child(list_item)
+
+    def _build_list_item(self, item_lines: List[str]) -> MarkdownElement:
+        """解析列表项内容：首个段落作为 content，其余块作为子元素"""
+        blocks = list(self._parse_blocks(item_lines))
+        if blocks and blocks[0].element_type == 'paragraph':
+            first = blocks.pop(0)
+            return MarkdownElement(element_type='list_item', content=first.content,
+                                   attributes=first.attributes, children=blocks)
+        return MarkdownElement(element_type='list_item', content='', children=blocks)
+
+    def _parse_table(self, lines: List[str], start: int) -> Iterator[MarkdownElement]:
+        """解析管道表格（持续到空行或列表项之前），返回下一行的位置"""
+        header = _split_table_row(lines[start])
+        cols = len(header)
+        table_data = TableData([header])
+
+        i = start + 2
+        while i < len(lines):
+            line = lines[i]
+            if not line.strip() or _LIST_LINE.match(line):
+                break
+            row = _split_table_row(line)
+            # 与表头列数对齐：多余的单元格丢弃，不足的补空
+            if len(row) < cols:
+                row.extend([''] * (cols - len(row)))
+            table_data.append_row(row[:cols])
+            i += 1
+
+        yield MarkdownElement(
+            element_type='table',
+            content='',
+            attributes={
+                'rows': len(table_data),
+                'cols': cols,
+                'data': table_data
+            }
+        )
+        return i
+
+    @staticmethod
+    def _starts_block(line: str) -> bool:
+        """该行是否开始一个新的块（不能作为惰性续行）"""
+        return bool(
+            _ATX_HEADING.match(line.rstrip())
+            or _FENCE_OPEN.match(line)
+            or _QUOTE_MARKER.match(line)
+            or _THEMATIC_BREAK.match(line)
+            or _LIST_MARKER.match(line)
+        )
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Markdown解析器池模块
+预先构建并复用 MarkdownParser，归还时重置状态，使用过多的解析器自动回收重建
+"""
+
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from .markdown_parser import MarkdownParser
+
+logger = logging.getLogger('smart_doc.parser_pool')
+
+
+class MarkdownParserPool:
+    """MarkdownParser 池（线程安全）
+
+    - 借出：优先取池中已重置的解析器，池为空时临时创建，不阻塞请求
+    - 归还：重置脚注、目录等解析状态后放回池中
+    - 回收：解析次数达到 max_uses，或累计解析文本量达到 max_parsed_chars
+      （近似衡量实例内部缓存的增长）时丢弃该解析器，下次借出时重新创建
+    """
+
+    def __init__(self, size: int = 4, max_uses: int = 1000,
+                 max_parsed_chars: int = 64 * 1024 * 1024,
+                 parser_config: Optional[Dict] = None):
+        """初始化解析器池
+
+        Args:
+            size: 池中保留的解析器数量（预先构建）
+            max_uses: 单个解析器最多解析的文档数，0 表示不限
+            max_parsed_chars: 单个解析器最多累计解析的字符数，0 表示不限
+            parser_config: 传给 MarkdownParser 的配置
+        """
+        self.size = size
+        self.max_uses = max_uses
+        self.max_parsed_chars = max_parsed_chars
+        self.parser_config = parser_config
+
+        self._pool: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.created = 0
+        self.recycled = 0
+
+        for _ in range(size):
+            self._pool.put(self._create_parser())
+
+    @contextmanager
+    def acquire(self) -> Iterator[MarkdownParser]:
+        """借出一个解析器，用完自动归还"""
+        try:
+            parser = self._pool.get_nowait()
+        except queue.Empty:
+            parser = self._create_parser()
+
+        try:
+            yield parser
+        finally:
+            self._release(parser)
+
+    def _release(self, parser: MarkdownParser):
+        """归还解析器：需要回收或池已满时丢弃，否则重置后放回"""
+        if self._should_recycle(parser):
+            with self._lock:
+                self.recycled += 1
+            logger.debug(
+                "回收解析器: 已解析 %d 个文档, %d 个字符",
+                parser.parse_count, parser.parsed_chars
+            )
+            return
+
+        if self._pool.qsize() >= self.size:
+            return
+
+        try:
+            parser.reset()
+        except Exception as e:
+            logger.warning("重置解析器失败，丢弃该解析器: %s", e)
+            return
+        self._pool.put(parser)
+
+    def _should_recycle(self, parser: MarkdownParser) -> bool:
+        """解析器是否已达到使用上限"""
+        if self.max_uses and parser.parse_count >= self.max_uses:
+            return True
+        if self.max_parsed_chars and parser.parsed_chars >= self.max_parsed_chars:
+            return True
+        return False
+
+    def _create_parser(self) -> MarkdownParser:
+        """创建新的解析器"""
+        with self._lock:
+            self.created += 1
+        return MarkdownParser(self.parser_config)
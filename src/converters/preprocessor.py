@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Markdown预处理模块
+单遍扫描完成 HTML 解析路径所需的全部预处理：
+转义换行符还原、换行符标准化、公式标记、图片占位符和列表前补空行
+"""
+
+import re
+from typing import List, Optional
+
+
+# 换行符：\r\n、\r、字面上的 \n（"\r" 后紧跟字面 \n 时两者合为一个换行）
+NEWLINE_PATTERN = re.compile(r'\r(?:\n|\\n)?|\\n|\n')
+
+# 行首的列表标记（换行符已统一为 \n，行内空白不跨行）
+_LIST_LINE_PATTERN = re.compile(r'[^\S\n]*(?:\d+\.|[*+-])[^\S\n]')
+
+# 下一行以列表标记开头的换行符（只有这些位置可能需要补空行）
+_LIST_BREAK_PATTERN = re.compile(r'\n(?=[^\S\n]*(?:\d+\.|[*+-])[^\S\n])')
+
+# 行内公式 $...$、图片 ![alt](src)，以及列表项前的换行符
+_SCAN_PATTERN = re.compile(
+    r'\$(?P<math>[^$]+)\$'
+    r'|!\[(?P<alt>[^\]]*)\]\((?P<src>[^)]+)\)'
+    r'|' + _LIST_BREAK_PATTERN.pattern
+)
+
+
+def normalize_newlines(text: str) -> str:
+    """还原字面上的 \\n 并统一换行符为 \\n"""
+    if '\r' not in text and '\\n' not in text:
+        return text
+    return NEWLINE_PATTERN.sub('\n', text)
+
+
+def _needs_blank_line(text: str, position: int) -> bool:
+    """位于 position 的换行符之后是列表项时，判断其前一行是否为非空的非列表行
+
+    公式和图片标签的首字符既不是空白也不是列表标记，替换前后行是否为空、
+    是否为列表项都不变，因此直接检查原文中的上一行。
+    """
+    previous_line = text[text.rfind('\n', 0, position) + 1:position]
+    return bool(previous_line.strip()) and _LIST_LINE_PATTERN.match(previous_line) is None
+
+
+def preprocess_markdown(text: str) -> Optional[str]:
+    """单遍完成Markdown预处理
+
+    结果与依次执行以下步骤相同：
+    1. 字面 \\n 还原为换行符，统一换行符
+    2. 行内公式 $...$ 替换为 <math-inline> 标签
+    3. 块级公式 $$...$$ 替换为 <math-block> 标签（行内公式已先替换，
+       只有出现连续三个 $ 时才可能命中）
+    4. 图片 ![alt](src) 替换为 <img-placeholder> 标签
+    5. 紧跟在非空正文行后的列表项前补一个空行
+
+    换行符统一后，一个正则按顺序找出公式、图片和列表项前的换行符，
+    其余文本整段拷贝，不再逐行拆分。
+
+    Args:
+        text: 原始Markdown文本
+
+    Returns:
+        预处理后的文本；公式与图片标记相互嵌套，或出现连续三个 $（极少见）时
+        返回 None，由调用方按逐步处理的方式得到结果
+    """
+    if '$$$' in text:
+        return None
+    text = normalize_newlines(text)
+
+    out: List[str] = []
+    position = 0
+    for match in _SCAN_PATTERN.finditer(text):
+        out.append(text[position:match.start()])
+        kind = match.lastgroup
+        if kind is None:
+            # 列表项前的换行符（不放入分组，保持正则的首字符优化）
+            out.append('\n\n' if _needs_blank_line(text, match.start()) else '\n')
+        elif kind == 'math':
+            math = match.group('math')
+            # 公式内含图片语法：逐步处理时图片会在公式标签内再次替换
+            if '![' in math:
+                return None
+            out.append(f'<math-inline>{_insert_blank_lines(text, match.start("math"), math)}</math-inline>')
+        else:
+            # 图片内含 $：逐步处理时公式先于图片替换
+            if '$' in match.group(0):
+                return None
+            alt = _insert_blank_lines(text, match.start('alt'), match.group('alt'))
+            src = _insert_blank_lines(text, match.start('src'), match.group('src'))
+            out.append(f'<img-placeholder alt="{alt}" src="{src}"></img-placeholder>')
+        position = match.end()
+    out.append(text[position:])
+    return ''.join(out)
+
+
+def _insert_blank_lines(text: str, start: int, span: str) -> str:
+    """标记内部的文字跨行时，同样在其中的列表项前补空行"""
+    if '\n' not in span:
+        return span
+    return _LIST_BREAK_PATTERN.sub(
+        lambda match: '\n\n' if _needs_blank_line(text, start + match.start()) else '\n',
+        span
+    )
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+主题样式编译模块
+将 StyleConfig 中正文、标题、引用、代码（含语法高亮类别）和表格的样式编译为 styles.xml 中的命名样式，
+文档中的段落、文字和表格只引用样式ID，不再逐个 run / 单元格写入字体、字号、颜色、底纹等直接格式
+"""
+
+import io
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+from xml.sax.saxutils import quoteattr
+
+try:
+    from docx import Document
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls, qn
+    from docx.shared import Cm, Pt
+except ImportError:
+    raise ImportError("请安装python-docx库: pip install python-docx")
+
+try:
+    from ..utils.code_highlighter import get_token_styles
+except ImportError:
+    from utils.code_highlighter import get_token_styles
+
+
+# 元素 → 样式ID。标题沿用内置的 Heading 1~6（保留大纲级别，导航窗格和目录可识别）
+THEME_STYLE_IDS: Dict[str, str] = {
+    'body': 'SmartBody',
+    'heading1': 'Heading1',
+    'heading2': 'Heading2',
+    'heading3': 'Heading3',
+    'heading4': 'Heading4',
+    'heading5': 'Heading5',
+    'heading6': 'Heading6',
+    'quote': 'SmartQuote',
+    'code_block': 'SmartCodeBlock',
+    'code_inline': 'SmartInlineCode',
+    'table': 'SmartTable',
+}
+
+# 代码高亮类别的字符样式ID前缀（如 SmartCodeKeyword），见 code_token_style_id
+_CODE_TOKEN_STYLE_PREFIX = 'SmartCode'
+
+# 自定义样式的显示名称
+_STYLE_NAMES = {
+    'body': 'Smart Body',
+    'quote': 'Smart Quote',
+    'code_block': 'Smart Code Block',
+    'code_inline': 'Smart Inline Code',
+    'table': 'Smart Table',
+}
+
+_ALIGNMENT_VALUES = {
+    'left': 'left',
+    'center': 'center',
+    'right': 'right',
+    'justify': 'both',
+}
+
+# 表格单元格上下边距 0.15cm、左右边距 0.19cm（1cm = 567 twips）
+_CELL_MARGIN_VERTICAL = int(0.15 * 567)
+_CELL_MARGIN_HORIZONTAL = int(0.19 * 567)
+
+
+def code_token_style_id(category: str) -> str:
+    """代码高亮类别（见 code_highlighter.TOKEN_CATEGORIES）对应的字符样式ID"""
+    return _CODE_TOKEN_STYLE_PREFIX + category
+
+
+def _on_off(value: bool) -> str:
+    return '1' if value else '0'
+
+
+def _color_value(color: Optional[str]) -> Optional[str]:
+    """#RRGGBB 转换为 RRGGBB，格式不正确时返回 None"""
+    if not color:
+        return None
+    color_hex = color.replace('#', '')
+    if len(color_hex) != 6:
+        return None
+    try:
+        int(color_hex, 16)
+    except ValueError:
+        return None
+    return color_hex.upper()
+
+
+def _run_properties(family: str, size: float, color: Optional[str] = None,
+                    bold: Optional[bool] = None, italic: Optional[bool] = None,
+                    underline: Optional[bool] = None) -> str:
+    """字符格式 w:rPr（中文字体同时写入 eastAsia，否则中文文字仍使用主题字体）
+
+    bold/italic/underline 为 None 时不写入（沿用上级样式）。
+    """
+    font = quoteattr(family)
+    parts = [f'<w:rFonts w:ascii={font} w:hAnsi={font} w:eastAsia={font} w:cs={font}/>']
+    if bold is not None:
+        parts.append(f'<w:b w:val="{_on_off(bold)}"/>')
+    if italic is not None:
+        parts.append(f'<w:i w:val="{_on_off(italic)}"/>')
+    color_hex = _color_value(color)
+    if color_hex:
+        parts.append(f'<w:color w:val="{color_hex}"/>')
+    half_points = int(round(size * 2))
+    parts.append(f'<w:sz w:val="{half_points}"/><w:szCs w:val="{half_points}"/>')
+    if underline is not None:
+        parts.append(f'<w:u w:val="{"single" if underline else "none"}"/>')
+    return '<w:rPr>' + ''.join(parts) + '</w:rPr>'
+
+
+def _paragraph_properties(element_style, is_heading: bool = False,
+                          background: Optional[str] = None,
+                          outline_level: Optional[int] = None) -> str:
+    """段落格式 w:pPr（子元素按 schema 规定的顺序输出）"""
+    paragraph = element_style.paragraph
+    parts = [
+        f'<w:keepNext w:val="{_on_off(paragraph.keep_with_next)}"/>',
+        f'<w:keepLines w:val="{_on_off(paragraph.keep_together)}"/>',
+        f'<w:pageBreakBefore w:val="{_on_off(paragraph.page_break_before)}"/>',
+    ]
+
+    background_hex = _color_value(background)
+    if background_hex:
+        parts.append(f'<w:shd w:val="clear" w:color="auto" w:fill="{background_hex}"/>')
+
+    # 行距：>= 20 为固定值（磅），< 20 为倍数
+    if paragraph.line_spacing >= 20:
+        line = f'w:line="{Pt(paragraph.line_spacing).twips}" w:lineRule="exact"'
+    else:
+        line = f'w:line="{int(round(paragraph.line_spacing * 240))}" w:lineRule="auto"'
+    parts.append(
+        f'<w:spacing w:before="{Pt(paragraph.space_before).twips}" '
+        f'w:after="{Pt(paragraph.space_after).twips}" {line}/>'
+    )
+
+    # 缩进：标题不缩进首行；首行缩进为 0 时按字号动态计算两个字符宽度
+    if is_heading:
+        first_line = 0
+    elif paragraph.first_line_indent == 0:
+        first_line = Pt(element_style.font.size * 2).twips
+    else:
+        first_line = Cm(paragraph.first_line_indent).twips
+    indent = []
+    if paragraph.left_indent:
+        indent.append(f'w:left="{Cm(paragraph.left_indent).twips}"')
+    if paragraph.right_indent:
+        indent.append(f'w:right="{Cm(paragraph.right_indent).twips}"')
+    indent.append(f'w:firstLine="{first_line}"')
+    parts.append(f'<w:ind {" ".join(indent)}/>')
+
+    parts.append(f'<w:jc w:val="{_ALIGNMENT_VALUES.get(paragraph.alignment, "left")}"/>')
+    if outline_level is not None:
+        parts.append(f'<w:outlineLvl w:val="{outline_level}"/>')
+    return '<w:pPr>' + ''.join(parts) + '</w:pPr>'
+
+
+def _element_run_properties(element_style) -> str:
+    font = element_style.font
+    return _run_properties(font.family, font.size, font.color, font.bold, font.italic, font.underline)
+
+
+def _style_xml(style_id: str, style_type: str, name: str, body: str,
+               based_on: str, next_style: Optional[str] = None, custom: bool = True) -> str:
+    """w:style 元素"""
+    custom_attribute = ' w:customStyle="1"' if custom else ''
+    next_element = f'<w:next w:val="{next_style}"/>' if next_style else ''
+    return (
+        f'<w:style {nsdecls("w")} w:type="{style_type}"{custom_attribute} w:styleId="{style_id}">'
+        f'<w:name w:val={quoteattr(name)}/><w:basedOn w:val="{based_on}"/>{next_element}'
+        f'<w:qFormat/>{body}</w:style>'
+    )
+
+
+def _theme_style_elements(config) -> Dict[str, str]:
+    """按配置生成各主题样式的 XML {样式ID: w:style}"""
+    styles = {}
+
+    for key in ('body', 'quote', 'code_block'):
+        element_style = getattr(config, key)
+        # 代码块的背景色作为段落底纹编译进样式
+        background = element_style.background_color if key == 'code_block' else None
+        style_id = THEME_STYLE_IDS[key]
+        styles[style_id] = _style_xml(
+            style_id, 'paragraph', _STYLE_NAMES[key],
+            _paragraph_properties(element_style, background=background) + _element_run_properties(element_style),
+            based_on='Normal', next_style=style_id
+        )
+
+    for level in range(1, 7):
+        element_style = config.headings.get(level)
+        style_id = THEME_STYLE_IDS[f'heading{level}']
+        styles[style_id] = _style_xml(
+            style_id, 'paragraph', f'heading {level}',
+            _paragraph_properties(element_style, is_heading=True, outline_level=level - 1)
+            + _element_run_properties(element_style),
+            based_on='Normal', next_style='Normal', custom=False
+        )
+
+    # 行内代码：只设置字体、字号和颜色，粗斜体沿用所在段落
+    code_font = config.code_inline.font
+    style_id = THEME_STYLE_IDS['code_inline']
+    styles[style_id] = _style_xml(
+        style_id, 'character', _STYLE_NAMES['code_inline'],
+        _run_properties(code_font.family, code_font.size, code_font.color),
+        based_on='DefaultParagraphFont'
+    )
+
+    # 代码高亮：每个高亮类别一个字符样式，颜色和粗斜体取自配置的 Pygments 配色方案
+    if config.code_highlight.enabled:
+        for category, definition in get_token_styles(config.code_highlight.style).items():
+            style_id = code_token_style_id(category)
+            styles[style_id] = _style_xml(
+                style_id, 'character', f'Smart Code {category}', _token_run_properties(definition),
+                based_on='DefaultParagraphFont'
+            )
+
+    style_id = THEME_STYLE_IDS['table']
+    styles[style_id] = _style_xml(
+        style_id, 'table', _STYLE_NAMES['table'], _table_style_body(config.table),
+        based_on='TableGrid'
+    )
+    return styles
+
+
+def _token_run_properties(definition: Dict) -> str:
+    """高亮类别的字符格式：只设置颜色和粗斜体，字体和字号沿用代码块样式"""
+    parts = []
+    if definition['bold']:
+        parts.append('<w:b/>')
+    if definition['italic']:
+        parts.append('<w:i/>')
+    color_hex = _color_value(definition['color'])
+    if color_hex:
+        parts.append(f'<w:color w:val="{color_hex}"/>')
+    return '<w:rPr>' + ''.join(parts) + '</w:rPr>'
+
+
+def _table_style_body(table) -> str:
+    """表格样式的内容：单元格文字、边框、边距和垂直居中，以及表头（firstRow）和
+    隔行底纹（band1Horz）的条件格式，表格中的单元格不再需要逐个设置格式
+
+    行距和段后间距沿用 Table Grid。
+    """
+    border_color = _color_value(table.border_color) or 'auto'
+    border_size = max(2, int(round(table.border_width * 8)))  # 八分之一磅
+    borders = ''.join(
+        f'<w:{side} w:val="single" w:sz="{border_size}" w:space="0" w:color="{border_color}"/>'
+        for side in ('top', 'left', 'bottom', 'right', 'insideH', 'insideV')
+    )
+    parts = [
+        f'<w:pPr><w:jc w:val="{_ALIGNMENT_VALUES.get(table.cell_alignment, "center")}"/></w:pPr>',
+        _run_properties(table.cell_font_family, table.cell_font_size),
+        '<w:tblPr><w:tblStyleRowBandSize w:val="1"/>'
+        f'<w:tblBorders>{borders}</w:tblBorders>'
+        f'<w:tblCellMar><w:top w:w="{_CELL_MARGIN_VERTICAL}" w:type="dxa"/>'
+        f'<w:left w:w="{_CELL_MARGIN_HORIZONTAL}" w:type="dxa"/>'
+        f'<w:bottom w:w="{_CELL_MARGIN_VERTICAL}" w:type="dxa"/>'
+        f'<w:right w:w="{_CELL_MARGIN_HORIZONTAL}" w:type="dxa"/></w:tblCellMar></w:tblPr>',
+        '<w:tcPr><w:vAlign w:val="center"/></w:tcPr>',
+    ]
+
+    # 表头：底纹、字体颜色和粗体
+    header_run = []
+    if table.header_font_bold:
+        header_run.append('<w:b/>')
+    header_color = _color_value(table.header_font_color)
+    if header_color:
+        header_run.append(f'<w:color w:val="{header_color}"/>')
+    header_fill = _color_value(table.header_background)
+    header_cell = f'<w:tcPr><w:shd w:val="clear" w:color="auto" w:fill="{header_fill}"/></w:tcPr>' if header_fill else ''
+    parts.append(f'<w:tblStylePr w:type="firstRow"><w:rPr>{"".join(header_run)}</w:rPr>{header_cell}</w:tblStylePr>')
+
+    # 隔行底纹（表头之后的第 1、3、5… 行）
+    band_fill = _color_value(table.alternate_row_color)
+    if band_fill:
+        parts.append(
+            '<w:tblStylePr w:type="band1Horz">'
+            f'<w:tcPr><w:shd w:val="clear" w:color="auto" w:fill="{band_fill}"/></w:tcPr></w:tblStylePr>'
+        )
+    return ''.join(parts)
+
+
+def compile_theme_styles(document, config):
+    """将主题样式写入文档的 styles.xml（同ID的样式整体替换）
+
+    Args:
+        document: python-docx Document
+        config: StyleConfig 配置对象
+    """
+    styles_element = document.styles.element
+    existing = {
+        style.get(qn('w:styleId')): style
+        for style in styles_element.iterchildren(qn('w:style'))
+    }
+    for style_id, xml in _theme_style_elements(config).items():
+        style = parse_xml(xml)
+        previous = existing.get(style_id)
+        if previous is not None:
+            # 保留内置样式与其字符样式（如 Heading1Char）的关联
+            link = previous.find(qn('w:link'))
+            if link is not None:
+                style.find(qn('w:next')).addnext(link)
+            previous.addprevious(style)
+            styles_element.remove(previous)
+        else:
+            styles_element.append(style)
+
+
+def theme_style_key(config) -> str:
+    """主题样式的缓存键（只包含参与编译的配置项）"""
+    return repr((config.body, config.headings, config.quote, config.code_block,
+                 config.code_inline, config.code_highlight, config.table))
+
+
+class CompiledTemplateCache:
+    """按主题配置缓存编译好样式的Word模板（序列化后的字节，线程安全）"""
+
+    def __init__(self, template: bytes, max_entries: int = 32):
+        """初始化缓存
+
+        Args:
+            template: 未编译主题样式的基础模板
+            max_entries: 最多缓存的模板数（LRU）
+        """
+        self._template = template
+        self.max_entries = max_entries
+        self._templates: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, config) -> bytes:
+        """获取（首次使用该配置时编译）模板字节
+
+        Args:
+            config: StyleConfig 配置对象
+
+        Returns:
+            已写入主题样式的模板
+        """
+        key = theme_style_key(config)
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                return template
+
+        document = Document(io.BytesIO(self._template))
+        compile_theme_styles(document, config)
+        buffer = io.BytesIO()
+        document.save(buffer)
+        template = buffer.getvalue()
+
+        with self._lock:
+            self._templates[key] = template
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_entries:
+                self._templates.popitem(last=False)
+        return template
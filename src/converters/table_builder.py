@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+表格构建模块
+根据表格数据生成完整的 w:tbl 元素（表格属性、列宽、首列纵向合并和单元格内容），
+不经过 python-docx 的逐单元格代理对象，耗时与单元格数成线性关系；
+大表格可标记跨页重复的标题行，并按行数拆分为多个表格。
+单元格文字、边框、边距、表头和隔行底纹由主题表格样式的条件格式决定（见 style_compiler），
+单元格本身只包含文字（合并的单元格另有 w:vMerge）
+"""
+
+from typing import Iterator, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+from .text_metrics import TextMetrics
+
+try:
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+    from docx.shared import Cm
+except ImportError:
+    raise ImportError("请安装python-docx库: pip install python-docx")
+
+
+# 列宽范围（厘米）：最小列宽用于序号等短内容，最大列宽用于长描述
+_MIN_COLUMN_WIDTH_CM = 1.2
+_MAX_COLUMN_WIDTH_CM = 6.0
+
+# 单元格左右边距之和（与表格样式的 tblCellMar 一致，见 style_compiler）
+_CELL_PADDING_CM = 0.19 * 2
+
+_POINTS_PER_CM = 72 / 2.54
+
+# 每次生成和解析XML的行数
+_CHUNK_ROWS = 500
+
+
+def column_widths_cm(content_widths_cm: Sequence[float], min_table_width_cm: float = 8.0,
+                     max_table_width_cm: float = 16.0) -> List[float]:
+    """根据各列内容的实际宽度分配列宽
+
+    每列取内容宽度加单元格边距（限制在 1.2~6.0cm）。表格总宽度不足
+    min_table_width_cm 时按比例放大；超出 max_table_width_cm 时较窄的列保持不变
+    （不折行），剩余宽度按比例分给较宽的列。
+
+    Args:
+        content_widths_cm: 每列最宽一行文字的宽度（厘米）
+        min_table_width_cm: 表格整体最小宽度（厘米）
+        max_table_width_cm: 表格整体最大宽度（厘米）
+
+    Returns:
+        每列宽度（厘米）
+    """
+    if not content_widths_cm:
+        return []
+    if not any(content_widths_cm):
+        # 没有内容时平分默认宽度
+        default_width_cm = (min_table_width_cm + max_table_width_cm) / 2
+        return [default_width_cm / len(content_widths_cm)] * len(content_widths_cm)
+
+    widths = [
+        max(_MIN_COLUMN_WIDTH_CM, min(width + _CELL_PADDING_CM, _MAX_COLUMN_WIDTH_CM))
+        for width in content_widths_cm
+    ]
+
+    total_width_cm = sum(widths)
+    if total_width_cm < min_table_width_cm:
+        widths = [w * min_table_width_cm / total_width_cm for w in widths]
+    elif total_width_cm > max_table_width_cm:
+        # 从最窄的列开始，宽度不超过平均剩余宽度的列保持原宽
+        remaining = max_table_width_cm
+        order = sorted(range(len(widths)), key=widths.__getitem__)
+        for position, index in enumerate(order):
+            if widths[index] > remaining / (len(order) - position):
+                wide = order[position:]
+                wide_total = sum(widths[i] for i in wide)
+                for i in wide:
+                    widths[i] = widths[i] * remaining / wide_total
+                break
+            remaining -= widths[index]
+
+    # 缩放后可能再次超出单列范围
+    return [max(_MIN_COLUMN_WIDTH_CM, min(w, _MAX_COLUMN_WIDTH_CM)) for w in widths]
+
+
+def _cell_text(row: Sequence[str], index: int) -> str:
+    """单元格文本（不足的列为空单元格）"""
+    return str(row[index]) if index < len(row) else ''
+
+
+def _first_column_merge(previous: Optional[str], value: str, following: Optional[str]) -> Optional[str]:
+    """计算一个数据行首列单元格的纵向合并：表头之后相同值（非空）的连续单元格合并为一个
+
+    只需要前后相邻两行的首列文本，逐行生成时不必保存整列。
+
+    Args:
+        previous: 上一个数据行首列去掉首尾空白后的文本（第一个数据行为 None）
+        value: 本行首列去掉首尾空白后的文本
+        following: 下一行首列去掉首尾空白后的文本（最后一行为 None）
+
+    Returns:
+        vMerge 取值："restart"（合并区域的第一行）、""（被合并的后续行）或 None（不合并）
+    """
+    if not value:
+        return None
+    if value == previous:
+        return ''
+    if value == following:
+        return 'restart'
+    return None
+
+
+def _run_xml(text: str) -> str:
+    """单元格文字（换行和制表符转换为 w:br / w:tab，与 python-docx 设置 cell.text 的结果一致）"""
+    if not text:
+        return ''
+    parts = []
+    for index, line in enumerate(text.split('\n')):
+        if index:
+            parts.append('<w:br/>')
+        for tab_index, piece in enumerate(line.split('\t')):
+            if tab_index:
+                parts.append('<w:tab/>')
+            if piece:
+                preserve = ' xml:space="preserve"' if piece[0].isspace() or piece[-1].isspace() else ''
+                parts.append(f'<w:t{preserve}>{escape(piece)}</w:t>')
+    return '<w:r>' + ''.join(parts) + '</w:r>'
+
+
+def _row_xml(row: Sequence[str], cols: int, merge: Optional[str], header: bool) -> str:
+    """一行表格的 w:tr（header 为 True 时标记为跨页重复的标题行）"""
+    parts = ['<w:tr><w:trPr><w:tblHeader/></w:trPr>' if header else '<w:tr>']
+    for j in range(cols):
+        text = _cell_text(row, j)
+        if j == 0 and merge is not None:
+            if merge:
+                parts.append(f'<w:tc><w:tcPr><w:vMerge w:val="restart"/></w:tcPr><w:p>{_run_xml(text)}</w:p></w:tc>')
+            else:
+                # 被合并的单元格不输出文字
+                parts.append('<w:tc><w:tcPr><w:vMerge/></w:tcPr><w:p/></w:tc>')
+        else:
+            parts.append(f'<w:tc><w:p>{_run_xml(text)}</w:p></w:tc>')
+    parts.append('</w:tr>')
+    return ''.join(parts)
+
+
+def _table_start_xml(table_style_id: str, widths: List[float], floating: bool) -> str:
+    """表格属性和列宽（w:tbl 的开头部分，不含行）"""
+    # 浮动（文字环绕）的表格在 Word 中不会跨页重复标题行
+    position = '<w:tblpPr w:wrap="around"/>' if floating else ''
+    # 固定列宽布局下列宽由 tblGrid 决定，单元格不再逐个写 tcW
+    parts = [
+        f'<w:tbl {nsdecls("w")}><w:tblPr>'
+        f'<w:tblStyle w:val="{table_style_id}"/>{position}'
+        '<w:tblW w:type="auto" w:w="0"/><w:jc w:val="center"/><w:tblLayout w:type="fixed"/>'
+        '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" '
+        'w:noHBand="0" w:noVBand="1" w:val="04A0"/>'
+        '</w:tblPr><w:tblGrid>'
+    ]
+    parts.extend(f'<w:gridCol w:w="{Cm(width).twips}"/>' for width in widths)
+    parts.append('</w:tblGrid>')
+    return ''.join(parts)
+
+
+def _first_column_value(row: Sequence[str]) -> str:
+    """首列单元格去掉首尾空白后的文本（用于比较是否合并）"""
+    return _cell_text(row, 0).strip()
+
+
+def _build_table_element(table_start: str, rows: Sequence[Sequence[str]], start: int, stop: int,
+                         cols: int, merge_first_column: bool, repeat_header: bool):
+    """生成一个表格元素：表头和 rows[start:stop] 的数据行
+
+    行的XML每 _CHUNK_ROWS 行生成和解析一次后追加到表格中，首列合并只比较相邻行，
+    工作内存只与块大小有关，不随表格行数增长。
+    """
+    merge = merge_first_column and cols > 0
+    tbl = parse_xml(table_start + '</w:tbl>')
+    tbl.extend(list(parse_xml(f'<w:tbl {nsdecls("w")}>{_row_xml(rows[0], cols, None, repeat_header)}</w:tbl>')))
+
+    previous = None
+    value = _first_column_value(rows[start]) if merge and start < stop else None
+    for chunk_start in range(start, stop, _CHUNK_ROWS):
+        parts = [f'<w:tbl {nsdecls("w")}>']
+        for i in range(chunk_start, min(chunk_start + _CHUNK_ROWS, stop)):
+            row = rows[i]
+            cell_merge = None
+            if merge:
+                following = _first_column_value(rows[i + 1]) if i + 1 < stop else None
+                cell_merge = _first_column_merge(previous, value, following)
+                previous, value = value, following
+            parts.append(_row_xml(row, cols, cell_merge, False))
+        parts.append('</w:tbl>')
+        tbl.extend(list(parse_xml(''.join(parts))))
+    return tbl
+
+
+def _content_widths_cm(rows: Sequence[Sequence[str]], cols: int, metrics: TextMetrics) -> List[float]:
+    """每列最宽一行文字的实际宽度（厘米），每次测量 _CHUNK_ROWS 行"""
+    widths = [0.0] * cols
+    for start in range(0, len(rows), _CHUNK_ROWS):
+        chunk = [rows[i] for i in range(start, min(start + _CHUNK_ROWS, len(rows)))]
+        for j in range(cols):
+            width = metrics.max_line_width([_cell_text(row, j) for row in chunk]) / _POINTS_PER_CM
+            if width > widths[j]:
+                widths[j] = width
+    return widths
+
+
+def build_tables(rows: Sequence[Sequence[str]], cols: int, table_style_id: str,
+                 font_family: str = '微软雅黑', font_size: float = 9,
+                 merge_first_column: bool = True, repeat_header: bool = False,
+                 split_rows: int = 0,
+                 min_table_width_cm: float = 8.0, max_table_width_cm: float = 16.0) -> Iterator:
+    """逐个生成表格元素
+
+    表格引用 table_style_id 的表格样式，居中、固定列宽，第一行按表头、之后按隔行
+    条件格式显示；首列（表头之后）相同值的连续单元格纵向合并，合并区域只在第一行保留文字。
+
+    列宽测量、首列合并和行的XML都按块处理（每块 _CHUNK_ROWS 行），不复制整个表格的数据，
+    除输入数据和生成的表格元素本身外，工作内存不随表格行数增长。
+    split_rows 大于 0 时每 split_rows 个数据行拆分为一个表格，每个表格都以表头开始、
+    使用相同的列宽，首列合并不跨越表格。
+
+    Args:
+        rows: 表格数据（支持 len 和下标访问的行序列，如 TableData；第一行为表头，
+            每行为单元格文本序列，不足 cols 的部分为空单元格）
+        cols: 列数
+        table_style_id: 表格样式ID
+        font_family: 单元格字体（用于按文字实际宽度计算列宽）
+        font_size: 单元格字号（磅）
+        merge_first_column: 是否合并首列中相同值的连续单元格
+        repeat_header: 表头标记为跨页重复的标题行（表格不再环绕文字）
+        split_rows: 每个表格的最大数据行数，0 为不拆分
+        min_table_width_cm: 表格整体最小宽度（厘米）
+        max_table_width_cm: 表格整体最大宽度（厘米）
+
+    Returns:
+        w:tbl 元素的迭代器（尚未插入文档，调用方插入一个后再生成下一个）
+    """
+    # 每列最宽一行文字的实际宽度（用于智能列宽分配，拆分后的各表格列宽一致）
+    content_widths_cm = _content_widths_cm(rows, cols, TextMetrics(font_family, font_size))
+    widths = column_widths_cm(content_widths_cm, min_table_width_cm, max_table_width_cm)
+    table_start = _table_start_xml(table_style_id, widths, floating=not repeat_header)
+
+    if not rows:
+        yield parse_xml(table_start + '</w:tbl>')
+        return
+    if split_rows <= 0 or len(rows) <= split_rows + 1:
+        yield _build_table_element(table_start, rows, 1, len(rows), cols, merge_first_column, repeat_header)
+        return
+
+    for start in range(1, len(rows), split_rows):
+        stop = min(start + split_rows, len(rows))
+        yield _build_table_element(table_start, rows, start, stop, cols, merge_first_column, repeat_header)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文字宽度测量模块
+按字体的字形前进宽度（advance width）测量文字在指定字号下的显示宽度，用于表格列宽分配。
+每种字体的字形宽度按字符记忆，整列文字用 NumPy 一次查表求和（未安装 NumPy 时逐字符求和）；
+系统中找不到对应字体文件或字体缺少某个字形时，按字符类别估算宽度
+"""
+
+import logging
+import threading
+import unicodedata
+from functools import lru_cache
+from typing import Iterable, Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from matplotlib import font_manager
+    from matplotlib.ft2font import FT2Font, LOAD_NO_SCALE
+    FONT_FILES_AVAILABLE = True
+except ImportError:
+    FONT_FILES_AVAILABLE = False
+
+logger = logging.getLogger('smart_doc.text_metrics')
+
+
+# Word 中常用的中文字体名 → 字体文件中的英文字体族名
+_FONT_ALIASES = {
+    '微软雅黑': 'Microsoft YaHei',
+    '宋体': 'SimSun',
+    '黑体': 'SimHei',
+    '楷体': 'KaiTi',
+    '仿宋': 'FangSong',
+    '等线': 'DengXian',
+    '新宋体': 'NSimSun',
+}
+
+# 估算宽度（em）：窄字符、较窄字符和宽字符，其余拉丁字母、数字按大小写区分
+_NARROW_CHARACTERS = frozenset(" !'(),./:;I[]`fijlrt|")
+_SEMI_NARROW_CHARACTERS = frozenset('"-\\{}*J')
+_WIDE_CHARACTERS = frozenset('%@MWmw')
+_TAB_WIDTH_EM = 2.0
+
+# NumPy 查找表覆盖的码位范围（基本多文种平面），范围外的字符逐个查询记忆表
+_TABLE_SIZE = 0x10000
+
+
+def _estimated_advance(char: str) -> float:
+    """按字符类别估算前进宽度（em）：中日韩等全角字符为 1em，拉丁字符按常见无衬线字体的宽度"""
+    if char == '\t':
+        return _TAB_WIDTH_EM
+    if unicodedata.category(char) in ('Cc', 'Cf', 'Mn', 'Me'):
+        return 0.0
+    if unicodedata.east_asian_width(char) in ('W', 'F', 'A'):
+        # 中文字体中的歧义宽度字符（如 “”、—）同样按全角显示
+        return 1.0
+    if char in _NARROW_CHARACTERS:
+        return 0.28
+    if char in _SEMI_NARROW_CHARACTERS:
+        return 0.38
+    if char in _WIDE_CHARACTERS:
+        return 0.85
+    if char.isupper():
+        return 0.65
+    if char.isdigit() or char.islower():
+        return 0.55
+    return 0.6
+
+
+def _find_font_file(family: str) -> Optional[str]:
+    """查找字体族对应的字体文件，找不到时返回 None"""
+    if not FONT_FILES_AVAILABLE:
+        return None
+    for name in dict.fromkeys((family, _FONT_ALIASES.get(family, family))):
+        try:
+            return font_manager.findfont(font_manager.FontProperties(family=name), fallback_to_default=False)
+        except ValueError:
+            continue
+    return None
+
+
+class _GlyphAdvances(dict):
+    """字符 → 前进宽度（em）的记忆表，首次查询某个字符时读取字体（或估算）后记录"""
+
+    def __init__(self, family: str):
+        super().__init__()
+        self.family = family
+        self._font = None
+        self._units_per_em = 1
+        self._lock = threading.Lock()
+        self._table = None
+
+        font_file = _find_font_file(family)
+        if font_file:
+            try:
+                self._font = FT2Font(font_file)
+                self._units_per_em = self._font.units_per_EM
+            except (OSError, RuntimeError) as e:
+                logger.warning("读取字体文件失败，按字符类别估算宽度: %s, %s", font_file, e)
+                self._font = None
+        if self._font is None:
+            logger.debug("未找到字体 %s，按字符类别估算文字宽度", family)
+
+    def __missing__(self, char: str) -> float:
+        advance = None
+        if self._font is not None and char != '\t':
+            code_point = ord(char)
+            # FT2Font 不是线程安全的，读取字形时加锁
+            with self._lock:
+                if self._font.get_char_index(code_point):
+                    glyph = self._font.load_char(code_point, flags=LOAD_NO_SCALE)
+                    advance = glyph.horiAdvance / self._units_per_em
+        if advance is None:
+            advance = _estimated_advance(char)
+        self[char] = advance
+        return advance
+
+    def lookup(self, code_points):
+        """码位数组 → 前进宽度数组（em）
+
+        基本多文种平面内的字符通过按码位索引的数组一次取值，数组中尚未记录的字符
+        （NaN）去重后逐个查询记忆表并写回。
+        """
+        table = self._table
+        if table is None:
+            table = np.full(_TABLE_SIZE, np.nan)
+            table[0] = 0.0
+            self._table = table
+
+        outside = code_points >= _TABLE_SIZE
+        has_outside = bool(outside.any())
+        values = table[np.where(outside, 0, code_points)] if has_outside else table[code_points]
+        missing = np.isnan(values)
+        if missing.any():
+            missing_code_points = code_points[missing]
+            for code_point in np.unique(missing_code_points).tolist():
+                table[code_point] = self[chr(code_point)]
+            values[missing] = table[missing_code_points]
+        if has_outside:
+            values[outside] = [self[chr(code_point)] for code_point in code_points[outside].tolist()]
+        return values
+
+
+@lru_cache(maxsize=32)
+def _glyph_advances(family: str) -> _GlyphAdvances:
+    """每种字体共享一张记忆表（前进宽度与字号成正比，以 em 为单位记录可用于所有字号）"""
+    return _GlyphAdvances(family)
+
+
+class TextMetrics:
+    """指定字体和字号的文字宽度测量"""
+
+    def __init__(self, family: str, size: float):
+        """初始化
+
+        Args:
+            family: 字体名称（与 Word 中的字体名一致）
+            size: 字号（磅）
+        """
+        self.family = family
+        self.size = size
+        self._advances = _glyph_advances(family)
+
+    def text_width(self, text: str) -> float:
+        """单行文字的宽度（磅）"""
+        return sum(map(self._advances.__getitem__, text)) * self.size
+
+    def max_line_width(self, texts: Iterable[str]) -> float:
+        """一组文字（如表格的一整列）中最宽一行的宽度（磅），换行符分隔的各行分别计算
+
+        Args:
+            texts: 文字序列
+
+        Returns:
+            最大行宽（磅），没有文字时为 0
+        """
+        lines = [line for text in texts if text for line in text.split('\n') if line]
+        if not lines:
+            return 0.0
+        if not NUMPY_AVAILABLE:
+            return max(map(self.text_width, lines))
+
+        # 整列文字拼接为码位数组一次查表，再按累计宽度相减得到每行的宽度
+        code_points = np.frombuffer(''.join(lines).encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+        cumulative = np.concatenate(([0.0], np.cumsum(self._advances.lookup(code_points))))
+        ends = np.cumsum(np.fromiter(map(len, lines), dtype=np.int64, count=len(lines)))
+        starts = np.concatenate(([0], ends[:-1]))
+        return float((cumulative[ends] - cumulative[starts]).max()) * self.size
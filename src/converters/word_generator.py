@@ -5,25 +5,30 @@ Word文档生成器模块
 负责将解析后的Markdown内容转换为Word文档
 """
 
+import io
+import logging
 import os
-import re
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, Iterable, List, Any, Optional, Union, IO
 from pathlib import Path
 from dataclasses import dataclass
 
 try:
     from docx import Document
-    from docx.shared import Inches, Pt, RGBColor, Cm
+    from docx.shared import Inches, Pt, Cm
     from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_BREAK
-    from docx.enum.style import WD_STYLE_TYPE
-    from docx.enum.table import WD_TABLE_ALIGNMENT
     from docx.oxml.shared import OxmlElement, qn
     from docx.oxml.ns import nsdecls
     from docx.oxml import parse_xml
+    from docx.table import Table
 except ImportError:
     raise ImportError("请安装python-docx库: pip install python-docx")
 
-from .markdown_parser import MarkdownElement
+from .inline_parser import InlineNode, inline_plain_text
+from .markdown_parser import MarkdownElement, TableData
+from .style_compiler import THEME_STYLE_IDS, code_token_style_id, compile_theme_styles
+from .table_builder import build_tables
+
+logger = logging.getLogger('smart_doc.word_generator')
 
 # 图表相关模块（可选导入）
 try:
@@ -31,6 +36,9 @@ try:
     try:
         from ..utils.chart_recognizer import ChartRecognizer
         from ..utils.chart_generator import ChartGenerator
+        from ..utils.chart_cache import get_chart_cache
+        from ..utils.chart_pool import acquire_render_pool, reset_render_pool, resolve_render_workers
+        from ..utils.chart_anchor import ChartAnchorIndex
     except ImportError:
         # 如果相对导入失败，尝试绝对导入
         import sys
@@ -42,10 +50,24 @@ try:
             sys.path.insert(0, src_dir)
         from utils.chart_recognizer import ChartRecognizer
         from utils.chart_generator import ChartGenerator
+        from utils.chart_cache import get_chart_cache
+        from utils.chart_pool import acquire_render_pool, reset_render_pool, resolve_render_workers
+        from utils.chart_anchor import ChartAnchorIndex
     CHARTS_AVAILABLE = True
 except ImportError as e:
     CHARTS_AVAILABLE = False
-    print(f"图表模块导入失败: {e}")
+    logger.warning("图表模块导入失败: %s", e)
+
+# 代码高亮模块（可选导入，依赖 Pygments）
+try:
+    try:
+        from ..utils.code_highlighter import PYGMENTS_AVAILABLE, get_code_highlighter, get_token_styles
+    except ImportError:
+        from utils.code_highlighter import PYGMENTS_AVAILABLE, get_code_highlighter, get_token_styles
+    HIGHLIGHT_AVAILABLE = PYGMENTS_AVAILABLE
+except ImportError as e:
+    HIGHLIGHT_AVAILABLE = False
+    logger.warning("代码高亮模块导入失败: %s", e)
 
 
 # WordStyle 已废弃，使用 config.models.StyleConfig 代替
@@ -54,13 +76,21 @@ except ImportError as e:
 class WordGenerator:
     """Word文档生成器（重构版）"""
     
-    def __init__(self, config, enable_charts: bool = False, chart_data: str = ''):
+    def __init__(self, config, enable_charts: bool = False, chart_data: str = '',
+                 template: Optional[Union[str, IO[bytes]]] = None, chart_cache=None,
+                 styles_compiled: bool = False, render_workers: Optional[int] = None):
         """初始化生成器
         
         Args:
             config: StyleConfig 配置对象
             enable_charts: 是否启用图表生成
             chart_data: 图表数据（JSON格式）
+            template: Word模板（文件路径或二进制流），默认使用python-docx内置模板
+            chart_cache: 图表渲染缓存（ChartRenderCache），默认使用进程级共享缓存
+            styles_compiled: 模板中是否已按 config 编译好主题样式（见 style_compiler），
+                否则在此编译
+            render_workers: 并行渲染图表的工作进程数（进程级设置，见 chart_pool.resolve_render_workers），
+                None 时读取环境变量 CHART_RENDER_WORKERS
         """
         # 导入 StyleConfig（使用绝对导入，因为 src 已在 sys.path 中）
         try:
@@ -82,23 +112,32 @@ class WordGenerator:
             raise TypeError(f"config must be StyleConfig, got {type(config)}")
         
         self.config = config
-        self.document = Document()
+        self.document = Document(template)
+        
+        # 正文、标题、引用、代码和表格单元格的格式由主题样式决定，段落和文字只引用样式ID
+        if not styles_compiled:
+            compile_theme_styles(self.document, config)
         
         # 图表相关配置
         self.enable_charts = enable_charts
         self.chart_data = []  # 存储识别的图表数据
-        self.chart_images = {}  # 存储生成的图片路径 {position: image_path}
+        self.chart_images = {}  # 存储生成的图片数据 {position: BytesIO}
+        self.chart_anchor_index = None  # 图表插入位置索引
         self.chart_generator = None
-        self.temp_image_files = []  # 临时图片文件列表，用于清理
         self.chart_data_source = chart_data  # 图表数据源
+        self.chart_cache = chart_cache  # 图表渲染缓存
+        self.render_workers = resolve_render_workers(render_workers) if CHARTS_AVAILABLE else 0
         
     
-    def generate(self, markdown_element: MarkdownElement, output_path: str, markdown_text: Optional[str] = None) -> bool:
+    def generate(self, markdown_element: Union[MarkdownElement, Iterable[MarkdownElement]],
+                 output_path: Union[str, IO[bytes]],
+                 markdown_text: Optional[str] = None) -> bool:
         """生成Word文档
         
         Args:
-            markdown_element: 解析后的Markdown元素
-            output_path: 输出文件路径
+            markdown_element: 解析后的Markdown元素，或逐个产出顶层块的迭代器
+                （如 MarkdownParser.iter_blocks，每个块产出后立即写入文档，不保留整篇文档树）
+            output_path: 输出文件路径，或可写的二进制流（如 BytesIO）
             markdown_text: 原始Markdown文本（用于图表识别）
             
         Returns:
@@ -114,40 +153,56 @@ class WordGenerator:
                 section.right_margin = Inches(self.config.page.margin_right / 2.54)
             
             # 如果启用图表功能，先识别和生成图表
-            print(f"图表功能检查: enable_charts={self.enable_charts}, CHARTS_AVAILABLE={CHARTS_AVAILABLE}, markdown_text={'有' if markdown_text else '无'}")
             if self.enable_charts and CHARTS_AVAILABLE and markdown_text:
-                print("开始准备图表...")
                 self._prepare_charts(markdown_text)
-            else:
-                if not self.enable_charts:
-                    print("图表功能已禁用")
-                elif not CHARTS_AVAILABLE:
-                    print("图表模块不可用")
-                elif not markdown_text:
-                    print("未提供markdown_text参数")
+            elif self.enable_charts:
+                logger.debug(
+                    "跳过图表准备: CHARTS_AVAILABLE=%s, markdown_text=%s",
+                    CHARTS_AVAILABLE, '有' if markdown_text else '无'
+                )
             
             # 处理文档内容
-            self._process_element(markdown_element)
+            if isinstance(markdown_element, MarkdownElement):
+                self._process_element(markdown_element)
+            else:
+                for block in markdown_element:
+                    self._process_element(block)
             
             # 处理未插入的图表（插入到文档末尾）
-            if self.chart_images:
-                print(f"文档处理完成，检查未插入的图表: 剩余 {len(self.chart_images)} 个图表")
             self._insert_remaining_charts()
             
             # 保存文档
             self.document.save(output_path)
             
-            # 清理临时图片文件
-            self._cleanup_chart_images()
-            
             return True
             
-        except Exception as e:
-            print(f"生成Word文档失败: {e}")
-            # 确保清理临时文件
-            self._cleanup_chart_images()
+        except Exception:
+            logger.exception("生成Word文档失败")
             return False
     
+    def generate_bytes(self, markdown_element: Union[MarkdownElement, Iterable[MarkdownElement]],
+                       stream: Optional[IO[bytes]] = None,
+                       markdown_text: Optional[str] = None) -> Optional[bytes]:
+        """生成Word文档并直接返回文档内容（不经过临时文件）
+        
+        Args:
+            markdown_element: 解析后的Markdown元素，或逐个产出顶层块的迭代器
+            stream: 调用方提供的可写二进制流，不提供时使用内部 BytesIO
+            markdown_text: 原始Markdown文本（用于图表识别）
+            
+        Returns:
+            文档的字节内容，生成失败时返回 None
+        """
+        # BytesIO 直接写入，其他流先写入内存缓冲区再整体转写
+        buffer = stream if isinstance(stream, io.BytesIO) else io.BytesIO()
+        if not self.generate(markdown_element, buffer, markdown_text=markdown_text):
+            return None
+        
+        content = buffer.getvalue()
+        if stream is not None and stream is not buffer:
+            stream.write(content)
+        return content
+    
     def generate_from_html(self, html_content: str, metadata: Dict[str, Any], output_path: str) -> bool:
         """从HTML内容生成Word文档（简化版本）
         
@@ -176,29 +231,24 @@ class WordGenerator:
             self.document.save(output_path)
             return True
             
-        except Exception as e:
-            print(f"生成Word文档失败: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("生成Word文档失败")
             return False
     
     def _process_html_elements(self, soup):
         """处理HTML元素"""
         for element in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'pre', 'blockquote', 'ul', 'ol', 'table']):
             if element.name.startswith('h'):
-                level = int(element.name[1])
-                self.document.add_heading(element.get_text().strip(), level=level)
+                self._add_styled_paragraph(element.name.replace('h', 'heading'), element.get_text().strip())
             elif element.name == 'p':
                 paragraph = self.document.add_paragraph()
                 self._process_paragraph_content(paragraph, element)
             elif element.name == 'pre':
                 code_text = element.get_text().strip()
-                code_paragraph = self.document.add_paragraph(code_text)
-                self._apply_element_style(code_paragraph, self.config.code_block)
+                self._add_styled_paragraph('code_block', code_text)
             elif element.name == 'blockquote':
                 quote_text = element.get_text().strip()
-                quote_paragraph = self.document.add_paragraph(quote_text)
-                self._apply_element_style(quote_paragraph, self.config.quote)
+                self._add_styled_paragraph('quote', quote_text)
             elif element.name in ['ul', 'ol']:
                 self._process_html_list(element)
             elif element.name == 'table':
@@ -266,198 +316,14 @@ class WordGenerator:
             for nested_list in nested_lists:
                 self._process_html_list(nested_list, indent_level + 1)
     
-    def _set_cell_vertical_alignment(self, cell, alignment='center'):
-        """设置单元格垂直对齐方式
-        
-        Args:
-            cell: Word表格单元格对象
-            alignment: 对齐方式，可选值：'top', 'center', 'bottom'，默认为'center'
-        """
-        tc = cell._tc
-        tcPr = tc.get_or_add_tcPr()
-        
-        # 查找或创建vAlign元素
-        vAlign_elements = tcPr.findall(qn('w:vAlign'))
-        if vAlign_elements:
-            vAlign = vAlign_elements[0]
-        else:
-            vAlign = OxmlElement('w:vAlign')
-            tcPr.append(vAlign)
-        
-        # 设置垂直对齐方式
-        vAlign.set(qn('w:val'), alignment)
-    
-    def _set_cell_background(self, cell, rgb_color):
-        """设置单元格背景色
-        
-        Args:
-            cell: Word表格单元格对象
-            rgb_color: RGB颜色元组，如 (141, 179, 226)
-        """
-        tc = cell._tc
-        tcPr = tc.get_or_add_tcPr()
-        
-        # 查找或创建shd元素
-        shd_elements = tcPr.findall(qn('w:shd'))
-        if shd_elements:
-            shd = shd_elements[0]
-        else:
-            shd = OxmlElement('w:shd')
-            tcPr.append(shd)
-        
-        # 将RGB转换为十六进制（去掉#号）
-        hex_color = f"{rgb_color[0]:02X}{rgb_color[1]:02X}{rgb_color[2]:02X}"
-        shd.set(qn('w:fill'), hex_color)
-    
-    def _set_table_header_style(self, table):
-        """设置表格表头样式（背景色）
-        
-        Args:
-            table: Word表格对象
-        """
-        if table.rows is None or len(table.rows) == 0:
-            return
-        
-        # 表头背景色 RGB(141, 179, 226)
-        header_color = (141, 179, 226)
-        
-        # 设置第一行（表头）的背景色
-        header_row = table.rows[0]
-        for cell in header_row.cells:
-            self._set_cell_background(cell, header_color)
-    
-    def _merge_first_column_cells(self, table):
-        """合并第一列中相同值的单元格，并设置垂直居中
-        
-        Args:
-            table: Word表格对象
-        """
-        from docx.enum.text import WD_ALIGN_PARAGRAPH
-        
-        if table.rows is None or len(table.rows) == 0:
-            return
-        
-        num_rows = len(table.rows)
-        if num_rows <= 1:
-            return
-        
-        # 收集第一列的值，用于判断哪些行需要合并
-        first_col_values = []
-        for i in range(num_rows):
-            if len(table.rows[i].cells) > 0:
-                first_col_values.append(table.rows[i].cells[0].text.strip())
-            else:
-                first_col_values.append("")
-        
-        # 合并第一列中相同值的连续单元格（从第二行开始，跳过表头）
-        i = 1  # 从第二行开始，跳过表头
-        while i < num_rows:
-            current_value = first_col_values[i]
-            if not current_value:  # 跳过空值
-                i += 1
-                continue
-            
-            # 找到相同值的连续范围
-            start_row = i
-            end_row = i
-            
-            # 向后查找相同值的行
-            j = i + 1
-            while j < num_rows:
-                if first_col_values[j] == current_value:
-                    end_row = j
-                    j += 1
-                else:
-                    break
-            
-            # 如果找到需要合并的行（至少2行）
-            if end_row > start_row:
-                # 保存第一个单元格的值（合并前）
-                start_cell = table.rows[start_row].cells[0]
-                cell_value = current_value  # 使用收集到的值，避免重复
-                
-                # 合并单元格
-                end_cell = table.rows[end_row].cells[0]
-                start_cell.merge(end_cell)
-                
-                # 清空合并后的单元格内容，然后重新设置值（避免重复）
-                start_cell.text = ""
-                start_cell.text = cell_value
-                
-                # 设置垂直居中对齐
-                self._set_cell_vertical_alignment(start_cell, 'center')
-                
-                # 确保合并后的单元格内容水平居中，并设置字体样式
-                for paragraph in start_cell.paragraphs:
-                    paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    # 设置字体为微软雅黑，小五（9号）
-                    for run in paragraph.runs:
-                        run.font.name = '微软雅黑'
-                        run.font.size = Pt(9)
-            
-            # 移动到下一组
-            i = end_row + 1
-    
     def _process_html_table(self, element):
         """处理HTML表格"""
-        from docx.enum.text import WD_ALIGN_PARAGRAPH
-        
         rows = element.find_all('tr')
         if not rows:
             return
         
-        # 计算列数
-        max_cols = max(len(row.find_all(['td', 'th'])) for row in rows)
-        
-        # 创建表格
-        table = self.document.add_table(rows=len(rows), cols=max_cols)
-        table.style = 'Table Grid'
-        
-        # 禁用自动调整列宽，以便手动控制列宽
-        table.autofit = False
-        
-        # 设置表格属性：对齐方式、文字环绕、单元格边距
-        self._setup_table_properties(table)
-        
-        # 计算每列的最大内容长度（用于智能列宽分配）
-        column_max_lengths = [0] * max_cols
-        for row in rows:
-            cells = row.find_all(['td', 'th'])
-            for j, cell in enumerate(cells):
-                if j < max_cols:
-                    cell_text = cell.get_text().strip()
-                    # 计算文本长度（中文字符按2个字符计算）
-                    text_length = sum(2 if ord(c) > 127 else 1 for c in cell_text)
-                    column_max_lengths[j] = max(column_max_lengths[j], text_length)
-        
-        # 填充数据并设置样式
-        for i, row in enumerate(rows):
-            cells = row.find_all(['td', 'th'])
-            for j, cell in enumerate(cells):
-                if j < max_cols:
-                    word_cell = table.cell(i, j)
-                    word_cell.text = cell.get_text().strip()
-                    
-                    # 设置单元格水平对齐方式为居中
-                    for paragraph in word_cell.paragraphs:
-                        paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                        
-                        # 设置字体为微软雅黑，小五（9号）
-                        for run in paragraph.runs:
-                            run.font.name = '微软雅黑'
-                            run.font.size = Pt(9)
-                    
-                    # 设置单元格垂直对齐方式为居中
-                    self._set_cell_vertical_alignment(word_cell, 'center')
-        
-        # 合并第一列中相同值的单元格
-        self._merge_first_column_cells(table)
-        
-        # 设置表头背景色
-        self._set_table_header_style(table)
-        
-        # 智能调整列宽（设置表格整体宽度最小值和最大值）
-        self._adjust_table_column_widths(table, column_max_lengths, min_table_width_cm=8.0, max_table_width_cm=16.0)
+        data = [[cell.get_text().strip() for cell in row.find_all(['td', 'th'])] for row in rows]
+        self._add_table(data, max(len(row) for row in data))
     
     def _process_element(self, element: MarkdownElement):
         """处理Markdown元素"""
@@ -474,9 +340,13 @@ class WordGenerator:
         elif element.element_type == 'image':
             self._process_image(element)
         elif element.element_type == 'list':
+            # 列表项及嵌套列表已由 _process_list 处理，不再递归子元素
             self._process_list(element)
+            return
         elif element.element_type == 'quote':
+            # 引用以 content 输出为一个段落，内部块不再单独输出
             self._process_quote(element)
+            return
         
         # 处理子元素
         for child in element.children:
@@ -491,106 +361,64 @@ class WordGenerator:
     
     def _process_heading(self, element: MarkdownElement):
         """处理标题（重构版）"""
-        level = int(element.element_type.replace('heading', ''))
-        
-        paragraph = self.document.add_heading(element.content, level=level)
-        
-        # 从配置获取标题样式
-        heading_style = self.config.headings.get(level)
+        paragraph = self._add_styled_paragraph(element.element_type, element.content)
         
-        # 应用样式
-        self._apply_element_style(paragraph, heading_style, is_heading=True)
+        # 检查是否需要在此标题前后插入图表
+        if self.enable_charts and self.chart_images:
+            self._check_and_insert_chart(paragraph, element.content)
     
     def _process_paragraph(self, element: MarkdownElement):
         """处理段落（重构版）"""
-        paragraph = self.document.add_paragraph()
+        paragraph = self._add_styled_paragraph('body')
         
         # 处理段落内容，包括格式化文本
-        self._process_formatted_text(paragraph, element.content)
-        
-        # 应用正文样式
-        self._apply_element_style(paragraph, self.config.body, is_heading=False)
+        self._process_formatted_text(paragraph, element.content, element.attributes.get('inline'))
         
         # 检查是否需要在此段落后插入图表
         if self.enable_charts and self.chart_images:
             self._check_and_insert_chart(paragraph, element.content)
     
-    def _process_formatted_text(self, paragraph, text: str):
-        """处理格式化文本"""
-        # 处理粗体、斜体、代码等格式
-        parts = self._split_formatted_text(text)
-        
-        for part in parts:
-            if part['type'] == 'bold':
-                run = paragraph.add_run(part['text'])
-                run.bold = True
-            elif part['type'] == 'italic':
-                run = paragraph.add_run(part['text'])
-                run.italic = True
-            elif part['type'] == 'code':
-                run = paragraph.add_run(part['text'])
-                self._apply_code_style(run)
-            elif part['type'] == 'link':
-                self._add_hyperlink(paragraph, part['url'], part['text'])
-            else:
-                paragraph.add_run(part['text'])
-    
-    def _split_formatted_text(self, text: str) -> List[Dict[str, str]]:
-        """分割格式化文本"""
-        if not text:
-            # 如果文本为空，返回空列表（不添加任何内容）
-            return []
-        
-        parts = []
-        current_pos = 0
+    def _process_formatted_text(self, paragraph, text: str,
+                                inline: Optional[List[InlineNode]] = None):
+        """处理格式化文本
         
-        # 匹配各种格式的正则表达式
-        patterns = [
-            (r'\*\*([^*]+)\*\*', 'bold'),
-            (r'\*([^*]+)\*', 'italic'),
-            (r'`([^`]+)`', 'code'),
-            (r'\[([^\]]+)\]\(([^)]+)\)', 'link')
-        ]
-        
-        for pattern, format_type in patterns:
-            for match in re.finditer(pattern, text):
-                # 添加匹配前的普通文本
-                if match.start() > current_pos:
-                    parts.append({
-                        'type': 'normal',
-                        'text': text[current_pos:match.start()]
-                    })
-                
-                # 添加格式化文本
-                if format_type == 'link':
-                    parts.append({
-                        'type': 'link',
-                        'text': match.group(1),
-                        'url': match.group(2)
-                    })
+        Args:
+            paragraph: Word段落对象
+            text: 纯文本内容
+            inline: 解析器生成的行内节点树（含粗体、斜体、代码或链接时才有），
+                为 None 时整段作为普通文字输出
+        """
+        if inline is None:
+            if text:
+                paragraph.add_run(text)
+        else:
+            self._add_inline_runs(paragraph, inline, False, False)
+    
+    def _add_inline_runs(self, paragraph, nodes: List[InlineNode], bold: bool, italic: bool):
+        """按行内节点树输出文字，粗体/斜体向内层节点传递"""
+        for node in nodes:
+            kind = node.kind
+            if kind == 'strong':
+                self._add_inline_runs(paragraph, node.children, True, italic)
+            elif kind == 'em':
+                self._add_inline_runs(paragraph, node.children, bold, True)
+            elif kind == 'link':
+                if node.url:
+                    self._add_hyperlink(paragraph, node.url, inline_plain_text(node.children))
                 else:
-                    parts.append({
-                        'type': format_type,
-                        'text': match.group(1)
-                    })
-                
-                current_pos = match.end()
-        
-        # 添加剩余的普通文本
-        if current_pos < len(text):
-            parts.append({
-                'type': 'normal',
-                'text': text[current_pos:]
-            })
-        
-        # 如果没有找到任何部分，返回整个文本作为普通文本
-        if not parts:
-            parts.append({
-                'type': 'normal',
-                'text': text
-            })
-        
-        return parts
+                    self._add_inline_runs(paragraph, node.children, bold, italic)
+            elif kind != 'image' and node.text:
+                run = paragraph.add_run(node.text)
+                self._apply_inline_format(run, bold, italic, kind == 'code')
+    
+    def _apply_inline_format(self, run, bold: bool, italic: bool, code: bool):
+        """设置行内格式"""
+        if bold:
+            run.bold = True
+        if italic:
+            run.italic = True
+        if code:
+            self._apply_code_style(run)
     
     def _process_code_block(self, element: MarkdownElement):
         """处理代码块"""
@@ -599,18 +427,39 @@ class WordGenerator:
             lang_paragraph = self.document.add_paragraph(f"代码 ({element.attributes['language']})")
             lang_paragraph.style = 'Caption'
         
-        # 添加代码内容
-        code_paragraph = self.document.add_paragraph(element.content)
-        self._apply_element_style(code_paragraph, self.config.code_block)
+        # 添加代码内容（标注了语言时按高亮片段分段输出，背景色已编译进代码块样式）
+        code_paragraph = self._add_styled_paragraph('code_block')
+        self._add_code_runs(code_paragraph, element)
+        
+        # 检查是否需要在此代码块前后插入图表
+        if self.enable_charts and self.chart_images:
+            self._check_and_insert_chart(code_paragraph, element.content)
+    
+    def _add_code_runs(self, paragraph, element: MarkdownElement):
+        """输出代码块内容（高亮片段的颜色和粗斜体由字符样式决定）
+        
+        Args:
+            paragraph: 代码段落
+            element: 代码块元素
+        """
+        language = element.attributes.get('language', '')
+        segments = None
+        if HIGHLIGHT_AVAILABLE and language and self.config.code_highlight.enabled:
+            segments = get_code_highlighter().tokenize(language, element.content)
+        
+        if not segments:
+            paragraph.add_run(element.content)
+            return
         
-        # 设置代码块背景色
-        if self.config.code_block.background_color:
-            self._set_paragraph_background(code_paragraph, self.config.code_block.background_color)
+        # 各高亮类别的字符样式已随主题样式编译进 styles.xml（见 style_compiler），这里只引用样式ID
+        token_styles = get_token_styles(self.config.code_highlight.style)
+        for category, text in segments:
+            run = paragraph.add_run(text)
+            if category in token_styles:
+                run._r.style = code_token_style_id(category)
     
     def _process_table(self, element: MarkdownElement):
         """处理表格"""
-        from docx.enum.text import WD_ALIGN_PARAGRAPH
-        
         if 'rows' not in element.attributes or 'cols' not in element.attributes:
             return
         
@@ -619,224 +468,47 @@ class WordGenerator:
         
         rows = element.attributes['rows']
         cols = element.attributes['cols']
+        data = element.attributes.get('data')
+        tables = self._add_table(data if data is not None else [[]] * rows, cols, rows)
         
-        table = self.document.add_table(rows=rows, cols=cols)
-        table.style = 'Table Grid'
-        
-        # 禁用自动调整列宽，以便手动控制列宽
-        table.autofit = False
-        
-        # 设置表格属性：对齐方式、文字环绕、单元格边距
-        self._setup_table_properties(table)
-        
-        # 填充表格数据并设置样式
-        if 'data' in element.attributes:
-            data = element.attributes['data']
-            
-            # 计算每列的最大内容长度（用于智能列宽分配）
-            column_max_lengths = [0] * cols
-            for i, row_data in enumerate(data):
-                if i < rows:
-                    for j, cell_data in enumerate(row_data):
-                        if j < cols:
-                            cell_text = str(cell_data)
-                            # 计算文本长度（中文字符按2个字符计算）
-                            text_length = sum(2 if ord(c) > 127 else 1 for c in cell_text)
-                            column_max_lengths[j] = max(column_max_lengths[j], text_length)
-            
-            # 填充数据并设置样式
-            for i, row_data in enumerate(data):
-                if i < rows:
-                    for j, cell_data in enumerate(row_data):
-                        if j < cols:
-                            cell = table.cell(i, j)
-                            cell.text = str(cell_data)
-                            
-                            # 设置单元格水平对齐方式为居中
-                            for paragraph in cell.paragraphs:
-                                paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                                
-                                # 设置字体为微软雅黑，小五（9号）
-                                for run in paragraph.runs:
-                                    run.font.name = '微软雅黑'
-                                    run.font.size = Pt(9)
-                            
-                            # 设置单元格垂直对齐方式为居中
-                            self._set_cell_vertical_alignment(cell, 'center')
-            
-            # 合并第一列中相同值的单元格
-            self._merge_first_column_cells(table)
-            
-            # 设置表头背景色
-            self._set_table_header_style(table)
-            
-            # 智能调整列宽（设置表格整体宽度最小值和最大值）
-            self._adjust_table_column_widths(table, column_max_lengths, min_table_width_cm=8.0, max_table_width_cm=16.0)
+        # 检查是否需要在此表格前后插入图表（任一单元格命中即以整个表格为锚点）
+        if data is not None and self.enable_charts and self.chart_images:
+            cells = data.iter_cells() if isinstance(data, TableData) else (cell for row in data for cell in row)
+            self._check_and_insert_chart(tables[0], map(str, cells), end_block=tables[-1])
         
         # 在表格后添加一个空行
         self.document.add_paragraph()
     
-    def _setup_table_properties(self, table):
-        """设置表格属性：对齐方式、文字环绕、单元格边距
-        
-        Args:
-            table: Word表格对象
-        """
-        # 1. 设置表格对齐方式为居中
-        table.alignment = WD_TABLE_ALIGNMENT.CENTER
-        
-        # 2. 设置文字环绕方式为环绕
-        tbl = table._tbl  # 获取底层的XML元素
-        
-        # 查找或创建tblPr元素
-        tblPr_elements = tbl.findall(qn('w:tblPr'))
-        if not tblPr_elements:
-            tblPr = OxmlElement('w:tblPr')
-            # 将tblPr插入到tbl的第一个位置
-            tbl.insert(0, tblPr)
-        else:
-            tblPr = tblPr_elements[0]
-        
-        # 查找或创建tblpPr元素
-        tblpPr_elements = tblPr.findall(qn('w:tblpPr'))
-        if not tblpPr_elements:
-            tblpPr = OxmlElement('w:tblpPr')
-            tblPr.append(tblpPr)
-        else:
-            tblpPr = tblpPr_elements[0]
-        
-        # 设置文字环绕为环绕
-        tblpPr.set(qn('w:wrap'), 'around')
-        
-        # 3. 设置单元格边距：上下均为0.15cm
-        # 查找或创建tblCellMar元素
-        tblCellMar_elements = tblPr.findall(qn('w:tblCellMar'))
-        if not tblCellMar_elements:
-            tblCellMar = OxmlElement('w:tblCellMar')
-            tblPr.append(tblCellMar)
-        else:
-            tblCellMar = tblCellMar_elements[0]
+    def _add_table(self, data, cols: int, rows: Optional[int] = None) -> List[Table]:
+        """由表格数据生成表格并添加到文档末尾
         
-        # 清除现有的边距设置（如果存在）
-        for margin_name in ['w:top', 'w:bottom', 'w:left', 'w:right']:
-            existing = tblCellMar.findall(qn(margin_name))
-            for elem in existing:
-                tblCellMar.remove(elem)
-        
-        # 设置上下边距为0.15cm
-        top_margin = OxmlElement('w:top')
-        top_margin.set(qn('w:w'), str(int(0.15 * 567)))  # 0.15cm转换为twips (1cm = 567 twips)
-        top_margin.set(qn('w:type'), 'dxa')
-        tblCellMar.append(top_margin)
-        
-        bottom_margin = OxmlElement('w:bottom')
-        bottom_margin.set(qn('w:w'), str(int(0.15 * 567)))
-        bottom_margin.set(qn('w:type'), 'dxa')
-        tblCellMar.append(bottom_margin)
-        
-        # 设置左右边距为默认值（如果需要）
-        left_margin = OxmlElement('w:left')
-        left_margin.set(qn('w:w'), str(int(0.19 * 567)))  # 默认0.19cm
-        left_margin.set(qn('w:type'), 'dxa')
-        tblCellMar.append(left_margin)
-        
-        right_margin = OxmlElement('w:right')
-        right_margin.set(qn('w:w'), str(int(0.19 * 567)))  # 默认0.19cm
-        right_margin.set(qn('w:type'), 'dxa')
-        tblCellMar.append(right_margin)
-    
-    def _adjust_table_column_widths(self, table, column_max_lengths, min_table_width_cm=8.0, max_table_width_cm=16.0):
-        """根据内容长度智能调整表格列宽，并设置表格整体宽度的最小值和最大值
+        表格元素由 table_builder.build_tables 生成（首列合并、按单元格字体测量的列宽），单元格文字、
+        表头和隔行底纹由主题表格样式决定，不再逐个单元格通过 python-docx 代理对象设置。
+        数据行数超过 large_table_rows 的大表格标记跨页重复的表头，配置了 split_rows 时
+        拆分为多个表格（以空段落分隔，否则 Word 会把相邻的表格合并为一个）。
         
         Args:
-            table: Word表格对象
-            column_max_lengths: 每列的最大内容长度列表
-            min_table_width_cm: 表格整体最小宽度（厘米），默认8.0cm
-            max_table_width_cm: 表格整体最大宽度（厘米），默认16.0cm
-        """
-        if not column_max_lengths or sum(column_max_lengths) == 0:
-            # 如果没有内容，设置默认宽度
-            default_width_cm = (min_table_width_cm + max_table_width_cm) / 2
-            if len(table.columns) > 0:
-                col_width_cm = default_width_cm / len(table.columns)
-                col_width = Cm(col_width_cm)
-            else:
-                col_width = Cm(default_width_cm)
-            for col in table.columns:
-                col.width = col_width
-            return
-        
-        # 设置最小和最大列宽（厘米）
-        min_col_width_cm = 1.2  # 最小列宽1.2cm（用于序号等短内容）
-        max_col_width_cm = 6.0  # 最大列宽6.0cm（用于长描述）
-        
-        # 计算所有列的最大内容长度的中位数作为基准
-        valid_lengths = [length for length in column_max_lengths if length > 0]
-        if not valid_lengths:
-            # 如果没有有效长度，使用默认宽度
-            default_width_cm = (min_col_width_cm + max_col_width_cm) / 2
-            column_widths_cm = [default_width_cm] * len(column_max_lengths)
-        else:
-            # 计算中位数
-            sorted_lengths = sorted(valid_lengths)
-            median_length = sorted_lengths[len(sorted_lengths) // 2]
-            
-            # 如果中位数为0或太小，使用平均值作为基准
-            if median_length < 3:
-                median_length = sum(valid_lengths) / len(valid_lengths) if valid_lengths else 10
+            data: 表格数据（行序列，每行为单元格文本序列，第一行为表头）
+            cols: 列数
+            rows: 行数，超出的数据行忽略，默认为全部数据行
             
-            # 根据中位数计算基准宽度（中位数对应的列宽设为中等宽度）
-            # 假设中位数对应的列宽为3.0cm（表格总宽度在8-16cm之间，5列的话平均约3cm）
-            base_width_cm = 3.0
-            char_width_cm = base_width_cm / median_length  # 每个字符对应的宽度
-            
-            # 根据内容计算每列需要的宽度
-            column_widths_cm = []
-            for max_length in column_max_lengths:
-                if max_length > 0:
-                    # 对于非常短的内容（<=3个字符），使用最小宽度
-                    if max_length <= 3:
-                        col_width_cm = min_col_width_cm
-                    else:
-                        # 根据字符数与中位数的比例计算列宽
-                        # 如果内容长度等于中位数，则宽度为base_width_cm
-                        # 如果内容长度是中位数的2倍，则宽度约为base_width_cm的2倍（但不超过最大值）
-                        col_width_cm = max_length * char_width_cm
-                        # 确保在最小和最大宽度之间
-                        col_width_cm = max(min_col_width_cm, min(col_width_cm, max_col_width_cm))
-                else:
-                    # 如果列没有内容，使用最小宽度
-                    col_width_cm = min_col_width_cm
-                column_widths_cm.append(col_width_cm)
-        
-        # 计算表格总宽度
-        total_width_cm = sum(column_widths_cm)
-        
-        # 如果总宽度超出范围，按比例缩放所有列
-        if total_width_cm < min_table_width_cm:
-            # 如果总宽度小于最小值，按比例放大
-            scale_factor = min_table_width_cm / total_width_cm
-            column_widths_cm = [w * scale_factor for w in column_widths_cm]
-            total_width_cm = min_table_width_cm
-        elif total_width_cm > max_table_width_cm:
-            # 如果总宽度大于最大值，按比例缩小
-            scale_factor = max_table_width_cm / total_width_cm
-            column_widths_cm = [w * scale_factor for w in column_widths_cm]
-            total_width_cm = max_table_width_cm
-        
-        # 确保每列宽度在合理范围内（缩放后可能超出范围）
-        for j, width_cm in enumerate(column_widths_cm):
-            width_cm = max(min_col_width_cm, min(width_cm, max_col_width_cm))
-            column_widths_cm[j] = width_cm
-        
-        # 应用列宽 - 同时设置列和单元格的宽度以确保生效
-        for j, width_cm in enumerate(column_widths_cm):
-            col_width = Cm(width_cm)
-            # 设置列的宽度
-            table.columns[j].width = col_width
-            # 同时设置该列所有单元格的宽度，确保生效
-            for cell in table.columns[j].cells:
-                cell.width = col_width
+        Returns:
+            新表格（未拆分时只有一个）
+        """
+        # 表格数据（TableData）直接交给 build_tables 按块读取，不复制为行列表
+        table_rows = data if rows is None or rows >= len(data) else [data[i] for i in range(rows)]
+        table_style = self.config.table
+        large = 0 < table_style.large_table_rows < len(table_rows) - 1
+        body = self.document._body
+        tables = []
+        for tbl in build_tables(table_rows, cols, THEME_STYLE_IDS['table'],
+                                table_style.cell_font_family, table_style.cell_font_size,
+                                repeat_header=large, split_rows=table_style.split_rows if large else 0):
+            if tables:
+                self.document.add_paragraph()
+            body._element._insert_tbl(tbl)
+            tables.append(Table(tbl, body))
+        return tables
     
     def _process_image(self, element: MarkdownElement):
         """处理图片"""
@@ -864,7 +536,7 @@ class WordGenerator:
                 placeholder.style = 'Caption'
                 
         except Exception as e:
-            print(f"处理图片失败 {src}: {e}")
+            logger.warning("处理图片失败 %s: %s", src, e)
             # 添加错误占位符
             error_placeholder = self.document.add_paragraph(f"[图片加载失败: {alt or src}]")
             error_placeholder.style = 'Caption'
@@ -899,7 +571,7 @@ class WordGenerator:
             
             # 处理列表项内容，包括格式化文本（粗体、斜体、代码、链接等）
             if item.content:
-                self._process_formatted_text(paragraph, item.content)
+                self._process_formatted_text(paragraph, item.content, item.attributes.get('inline'))
             
             # 处理列表项的子元素（如嵌套列表、段落等）
             for child in item.children:
@@ -908,97 +580,39 @@ class WordGenerator:
                     self._process_list(child, indent_level + 1)
                 elif child.element_type == 'paragraph':
                     # 列表项内的段落：作为列表项的一部分处理
-                    self._process_formatted_text(paragraph, child.content)
+                    self._process_formatted_text(paragraph, child.content, child.attributes.get('inline'))
+            
+            # 检查是否需要在此列表项前后插入图表
+            if self.enable_charts and self.chart_images:
+                self._check_and_insert_chart(paragraph, item.content)
     
     def _process_quote(self, element: MarkdownElement):
         """处理引用"""
-        paragraph = self.document.add_paragraph(element.content)
-        self._apply_element_style(paragraph, self.config.quote)
+        paragraph = self._add_styled_paragraph('quote', element.content)
+        
+        # 检查是否需要在此引用前后插入图表
+        if self.enable_charts and self.chart_images:
+            self._check_and_insert_chart(paragraph, element.content)
     
-    def _apply_element_style(self, paragraph, element_style, is_heading=False):
-        """应用元素样式到段落（统一方法）
+    def _add_styled_paragraph(self, style_key: str, text: str = ''):
+        """添加引用主题样式的段落
         
-        Args:
-            paragraph: Word段落对象
-            element_style: ElementStyle 对象
-            is_heading: 是否为标题（影响首行缩进）
-        """
-        from docx.enum.text import WD_LINE_SPACING
+        直接写入样式ID，不经过 python-docx 按名称查找样式（每次都要遍历样式表）。
         
-        # 应用字体样式
-        for run in paragraph.runs:
-            font = run.font
-            font.name = element_style.font.family
-            font.size = Pt(element_style.font.size)
-            font.bold = element_style.font.bold
-            font.italic = element_style.font.italic
-            font.underline = element_style.font.underline
+        Args:
+            style_key: THEME_STYLE_IDS 中的元素名（body、heading1~6、quote、code_block）
+            text: 段落文字
             
-            if element_style.font.color:
-                color_hex = element_style.font.color.replace('#', '')
-                if len(color_hex) == 6:
-                    r = int(color_hex[0:2], 16)
-                    g = int(color_hex[2:4], 16)
-                    b = int(color_hex[4:6], 16)
-                    font.color.rgb = RGBColor(r, g, b)
-        
-        # 应用段落样式
-        pf = paragraph.paragraph_format
-        
-        # 对齐方式
-        alignment_map = {
-            'left': WD_ALIGN_PARAGRAPH.LEFT,
-            'center': WD_ALIGN_PARAGRAPH.CENTER,
-            'right': WD_ALIGN_PARAGRAPH.RIGHT,
-            'justify': WD_ALIGN_PARAGRAPH.JUSTIFY
-        }
-        paragraph.alignment = alignment_map.get(element_style.paragraph.alignment, WD_ALIGN_PARAGRAPH.LEFT)
-        
-        # 行距：>= 20 为固定值（磅），< 20 为倍数
-        if element_style.paragraph.line_spacing >= 20:
-            pf.line_spacing_rule = WD_LINE_SPACING.EXACTLY
-            pf.line_spacing = Pt(element_style.paragraph.line_spacing)
-        else:
-            pf.line_spacing = element_style.paragraph.line_spacing
-        
-        # 段前段后间距
-        pf.space_before = Pt(element_style.paragraph.space_before)
-        pf.space_after = Pt(element_style.paragraph.space_after)
-        
-        # 左右缩进（厘米转英寸）
-        pf.left_indent = Inches(element_style.paragraph.left_indent / 2.54) if element_style.paragraph.left_indent else None
-        pf.right_indent = Inches(element_style.paragraph.right_indent / 2.54) if element_style.paragraph.right_indent else None
-        
-        # 首行缩进
-        if is_heading:
-            # 标题不应用首行缩进
-            pf.first_line_indent = Inches(0)
-        elif element_style.paragraph.first_line_indent == 0:
-            # 动态计算两个字符宽度：字体大小 × 2 / 72 英寸
-            first_line_indent_inches = (element_style.font.size * 2) / 72.0
-            pf.first_line_indent = Inches(first_line_indent_inches)
-        else:
-            # 使用配置值（厘米转英寸）
-            pf.first_line_indent = Inches(element_style.paragraph.first_line_indent / 2.54)
-        
-        # 分页控制
-        pf.keep_together = element_style.paragraph.keep_together
-        pf.keep_with_next = element_style.paragraph.keep_with_next
-        pf.page_break_before = element_style.paragraph.page_break_before
+        Returns:
+            新段落
+        """
+        paragraph = self.document.add_paragraph(text)
+        paragraph._p.style = THEME_STYLE_IDS[style_key]
+        return paragraph
     
     def _apply_code_style(self, run):
         """应用代码样式（内联代码）"""
-        font = run.font
-        font.name = self.config.code_inline.font.family
-        font.size = Pt(self.config.code_inline.font.size)
-        
-        if self.config.code_inline.font.color:
-            color_hex = self.config.code_inline.font.color.replace('#', '')
-            if len(color_hex) == 6:
-                r = int(color_hex[0:2], 16)
-                g = int(color_hex[2:4], 16)
-                b = int(color_hex[4:6], 16)
-                font.color.rgb = RGBColor(r, g, b)
+        run._r.style = THEME_STYLE_IDS['code_inline']
     
     def _add_hyperlink(self, paragraph, url: str, text: str):
         """添加超链接"""
@@ -1074,311 +688,265 @@ class WordGenerator:
             markdown_text: 原始Markdown文本
         """
         if not CHARTS_AVAILABLE:
-            print("图表功能不可用：图表模块导入失败")
-            print("请检查是否安装了 openai 和 matplotlib: pip install openai matplotlib")
+            logger.warning("图表功能不可用：图表模块导入失败，请检查是否安装了 matplotlib")
             return
         
-        print(f"开始准备图表，markdown文本长度: {len(markdown_text)}")
+        logger.debug("开始准备图表，markdown文本长度: %d", len(markdown_text))
         
         try:
-            # 初始化图表识别器和生成器
-            print("初始化图表识别器...")
+            # 初始化图表识别器（生成器在缓存未命中时才创建，避免无谓的字体初始化）
             recognizer = ChartRecognizer()
-            print("初始化图表生成器...")
-            # 准备图表生成器配置
-            chart_config = {
-                'background_color': self.config.chart.background_color,
-                'chart_colors': self.config.chart.colors,
-                'font_sizes': self.config.chart.font_sizes,
-                'pie_threshold': self.config.chart.pie_threshold
-            }
-            self.chart_generator = ChartGenerator(config=chart_config)
+            if self.chart_cache is None:
+                self.chart_cache = get_chart_cache()
             
             # 解析图表数据
-            print("解析图表数据...")
             self.chart_data = recognizer.recognize(self.chart_data_source)
-            print(f"解析到 {len(self.chart_data)} 个图表")
+            logger.debug("解析到 %d 个图表", len(self.chart_data))
             
             if not self.chart_data:
-                print("未识别到图表数据")
                 return
             
-            # 生成所有图表图片
+            # 影响渲染结果的样式字段（参与缓存键计算）
+            chart_style = self._chart_style_fields()
+            
+            # 第一遍：按顺序查询渲染缓存，收集需要渲染的图表
+            jobs = []
             for i, chart in enumerate(self.chart_data):
+                position = chart.get('position', '')
+                title = chart.get('title', '图表')
+                data = chart.get('data', {})
+                chart_type = chart.get('type', 'pie')
+                
+                logger.debug(
+                    "准备图表 %d/%d: %s, 类型: %s, position: %s",
+                    i + 1, len(self.chart_data), title, chart_type, position
+                )
+                
+                job = {
+                    'position': position, 'title': title, 'data': data, 'type': chart_type,
+                    'cache_key': None, 'image_bytes': None, 'cached': False, 'error': None
+                }
                 try:
-                    position = chart.get('position', '')
-                    title = chart.get('title', '图表')
-                    data = chart.get('data', {})
-                    chart_type = chart.get('type', 'pie')
-                    
-                    print(f"生成图表 {i+1}/{len(self.chart_data)}: {title}, 类型: {chart_type}, position: {position}")
-                    print(f"数据: {data}")
+                    job['cache_key'] = self.chart_cache.make_key(
+                        chart_type, title, data,
+                        self.config.chart.width, self.config.chart.dpi, chart_style
+                    )
+                    job['image_bytes'] = self.chart_cache.get(job['cache_key'])
+                    job['cached'] = job['image_bytes'] is not None
+                except Exception as e:
+                    job['error'] = e
+                jobs.append(job)
+            
+            # 第二步：渲染未命中缓存的图表（可选并行）
+            pending = [job for job in jobs if job['image_bytes'] is None and job['error'] is None]
+            self._render_pending_charts(pending)
+            
+            # 第三步：按原始顺序登记图片，单个图表失败不影响其他图表
+            for job in jobs:
+                try:
+                    if job['error'] is not None:
+                        raise job['error']
                     
-                    # 根据图表类型生成不同的图表
-                    if chart_type == 'bar':
-                        # 生成柱状图
-                        image_path = self.chart_generator.generate_bar_chart(
-                            title=title,
-                            data=data,
-                            width_cm=self.config.chart.width,
-                            dpi=self.config.chart.dpi
-                        )
-                    elif chart_type == 'line':
-                        # 生成折线图
-                        image_path = self.chart_generator.generate_line_chart(
-                            title=title,
-                            data=data,
-                            width_cm=self.config.chart.width,
-                            dpi=self.config.chart.dpi
-                        )
+                    image_bytes = job['image_bytes']
+                    if job['cached']:
+                        # 缓存命中：直接使用已渲染的图片，不经过matplotlib
+                        logger.debug("图表缓存命中: %s (%.2f KB)", job['title'], len(image_bytes) / 1024)
                     else:
-                        # 默认生成饼图
-                        image_path = self.chart_generator.generate_pie_chart(
-                            title=title,
-                            data=data,
-                            width_cm=self.config.chart.width,
-                            dpi=self.config.chart.dpi
-                        )
+                        logger.debug("图表生成成功: %s (%.2f KB)", job['title'], len(image_bytes) / 1024)
+                        self.chart_cache.put(job['cache_key'], image_bytes)
                     
-                    print(f"图表生成成功: {image_path}")
-                    
-                    # 存储图片路径，使用position作为key
-                    self.chart_images[position] = image_path
-                    self.temp_image_files.append(image_path)
+                    # 存储图片数据，使用position作为key
+                    self.chart_images[job['position']] = io.BytesIO(image_bytes)
                     
                 except Exception as e:
-                    print(f"生成图表失败 {chart.get('title', '')}: {e}")
-                    import traceback
-                    traceback.print_exc()
+                    logger.warning("生成图表失败 %s: %s", job['title'], e, exc_info=e)
                     continue
             
-            print(f"图表准备完成，共生成 {len(self.chart_images)} 个图表")
-            if self.chart_images:
-                print(f"已生成的图表位置列表: {list(self.chart_images.keys())[:3]}...")  # 只打印前3个
+            # 为所有图表的插入位置构建索引，文档处理时每个块只扫描一遍
+            self.chart_anchor_index = ChartAnchorIndex(self.chart_images.keys())
+            
+            logger.info("图表准备完成，共生成 %d 个图表", len(self.chart_images))
                     
         except ValueError as e:
-            print(f"图表识别器初始化失败（可能是API Key未设置）: {e}")
+            logger.warning("图表识别器初始化失败: %s", e)
             self.chart_data = []
             self.chart_images = {}
-        except Exception as e:
-            print(f"准备图表失败: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("准备图表失败")
             self.chart_data = []
             self.chart_images = {}
     
-    def _split_paragraph_by_punctuation(self, text: str) -> List[str]:
-        """使用标点符号分割段落
+    def _chart_style_fields(self) -> Dict[str, Any]:
+        """影响图表渲染结果的样式字段"""
+        return {
+            'background_color': self.config.chart.background_color,
+            'colors': self.config.chart.colors,
+            'font_sizes': self.config.chart.font_sizes,
+            'pie_threshold': self.config.chart.pie_threshold,
+        }
+    
+    def _chart_generator_config(self) -> Dict[str, Any]:
+        """图表生成器配置"""
+        return {
+            'background_color': self.config.chart.background_color,
+            'chart_colors': self.config.chart.colors,
+            'font_sizes': self.config.chart.font_sizes,
+            'pie_threshold': self.config.chart.pie_threshold
+        }
+    
+    def _get_chart_generator(self):
+        """获取图表生成器（首次使用时创建）"""
+        if self.chart_generator is None:
+            self.chart_generator = ChartGenerator(config=self._chart_generator_config())
+        return self.chart_generator
+    
+    def _render_pending_charts(self, jobs: List[Dict[str, Any]]):
+        """渲染未命中缓存的图表，结果写回每个任务的 image_bytes / error
         
-        Args:
-            text: 段落文本
-            
-        Returns:
-            分割后的文本片段列表（每个片段包含标点符号）
+        配置了多个工作进程且待渲染图表不少于2个时使用进程级共享的进程池并行渲染，
+        否则在当前进程中顺序渲染。
         """
-        import re
-        # 标点符号：，。；：！？、
-        # 使用正则表达式按标点符号分割，保留分隔符
-        # 匹配标点符号（，。；：！？、）
-        pattern = r'([，。；：！？、])'
-        
-        # 分割文本，保留分隔符
-        parts = re.split(pattern, text)
-        
-        # 合并文本和标点符号
-        segments = []
-        i = 0
-        while i < len(parts):
-            if i < len(parts) - 1 and parts[i + 1] in ['，', '。', '；', '：', '！', '？', '、']:
-                # 文本 + 标点符号
-                segment = parts[i] + parts[i + 1]
-                if segment.strip():
-                    segments.append(segment.strip())
-                i += 2
-            else:
-                # 只有文本，没有后续标点
-                if parts[i].strip():
-                    segments.append(parts[i].strip())
-                i += 1
+        if self.render_workers > 1 and len(jobs) > 1:
+            pool = None
+            try:
+                with acquire_render_pool(self.render_workers) as pool:
+                    results = pool.render_all(
+                        self._chart_generator_config(),
+                        [(job['type'], job['title'], job['data']) for job in jobs],
+                        width_cm=self.config.chart.width,
+                        dpi=self.config.chart.dpi
+                    )
+                for job, (image_bytes, error) in zip(jobs, results):
+                    job['image_bytes'] = image_bytes
+                    job['error'] = error
+                return
+            except Exception as e:
+                # 进程池不可用（如工作进程异常退出）时回退到顺序渲染
+                logger.warning("并行渲染图表失败，回退到顺序渲染: %s", e)
+                reset_render_pool(pool)
         
-        # 如果没有分割出片段，返回原文本
-        return segments if segments else [text]
+        for job in jobs:
+            try:
+                job['image_bytes'] = self._render_chart(job['type'], job['title'], job['data'])
+            except Exception as e:
+                job['error'] = e
     
-    def _check_and_insert_chart(self, paragraph, paragraph_text: str):
-        """检查段落文本，如果匹配position则插入图表
+    def _render_chart(self, chart_type: str, title: str, data: Dict[str, Any]) -> bytes:
+        """调用matplotlib渲染图表，返回PNG数据"""
+        return self._get_chart_generator().generate_chart(
+            chart_type,
+            title,
+            data,
+            width_cm=self.config.chart.width,
+            dpi=self.config.chart.dpi
+        ).getvalue()
+    
+    def _check_and_insert_chart(self, block, block_text: Union[str, Iterable[str]], end_block=None):
+        """检查块的文本，如果匹配position则在该块前后插入图表
+        
+        通过预先构建的位置索引一次扫描找出所有命中的图表，
+        同一个块命中多个图表时按图表顺序依次插入。
         
         Args:
-            paragraph: Word段落对象
-            paragraph_text: 段落文本内容
+            block: Word段落或表格对象（图表插入在其前后）
+            block_text: 块的文本内容，或文本片段的迭代器（如表格的单元格，逐个扫描、按换行符连接匹配）
+            end_block: 块由多个元素组成（如拆分的表格）时的最后一个元素，after 模式插入在其后
         """
-        if not self.chart_images:
+        if not self.chart_images or self.chart_anchor_index is None:
             return
         
-        # 遍历所有图表，检查position是否匹配
-        for position, image_path in list(self.chart_images.items()):
-            # 检查是否是 after 或 before 模式
-            is_after = position.startswith('after:')
-            is_before = position.startswith('before:')
-            
-            if not (is_after or is_before):
+        if isinstance(block_text, str):
+            positions = self.chart_anchor_index.match(block_text)
+        else:
+            positions = self.chart_anchor_index.match_parts(block_text)
+        for position in positions:
+            image_stream = self.chart_images.get(position)
+            if image_stream is None:
+                # 已在前面的块中插入
                 continue
             
-            # 提取段落文本（完整段落）
-            if is_after:
-                paragraph_keyword = position.replace('after:', '').strip()
-            else:
-                paragraph_keyword = position.replace('before:', '').strip()
-            
-            # 匹配策略1：完整段落匹配（段落文本必须完全包含在paragraph_text中）
-            matched = False
-            match_mode = "full"  # "full" 或 "segment"
+            mode, paragraph_keyword = ChartAnchorIndex.parse_position(position)
+            is_after = mode == 'after'
+            logger.debug("匹配到图表插入位置 (%s模式): '%.80s'", mode, paragraph_keyword)
             
-            if paragraph_keyword in paragraph_text:
-                matched = True
-                match_mode = "full"
-                print(f"完整段落匹配成功: 段落文本长度={len(paragraph_keyword)}, 匹配位置='{paragraph_keyword[:80]}...'")
-            else:
-                # 匹配策略2：分段匹配（使用标点符号分割段落）
-                print(f"完整段落匹配失败，尝试分段匹配...")
-                segments = self._split_paragraph_by_punctuation(paragraph_text)
-                print(f"段落分割为 {len(segments)} 个片段")
+            # 插入到整个块（段落或表格）的前后
+            try:
+                # 使用底层API插入段落
+                from docx.oxml import parse_xml
+                from docx.text.paragraph import Paragraph
                 
-                # 检查关键词是否在任何一个片段中
-                for segment in segments:
-                    if paragraph_keyword in segment:
-                        matched = True
-                        match_mode = "segment"
-                        print(f"分段匹配成功: 在片段中找到关键词，片段='{segment[:80]}...'")
-                        break
+                # 创建新的段落元素
+                p_xml = '<w:p xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"/>'
+                new_p = parse_xml(p_xml)
                 
-                if not matched:
-                    print(f"分段匹配也失败，跳过此图表: position='{position[:80]}...'")
-            
-            # 如果匹配成功，插入图表
-            if matched:
-                mode = "after" if is_after else "before"
-                match_info = f"({mode}模式, {match_mode}匹配)"
-                print(f"匹配到图表插入位置 {match_info}: 段落文本长度={len(paragraph_keyword)}, 匹配位置='{paragraph_keyword[:80]}...'")
-                # 找到匹配，插入图表
-                # 注意：无论完整匹配还是分段匹配，都插入到完整段落的前后，而不是片段位置
-                try:
-                    print(f"开始插入图表: {image_path}")
-                    
-                    # 检查文件是否存在
-                    import os
-                    if not os.path.exists(image_path):
-                        print(f"警告: 图片文件不存在: {image_path}")
-                        del self.chart_images[position]
-                        continue
-                    
-                    # 获取文件大小
-                    file_size = os.path.getsize(image_path)
-                    print(f"图片文件大小: {file_size / 1024:.2f} KB")
-                    
-                    # 使用底层API插入段落
-                    from docx.oxml import parse_xml
-                    from docx.text.paragraph import Paragraph
-                    
-                    # 创建新的段落元素
-                    p_xml = '<w:p xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"/>'
-                    new_p = parse_xml(p_xml)
+                if is_after:
+                    # after模式：在当前块后插入新段落
+                    (end_block or block)._element.addnext(new_p)
+                else:
+                    # before模式：在当前块前插入新段落
+                    block._element.addprevious(new_p)
+                
+                # 从新插入的元素创建段落对象
+                image_paragraph = Paragraph(new_p, block._parent)
+                image_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                
+                run = image_paragraph.add_run()
+                # 插入Word时使用配置的宽度（默认14.0厘米）
+                insert_width = self.config.chart.insert_width
+                run.add_picture(image_stream, width=Cm(insert_width))
+                
+                # 可选：添加图表标题
+                if self.config.chart.add_title:
+                    # 创建标题段落
+                    title_p_xml = '<w:p xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"/>'
+                    title_new_p = parse_xml(title_p_xml)
                     
                     if is_after:
-                        # after模式：在当前段落后插入新段落
-                        paragraph._element.addnext(new_p)
+                        # after模式：在图片段落后插入标题
+                        new_p.addnext(title_new_p)
                     else:
-                        # before模式：在当前段落前插入新段落
-                        paragraph._element.addprevious(new_p)
-                    
-                    # 从新插入的元素创建段落对象
-                    image_paragraph = Paragraph(new_p, paragraph._parent)
-                    image_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                        # before模式：在图片段落前插入标题（标题在图片上方）
+                        new_p.addprevious(title_new_p)
                     
-                    run = image_paragraph.add_run()
-                    print(f"正在添加图片到Word文档（这可能需要几秒钟）...")
-                    import time
-                    start_time = time.time()
-                    # 插入Word时使用配置的宽度（默认14.0厘米）
-                    insert_width = self.config.chart.insert_width
-                    run.add_picture(image_path, width=Cm(insert_width))
-                    elapsed_time = time.time() - start_time
-                    print(f"成功插入图表 ({mode}模式): {image_path} (宽度: {insert_width}cm, 耗时: {elapsed_time:.2f}秒)")
+                    title_paragraph = Paragraph(title_new_p, block._parent)
+                    title_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
                     
-                    # 可选：添加图表标题
-                    if self.config.chart.add_title:
-                        # 创建标题段落
-                        title_p_xml = '<w:p xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"/>'
-                        title_new_p = parse_xml(title_p_xml)
-                        
-                        if is_after:
-                            # after模式：在图片段落后插入标题
-                            new_p.addnext(title_new_p)
-                        else:
-                            # before模式：在图片段落前插入标题（标题在图片上方）
-                            new_p.addprevious(title_new_p)
-                        
-                        title_paragraph = Paragraph(title_new_p, paragraph._parent)
-                        title_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                        
-                        # 从chart_data中找到对应的标题
-                        chart_title = None
-                        for chart in self.chart_data:
-                            if chart.get('position') == position:
-                                chart_title = chart.get('title', '')
-                                break
-                        if chart_title:
-                            title_run = title_paragraph.add_run(f"图: {chart_title}")
-                            title_run.font.size = Pt(10)
-                    
-                    # 从字典中移除，避免重复插入
-                    del self.chart_images[position]
-                    print(f"图表已插入并从待插入列表移除，剩余 {len(self.chart_images)} 个图表待插入")
-                    
-                except Exception as e:
-                    print(f"插入图表失败 {position}: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    # 插入失败时不移除，保留在列表中，稍后在文档末尾尝试插入
-                    print(f"图表插入失败，将保留在列表中，稍后在文档末尾尝试插入")
+                    # 从chart_data中找到对应的标题
+                    chart_title = None
+                    for chart in self.chart_data:
+                        if chart.get('position') == position:
+                            chart_title = chart.get('title', '')
+                            break
+                    if chart_title:
+                        title_run = title_paragraph.add_run(f"图: {chart_title}")
+                        title_run.font.size = Pt(10)
+                
+                # 从字典中移除，避免重复插入
+                del self.chart_images[position]
+                logger.debug("图表已插入 (%s模式): %.80s，剩余 %d 个图表待插入", mode, position, len(self.chart_images))
+                
+            except Exception:
+                # 插入失败时不移除，保留在列表中，稍后在文档末尾尝试插入
+                logger.warning("插入图表失败 %s，稍后在文档末尾尝试插入", position, exc_info=True)
     
     def _insert_remaining_charts(self):
         """将未插入的图表插入到文档末尾"""
         if not self.chart_images:
-            print("没有未插入的图表")
             return
         
-        print(f"检测到 {len(self.chart_images)} 个图表未找到匹配段落，将插入到文档末尾")
-        print(f"未插入的图表列表: {list(self.chart_images.keys())}")
+        logger.info("%d 个图表未找到匹配段落，将插入到文档末尾: %s", len(self.chart_images), list(self.chart_images.keys()))
         
         # 遍历所有未插入的图表
-        for position, image_path in list(self.chart_images.items()):
+        for position, image_stream in list(self.chart_images.items()):
             try:
-                print(f"开始插入未匹配的图表到文档末尾: position={position[:100]}..., image_path={image_path}")
-                
-                # 检查文件是否存在
-                import os
-                if not os.path.exists(image_path):
-                    print(f"错误: 图片文件不存在: {image_path}")
-                    del self.chart_images[position]
-                    continue
-                
-                # 获取文件大小
-                file_size = os.path.getsize(image_path)
-                print(f"图片文件大小: {file_size / 1024:.2f} KB")
-                
                 # 在文档末尾插入新段落，添加图片
                 image_paragraph = self.document.add_paragraph()
                 image_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
                 
                 run = image_paragraph.add_run()
-                print(f"正在添加图片到Word文档末尾（这可能需要几秒钟）...")
-                import time
-                start_time = time.time()
                 # 插入Word时使用配置的宽度（默认14.0厘米）
                 insert_width = self.config.chart.insert_width
-                run.add_picture(image_path, width=Cm(insert_width))
-                elapsed_time = time.time() - start_time
-                print(f"成功插入图表到文档末尾: {image_path} (宽度: {insert_width}cm, 耗时: {elapsed_time:.2f}秒)")
+                run.add_picture(image_stream, width=Cm(insert_width))
                 
                 # 可选：添加图表标题
                 if self.config.chart.add_title:
@@ -1396,25 +964,9 @@ class WordGenerator:
                 
                 # 从字典中移除
                 del self.chart_images[position]
-                print(f"图表已插入到文档末尾并从待插入列表移除，剩余 {len(self.chart_images)} 个图表待插入")
                 
-            except Exception as e:
-                print(f"插入图表到文档末尾失败 {position}: {e}")
-                import traceback
-                traceback.print_exc()
+            except Exception:
+                logger.warning("插入图表到文档末尾失败 %s", position, exc_info=True)
                 # 即使失败也移除，避免重复尝试
                 if position in self.chart_images:
                     del self.chart_images[position]
-    
-    def _cleanup_chart_images(self):
-        """清理临时图片文件"""
-        if not self.chart_generator:
-            return
-        
-        for image_path in self.temp_image_files:
-            try:
-                self.chart_generator.cleanup(image_path)
-            except Exception as e:
-                print(f"清理图片文件失败 {image_path}: {e}")
-        
-        self.temp_image_files = []
\ No newline at end of file
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图表插入位置索引模块
+使用 Aho–Corasick 自动机一次性索引所有图表的 position 关键词，
+每个段落只需线性扫描一遍即可找出需要插入的全部图表
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class ChartAnchorIndex:
+    """图表插入位置索引
+
+    position 格式为 "after:关键词" 或 "before:关键词"，段落文本包含关键词即视为命中。
+    关键词为空或格式不正确的 position 不参与匹配（最终插入到文档末尾）。
+    """
+
+    def __init__(self, positions: Iterable[str]):
+        """构建索引
+
+        Args:
+            positions: 图表 position 列表（顺序即同一段落命中多个图表时的插入顺序）
+        """
+        # 自动机：状态转移、失败指针、每个状态可输出的关键词编号
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        # 关键词编号 -> 使用该关键词的 position 列表（按原始顺序）
+        self._keyword_positions: List[List[Tuple[int, str]]] = []
+        keyword_ids: Dict[str, int] = {}
+
+        for order, position in enumerate(positions):
+            _, keyword = self.parse_position(position)
+            if not keyword:
+                continue
+            keyword_id = keyword_ids.get(keyword)
+            if keyword_id is None:
+                keyword_id = len(self._keyword_positions)
+                keyword_ids[keyword] = keyword_id
+                self._keyword_positions.append([])
+                self._add_keyword(keyword, keyword_id)
+            self._keyword_positions[keyword_id].append((order, position))
+
+        self._build_fail_links()
+
+    @staticmethod
+    def parse_position(position: str) -> Tuple[Optional[str], str]:
+        """解析 position
+
+        Returns:
+            (模式, 关键词)，模式为 "after"/"before"，格式不正确时为 (None, "")
+        """
+        if position.startswith('after:'):
+            return 'after', position[len('after:'):].strip()
+        if position.startswith('before:'):
+            return 'before', position[len('before:'):].strip()
+        return None, ''
+
+    def __len__(self) -> int:
+        return len(self._keyword_positions)
+
+    def match(self, text: str) -> List[str]:
+        """查找文本命中的所有 position
+
+        Args:
+            text: 段落文本
+
+        Returns:
+            命中的 position 列表（按构建索引时的顺序）
+        """
+        if not text or not self._keyword_positions:
+            return []
+        found = set()
+        self._scan(text, 0, found)
+        return self._positions(found)
+
+    def match_parts(self, parts: Iterable[str], separator: str = '\n') -> List[str]:
+        """查找按 separator 连接的多段文本命中的所有 position
+
+        结果与 match(separator.join(parts)) 相同，但逐段扫描，不拼接整个字符串
+        （用于表格等文本量随行数增长的块）。
+
+        Args:
+            parts: 文本片段（如表格的单元格）
+            separator: 片段之间的分隔符
+
+        Returns:
+            命中的 position 列表（按构建索引时的顺序）
+        """
+        if not self._keyword_positions:
+            return []
+        found = set()
+        state = None
+        for part in parts:
+            if state is not None:
+                state = self._scan(separator, state, found)
+            state = self._scan(part, state or 0, found)
+        return self._positions(found)
+
+    def _scan(self, text: str, state: int, found: set) -> int:
+        """从 state 开始扫描文本，命中的关键词编号加入 found，返回扫描结束时的状态"""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return state
+
+    def _positions(self, found: set) -> List[str]:
+        """命中的关键词编号对应的 position（按构建索引时的顺序）"""
+        if not found:
+            return []
+
+        matched = []
+        for keyword_id in found:
+            matched.extend(self._keyword_positions[keyword_id])
+        matched.sort()
+        return [position for _, position in matched]
+
+    def _add_keyword(self, keyword: str, keyword_id: int):
+        """将关键词加入字典树"""
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].append(keyword_id)
+
+    def _build_fail_links(self):
+        """按层次遍历构建失败指针，并合并后缀状态的输出"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                if self._output[self._fail[next_state]]:
+                    self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
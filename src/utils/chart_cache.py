@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图表渲染缓存模块
+按图表规格的内容摘要缓存渲染好的PNG图片，相同的图表不再重复调用matplotlib
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger('smart_doc.chart_cache')
+
+
+# 渲染逻辑变化时递增，使旧的缓存条目自动失效
+RENDER_VERSION = 2
+
+
+class ChartRenderCache:
+    """图表渲染缓存（内存 + 可选磁盘，线程安全）
+
+    - 内存层：LRU，按图片总字节数限制容量
+    - 磁盘层：可选，按文件总大小限制容量，超出时优先删除最久未访问的文件
+    """
+
+    def __init__(self, max_memory_bytes: int = 64 * 1024 * 1024,
+                 cache_dir: Optional[str] = None,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        """初始化缓存
+
+        Args:
+            max_memory_bytes: 内存缓存容量（字节），0 表示不使用内存缓存
+            cache_dir: 磁盘缓存目录，不提供则不使用磁盘缓存
+            max_disk_bytes: 磁盘缓存容量（字节）
+        """
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(chart_type: str, title: str, data: Any, width_cm: float, dpi: int,
+                 style: Dict[str, Any]) -> str:
+        """根据图表规格计算缓存键
+
+        Args:
+            chart_type: 图表类型（pie/bar/line）
+            title: 图表标题
+            data: 图表数据
+            width_cm: 生成宽度（厘米）
+            dpi: 分辨率
+            style: 影响渲染结果的样式字段（背景色、配色、字号、饼图阈值等）
+
+        Returns:
+            内容摘要（十六进制字符串）
+        """
+        spec = {
+            'version': RENDER_VERSION,
+            'type': chart_type,
+            'title': title,
+            'data': data,
+            'width_cm': float(width_cm),
+            'dpi': int(dpi),
+            'style': style,
+        }
+        # 数据字典的键顺序决定标签顺序，不能排序，只规范化分隔符
+        normalized = json.dumps(spec, ensure_ascii=False, separators=(',', ':'), default=str)
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """读取缓存的PNG数据，未命中返回 None"""
+        with self._lock:
+            image_bytes = self._memory.get(key)
+            if image_bytes is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return image_bytes
+
+        image_bytes = self._read_disk(key)
+        with self._lock:
+            if image_bytes is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._put_memory(key, image_bytes)
+        return image_bytes
+
+    def put(self, key: str, image_bytes: bytes):
+        """写入缓存"""
+        if not image_bytes:
+            return
+        with self._lock:
+            self._put_memory(key, image_bytes)
+        self._write_disk(key, image_bytes)
+
+    def clear(self):
+        """清空内存缓存（磁盘缓存保留）"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def _put_memory(self, key: str, image_bytes: bytes):
+        """写入内存层并按容量淘汰（调用方需持有锁）"""
+        if len(image_bytes) > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = image_bytes
+        self._memory_bytes += len(image_bytes)
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.png"
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        """读取磁盘层"""
+        if self.cache_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                image_bytes = f.read()
+            # 更新访问时间，供淘汰时参考
+            os.utime(path)
+            return image_bytes
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, image_bytes: bytes):
+        """写入磁盘层并按容量淘汰"""
+        if self.cache_dir is None:
+            return
+        path = self._disk_path(key)
+        temp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(image_bytes)
+            # 原子替换，避免并发读到写了一半的文件
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning("写入图表缓存失败 %s: %s", path, e)
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        """磁盘缓存超出容量时删除最久未访问的文件"""
+        try:
+            entries = []
+            total = 0
+            for path in self.cache_dir.glob('*.png'):
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        except OSError:
+            return
+
+        if total <= self.max_disk_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                continue
+
+
+_default_cache: Optional[ChartRenderCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_chart_cache() -> ChartRenderCache:
+    """获取进程级共享的图表渲染缓存
+
+    可通过环境变量调整：
+    - CHART_CACHE_MEMORY_MB：内存缓存容量（MB），默认 64
+    - CHART_CACHE_DIR：磁盘缓存目录，未设置时不使用磁盘缓存
+    - CHART_CACHE_DISK_MB：磁盘缓存容量（MB），默认 256
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ChartRenderCache(
+                    max_memory_bytes=int(os.environ.get('CHART_CACHE_MEMORY_MB', 64)) * 1024 * 1024,
+                    cache_dir=os.environ.get('CHART_CACHE_DIR') or None,
+                    max_disk_bytes=int(os.environ.get('CHART_CACHE_DISK_MB', 256)) * 1024 * 1024,
+                )
+    return _default_cache
@@ -5,16 +5,27 @@
 基于matplotlib生成饼图
 """
 
+import io
+import json
+import logging
 import os
-import tempfile
-from typing import Dict, List, Optional, Union
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+from urllib.request import urlretrieve
 import numpy as np
 import matplotlib
 # 在 Docker 环境中使用无界面后端
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import matplotlib.font_manager as fm
+from matplotlib.font_manager import FontProperties
 from PIL import Image
 
+logger = logging.getLogger('smart_doc.chart_generator')
+
 
 class ChartGenerator:
     """图表生成器"""
@@ -36,15 +47,15 @@ class ChartGenerator:
         '#FF006E'   # 粉红色
     ]
     
-    def __init__(self, output_dir: Optional[str] = None, config: Optional[Dict] = None):
+    def __init__(self, config: Optional[Dict] = None):
         """初始化生成器
         
         Args:
-            output_dir: 图片输出目录，如果不提供则使用临时目录
             config: 图表配置字典，包含 background_color, chart_colors, font_sizes 等
         """
-        self.output_dir = output_dir or tempfile.gettempdir()
         self._font_file_path = None  # 保存字体文件路径
+        self._font_families = ()  # 未使用字体文件时的字体回退列表
+        self._font_prop = None  # 复用的字体属性（不指定字号）
         self.config = config or {}
         
         # 从配置中读取参数
@@ -62,204 +73,82 @@ class ChartGenerator:
         self._setup_fonts()
     
     def _setup_fonts(self):
-        """设置中文字体，支持 Docker 环境，优先使用项目中的字体文件"""
-        import matplotlib.font_manager as fm
-        from urllib.request import urlretrieve
-        from pathlib import Path
-        
-        # 获取系统中所有可用字体
-        available_fonts = [f.name for f in fm.fontManager.ttflist]
-        
-        # 中文字体优先级列表（按可用性排序，排除不支持中文的字体）
-        chinese_fonts = [
-            'WenQuanYi Micro Hei',      # 文泉驿微米黑（Linux常用）
-            'WenQuanYi Zen Hei',        # 文泉驿正黑
-            'Noto Sans CJK SC',         # Noto Sans 中文字体
-            'Noto Sans SC',             # Noto Sans 简体中文
-            'Source Han Sans SC',       # 思源黑体
-            'SimHei',                   # 黑体（Windows）
-            'Microsoft YaHei',          # 微软雅黑（Windows）
-            'SimSun',                   # 宋体（Windows）
-            'STHeiti',                  # 华文黑体（macOS）
-            'STSong',                   # 华文宋体（macOS）
-            'Arial Unicode MS',         # Arial Unicode（跨平台）
-        ]
-        
-        # 不支持中文的字体（需要排除）
-        non_chinese_fonts = ['DejaVu Sans', 'Arial', 'Helvetica', 'Times New Roman']
-        
-        selected_font = None
-        
-        # 第一步：优先使用项目中的字体文件（最重要！）
-        print("步骤1: 检查项目中的字体文件...")
-        current_file = Path(__file__).resolve()
-        # 从 src/utils/chart_generator.py 向上找到项目根目录
-        project_root = current_file.parent.parent.parent
-        # 字体文件路径（支持多种格式和文件名）
-        fonts_dir = project_root / 'src' / 'assets' / 'fonts'
-        font_file = None
-        # 尝试多种可能的字体文件名和格式
-        possible_font_names = [
-            'noto-sans-sc-regular.otf',  # OTF 格式
-            'NotoSansSC-Regular.otf',
-            'NotoSansSC-Regular.ttf',    # TTF 格式
-            'noto-sans-sc-regular.ttf',
-        ]
-        for font_name in possible_font_names:
-            candidate = fonts_dir / font_name
-            if candidate.exists():
-                font_file = candidate
-                print(f"找到字体文件: {font_file}")
-                break
+        """设置中文字体
         
-        # 如果项目中有字体文件，直接使用
-        if font_file and font_file.exists():
-            print(f"找到项目中的字体文件: {font_file}")
-            try:
-                # 添加字体文件到 matplotlib
-                fm.fontManager.addfont(str(font_file))
-                # 重新构建字体缓存（使用安全的方法）
-                try:
-                    # 尝试清除缓存并重新加载
-                    import matplotlib
-                    matplotlib.font_manager._rebuild()
-                except AttributeError:
-                    # 如果 _rebuild 不存在，尝试其他方法
-                    try:
-                        fm.fontManager.__init__()
-                    except:
-                        pass
-                
-                # 获取字体文件的实际字体名称
-                try:
-                    from matplotlib.font_manager import FontProperties
-                    font_prop = FontProperties(fname=str(font_file))
-                    actual_font_name = font_prop.get_name()
-                    print(f"字体文件实际名称: {actual_font_name}")
-                    selected_font = actual_font_name
-                except:
-                    # 如果获取失败，尝试常见的名称
-                    possible_names = ['Noto Sans SC', 'NotoSansSC-Regular', 'Noto Sans CJK SC']
-                    for name in possible_names:
-                        # 检查字体是否在系统中
-                        if name in [f.name for f in fm.fontManager.ttflist]:
-                            selected_font = name
-                            break
-                    if not selected_font:
-                        selected_font = 'Noto Sans SC'
-                
-                # 保存字体文件路径，用于后续直接使用
-                self._font_file_path = str(font_file)
-                print(f"✅ 成功使用项目中的字体: {selected_font} (文件: {font_file.name})")
-            except Exception as e:
-                print(f"❌ 注册项目字体失败: {e}")
-                import traceback
-                traceback.print_exc()
-                selected_font = None
-                self._font_file_path = None
-        else:
-            print(f"❌ 项目字体文件不存在: {font_file}")
+        字体解析每个进程只执行一次（结果同时持久化到缓存文件），
+        这里只取用解析结果并准备可复用的 FontProperties。
+        """
+        resolution = resolve_chart_font()
+        self._font_file_path = resolution.get('font_file')
+        self._font_families = tuple(resolution.get('font_list') or ())
+        self._font_prop = self._get_font(None)
+    
+    def _get_font(self, size: Optional[float]) -> FontProperties:
+        """获取（可复用的）字体属性
         
-        # 第二步：如果项目字体加载失败，再检查系统字体
-        if selected_font is None:
-            print("步骤2: 检查系统中的中文字体...")
-            # 查找第一个可用的中文字体（排除不支持中文的字体）
-            for font_name in chinese_fonts:
-                if font_name in available_fonts and font_name not in non_chinese_fonts:
-                    selected_font = font_name
-                    print(f"✅ 找到系统可用中文字体: {font_name}")
-                    break
+        有字体文件时直接按文件加载，否则按字体回退列表查找。字体随每个
+        图形元素传入，不依赖全局 rcParams。
+        """
+        return _font_properties(self._font_file_path, self._font_families, size)
+    
+    def _new_figure(self, figsize: tuple, dpi: int):
+        """创建独立的图形和坐标轴
+        
+        直接使用 Figure + Agg 画布，不经过 pyplot 的全局图形管理器，
+        多个线程可以同时绘制各自的图形；图形不再被引用后即可回收。
+        
+        Args:
+            figsize: 图形尺寸（英寸）
+            dpi: 分辨率
             
-            # 如果项目中没有字体文件或注册失败，尝试下载
-            if selected_font is None:
-                try:
-                    # 创建字体缓存目录
-                    font_cache_dir = Path.home() / '.matplotlib' / 'fonts'
-                    font_cache_dir.mkdir(parents=True, exist_ok=True)
-                    
-                    # 尝试下载 Noto Sans SC 字体（Google 提供的免费中文字体）
-                    downloaded_font_file = font_cache_dir / 'NotoSansSC-Regular.ttf'
-                    if not downloaded_font_file.exists():
-                        print("正在从网络下载 Noto Sans SC 字体...")
-                        try:
-                            # 使用 Google Fonts 的 CDN 下载字体
-                            font_url = 'https://github.com/google/fonts/raw/main/ofl/notosanssc/NotoSansSC%5Bwdth%2Cwght%5D.ttf'
-                            urlretrieve(font_url, downloaded_font_file)
-                            print(f"字体下载成功: {downloaded_font_file}")
-                        except Exception as e:
-                            print(f"字体下载失败: {e}，尝试备用方案...")
-                            # 备用：使用 GitHub 的字体文件
-                            try:
-                                font_url = 'https://raw.githubusercontent.com/googlefonts/noto-cjk/main/Sans/Variable/TTF/Subset/NotoSansCJKsc-VF.ttf'
-                                urlretrieve(font_url, downloaded_font_file)
-                                print(f"使用备用字体源下载成功: {downloaded_font_file}")
-                            except Exception as e2:
-                                print(f"备用字体下载也失败: {e2}")
-                                downloaded_font_file = None
-                    else:
-                        print(f"使用已缓存的字体文件: {downloaded_font_file}")
-                    
-                    # 如果字体文件存在，注册并使用它
-                    if downloaded_font_file and downloaded_font_file.exists():
-                        try:
-                            # 添加字体文件到 matplotlib
-                            fm.fontManager.addfont(str(downloaded_font_file))
-                            # 重新构建字体缓存（使用安全的方法）
-                            try:
-                                # 尝试清除缓存并重新加载
-                                import matplotlib
-                                matplotlib.font_manager._rebuild()
-                            except AttributeError:
-                                # 如果 _rebuild 不存在，尝试其他方法
-                                try:
-                                    fm.fontManager.__init__()
-                                except:
-                                    pass
-                            # 使用下载的字体
-                            selected_font = 'Noto Sans SC'
-                            print(f"成功使用下载的字体: {selected_font}")
-                        except Exception as e:
-                            print(f"注册下载字体失败: {e}")
-                            selected_font = None
-                except Exception as e:
-                    print(f"字体下载过程出错: {e}")
-                    selected_font = None
-        
-        # 如果仍然没有找到中文字体，使用备用方案
-        if selected_font is None:
-            print("警告: 无法获取中文字体，使用备用字体（中文可能显示为方块）")
-            # 尝试查找任何包含中文的字体
-            try:
-                noto_fonts = [f for f in available_fonts if 'noto' in f.lower() or 'cjk' in f.lower()]
-                if noto_fonts:
-                    selected_font = noto_fonts[0]
-                    print(f"使用 Noto 字体: {selected_font}")
-                else:
-                    selected_font = 'DejaVu Sans'
-                    print(f"使用备用字体 {selected_font}，中文将显示为方块")
-            except Exception as e:
-                print(f"字体检测失败: {e}")
-                selected_font = 'DejaVu Sans'
+        Returns:
+            (fig, ax)
+        """
+        fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        return fig, ax
+    
+    def _save_figure(self, fig: Figure, ax, dpi: int) -> io.BytesIO:
+        """将图形编码为PNG（全程在内存中完成）
         
-        # 设置字体（确保不使用不支持中文的字体作为主字体）
-        if selected_font and selected_font not in non_chinese_fonts:
-            font_list = [selected_font] + [f for f in chinese_fonts if f != selected_font] + ['sans-serif']
-        else:
-            # 如果主字体不支持中文，至少尝试使用项目字体
-            font_list = ['Noto Sans SC'] + chinese_fonts + ['sans-serif']
-            print(f"警告: 主字体可能不支持中文，使用字体列表: {font_list[:3]}...")
+        Args:
+            fig: 图形
+            ax: 坐标轴
+            dpi: 分辨率
+            
+        Returns:
+            PNG图片数据（位于起始位置的 BytesIO）
+        """
+        # 设置图表背景色
+        fig.patch.set_facecolor(self.background_color)
+        ax.set_facecolor(self.background_color)
         
-        plt.rcParams['font.sans-serif'] = font_list
-        plt.rcParams['axes.unicode_minus'] = False
+        buffer = io.BytesIO()
+        fig.savefig(
+            buffer,
+            format='png',
+            dpi=dpi,
+            bbox_inches='tight',
+            facecolor=self.background_color,
+            transparent=False
+        )
         
-        # 清除字体缓存，确保使用最新字体
-        try:
-            # 尝试重新构建字体缓存
-            import matplotlib
-            matplotlib.font_manager._rebuild()
-        except (AttributeError, Exception):
-            # 如果重建失败，忽略错误（字体设置仍然有效）
-            pass
+        # 优化图片大小（压缩PNG）
+        original_size = buffer.tell()
+        if original_size > 500 * 1024:  # 如果大于500KB
+            try:
+                buffer.seek(0)
+                with Image.open(buffer) as img:
+                    compressed = io.BytesIO()
+                    img.save(compressed, 'PNG', optimize=True, compress_level=6)
+                logger.debug("图片较大，压缩完成: %.2f KB -> %.2f KB", original_size / 1024, compressed.tell() / 1024)
+                buffer = compressed
+            except Exception as e:
+                logger.warning("图片压缩失败（继续使用原图）: %s", e)
+        
+        buffer.seek(0)
+        return buffer
     
     def generate_pie_chart(
         self, 
@@ -268,7 +157,7 @@ class ChartGenerator:
         colors: Optional[List[str]] = None,
         width_cm: float = 14.0,
         dpi: int = 300
-    ) -> str:
+    ) -> io.BytesIO:
         """生成饼图
         
         Args:
@@ -279,7 +168,7 @@ class ChartGenerator:
             dpi: 图片分辨率
             
         Returns:
-            生成的图片文件路径
+            PNG图片数据（位于起始位置的 BytesIO）
         """
         if not data or len(data) == 0:
             raise ValueError("数据不能为空")
@@ -305,7 +194,7 @@ class ChartGenerator:
         
         # 创建图形，高度根据数据项数量自适应（正常大小）
         height_cm = max(8.0, min(12.0, 6.0 + len(sizes) * 0.5))
-        fig, ax = plt.subplots(figsize=(width_cm/2.54, height_cm/2.54), dpi=dpi)
+        fig, ax = self._new_figure((width_cm/2.54, height_cm/2.54), dpi)
         
         # 计算百分比
         total = sum(sizes)
@@ -390,24 +279,15 @@ class ChartGenerator:
                     ax.add_patch(con)
                 
                 # 添加百分比文本
-                from matplotlib.font_manager import FontProperties
                 # 根据是否为外部标注决定文字颜色
                 text_color = 'white' if not use_connection else 'black'
                 
-                if self._font_file_path:
-                    font_prop = FontProperties(fname=self._font_file_path)
-                    text = ax.text(
-                        x, y, f'{pct:.0f}%',
-                        ha=ha, va=va,
-                        fontsize=self.font_sizes.get('value', 10), weight='bold', color=text_color,
-                        fontproperties=font_prop
-                    )
-                else:
-                    text = ax.text(
-                        x, y, f'{pct:.0f}%',
-                        ha=ha, va=va,
-                        fontsize=self.font_sizes.get('value', 10), weight='bold', color=text_color
-                    )
+                text = ax.text(
+                    x, y, f'{pct:.0f}%',
+                    ha=ha, va=va,
+                    fontsize=self.font_sizes.get('value', 10), weight='bold', color=text_color,
+                    fontproperties=self._font_prop
+                )
                 
                 # 只为内部标注添加黑色背景，外部标注不添加背景
                 if not use_connection:
@@ -420,34 +300,18 @@ class ChartGenerator:
                     ))
                 # 外部标注（<8%）：黑字无背景
         
-        # 添加图例在右侧（使用字体文件路径确保中文显示）
-        from matplotlib.font_manager import FontProperties
-        if self._font_file_path:
-            font_prop = FontProperties(fname=self._font_file_path)
-            ax.legend(
-                wedges, 
-                labels, 
-                loc="center left", 
-                bbox_to_anchor=(1, 0, 0.5, 1), 
-                fontsize=self.font_sizes.get('legend', 10),
-                prop=font_prop,
-                facecolor=self.background_color,
-                framealpha=1.0
-            )
-            # 设置标题（使用字体文件路径）
-            plt.title(title, fontsize=self.font_sizes.get('title', 14), fontweight='bold', pad=20, fontproperties=font_prop)
-        else:
-            ax.legend(
-                wedges, 
-                labels, 
-                loc="center left", 
-                bbox_to_anchor=(1, 0, 0.5, 1), 
-                fontsize=self.font_sizes.get('legend', 10),
-                facecolor=self.background_color,
-                framealpha=1.0
-            )
-            # 设置标题
-            plt.title(title, fontsize=self.font_sizes.get('title', 14), fontweight='bold', pad=20)
+        # 添加图例在右侧（prop 会覆盖 fontsize，因此使用带字号的字体属性）
+        ax.legend(
+            wedges, 
+            labels, 
+            loc="center left", 
+            bbox_to_anchor=(1, 0, 0.5, 1), 
+            prop=self._get_font(self.font_sizes.get('legend', 10)),
+            facecolor=self.background_color,
+            framealpha=1.0
+        )
+        # 设置标题
+        ax.set_title(title, fontsize=self.font_sizes.get('title', 14), fontweight='bold', pad=20, fontproperties=self._font_prop)
         
         # 确保饼图是圆的
         ax.set_aspect('equal')
@@ -457,45 +321,9 @@ class ChartGenerator:
         ax.set_facecolor(self.background_color)
         
         # 调整布局，为图例留出空间
-        plt.tight_layout()
-        
-        # 生成临时文件路径
-        import uuid
-        filename = f"chart_{uuid.uuid4().hex[:8]}.png"
-        filepath = os.path.join(self.output_dir, filename)
-        
-        # 保存图片
-        print(f"正在保存图片到: {filepath}, DPI: {dpi}")
-        plt.savefig(
-            filepath,
-            dpi=dpi,
-            bbox_inches='tight',
-            facecolor=self.background_color,
-            transparent=False
-        )
+        fig.tight_layout()
         
-        # 关闭图形以释放内存
-        plt.close(fig)
-        
-        # 优化图片文件大小（压缩PNG）
-        try:
-            img = Image.open(filepath)
-            # 如果图片太大，进行压缩
-            original_size = os.path.getsize(filepath)
-            if original_size > 500 * 1024:  # 如果大于500KB
-                print(f"图片文件较大 ({original_size / 1024:.2f} KB)，进行压缩...")
-                # 使用PIL重新保存以压缩
-                img.save(filepath, 'PNG', optimize=True, compress_level=6)
-                new_size = os.path.getsize(filepath)
-                print(f"压缩完成: {original_size / 1024:.2f} KB -> {new_size / 1024:.2f} KB")
-            else:
-                print(f"图片文件大小: {original_size / 1024:.2f} KB")
-            img.close()
-        except Exception as e:
-            print(f"图片压缩失败（继续使用原图）: {e}")
-        
-        print(f"图片保存完成: {filepath}")
-        return filepath
+        return self._save_figure(fig, ax, dpi)
     
     def generate_bar_chart(
         self, 
@@ -504,7 +332,7 @@ class ChartGenerator:
         colors: Optional[List[str]] = None,
         width_cm: float = 14.0,
         dpi: int = 300
-    ) -> str:
+    ) -> io.BytesIO:
         """生成柱状图（支持单一数据系列和分组数据系列）
         
         Args:
@@ -517,7 +345,7 @@ class ChartGenerator:
             dpi: 图片分辨率
             
         Returns:
-            生成的图片文件路径
+            PNG图片数据（位于起始位置的 BytesIO）
         """
         if not data or len(data) == 0:
             raise ValueError("数据不能为空")
@@ -540,7 +368,7 @@ class ChartGenerator:
         colors: Optional[List[str]],
         width_cm: float,
         dpi: int
-    ) -> str:
+    ) -> io.BytesIO:
         """生成单一数据系列的柱状图"""
         # 准备数据
         labels = list(data.keys())
@@ -551,7 +379,7 @@ class ChartGenerator:
         
         # 创建图形
         height_cm = 10.0
-        fig, ax = plt.subplots(figsize=(width_cm/2.54, height_cm/2.54), dpi=dpi)
+        fig, ax = self._new_figure((width_cm/2.54, height_cm/2.54), dpi)
         
         # 绘制柱状图
         bars = ax.bar(
@@ -561,25 +389,14 @@ class ChartGenerator:
         )
         
         # 设置字体（使用与饼图相同的字体设置）
-        from matplotlib.font_manager import FontProperties
-        font_prop = None
-        if self._font_file_path:
-            font_prop = FontProperties(fname=self._font_file_path)
-            # 设置标题和y轴标签
-            plt.title(title, fontsize=self.font_sizes.get('title', 14), fontweight='bold', fontproperties=font_prop)
-            ax.set_ylabel('数值', fontproperties=font_prop, fontsize=self.font_sizes.get('y_axis', 12))
-            
-            # 设置x轴标签
-            ax.set_xticks(range(len(labels)))
-            ax.set_xticklabels(labels, rotation=30, ha='right', fontproperties=font_prop, fontsize=self.font_sizes.get('label', 10))
-        else:
-            # 设置标题和y轴标签
-            plt.title(title, fontsize=self.font_sizes.get('title', 14), fontweight='bold')
-            ax.set_ylabel('数值', fontsize=self.font_sizes.get('y_axis', 12))
-            
-            # 设置x轴标签
-            ax.set_xticks(range(len(labels)))
-            ax.set_xticklabels(labels, rotation=30, ha='right', fontsize=self.font_sizes.get('label', 10))
+        font_prop = self._font_prop
+        # 设置标题和y轴标签
+        ax.set_title(title, fontsize=self.font_sizes.get('title', 14), fontweight='bold', fontproperties=font_prop)
+        ax.set_ylabel('数值', fontproperties=font_prop, fontsize=self.font_sizes.get('y_axis', 12))
+        
+        # 设置x轴标签
+        ax.set_xticks(range(len(labels)))
+        ax.set_xticklabels(labels, rotation=30, ha='right', fontproperties=font_prop, fontsize=self.font_sizes.get('label', 10))
         
         # 设置y轴范围
         max_value = max(values) if values else 1
@@ -588,43 +405,23 @@ class ChartGenerator:
         # 在柱状图上显示数值
         for bar, value in zip(bars, values):
             height = bar.get_height()
-            if font_prop:
-                ax.text(
-                    bar.get_x() + bar.get_width() / 2., 
-                    height,
-                    f'{value:.0f}',
-                    ha='center', 
-                    va='bottom',
-                    fontsize=self.font_sizes.get('value', 10),
-                    fontproperties=font_prop
-                )
-            else:
-                ax.text(
-                    bar.get_x() + bar.get_width() / 2., 
-                    height,
-                    f'{value:.0f}',
-                    ha='center', 
-                    va='bottom',
-                    fontsize=self.font_sizes.get('value', 10)
-                )
+            ax.text(
+                bar.get_x() + bar.get_width() / 2., 
+                height,
+                f'{value:.0f}',
+                ha='center', 
+                va='bottom',
+                fontsize=self.font_sizes.get('value', 10),
+                fontproperties=font_prop
+            )
         
         # 设置网格
         ax.grid(axis='y', alpha=0.3)
         
         # 调整布局
-        plt.tight_layout()
-        
-        # 保存图片
-        import uuid
-        filename = f"chart_{uuid.uuid4().hex[:8]}.png"
-        filepath = os.path.join(self.output_dir, filename)
-        # 设置图表背景色
-        fig.patch.set_facecolor(self.background_color)
-        ax.set_facecolor(self.background_color)
-        plt.savefig(filepath, dpi=dpi, bbox_inches='tight', facecolor=self.background_color)
-        plt.close(fig)
+        fig.tight_layout()
         
-        return filepath
+        return self._save_figure(fig, ax, dpi)
     
     def _generate_grouped_bar_chart(
         self,
@@ -633,16 +430,10 @@ class ChartGenerator:
         colors: Optional[List[str]],
         width_cm: float,
         dpi: int
-    ) -> str:
+    ) -> io.BytesIO:
         """生成分组柱状图（多个数据系列）"""
-        from matplotlib.font_manager import FontProperties
-        import uuid
-        
-        # 创建带字号的字体属性
-        def get_font(size: float) -> Optional[FontProperties]:
-            if self._font_file_path:
-                return FontProperties(fname=self._font_file_path, size=size)
-            return None
+        # 带字号的字体属性（按字号复用）
+        get_font = self._get_font
         
         # 准备数据
         series_names = list(data.keys())
@@ -668,7 +459,7 @@ class ChartGenerator:
         num_series, num_labels = len(series_names), len(labels)
         adjusted_width_cm = max(width_cm, width_cm * (1 + num_labels * 0.1))
         height_cm = max(10.0, 8.0 + num_series * 0.3)
-        fig, ax = plt.subplots(figsize=(adjusted_width_cm/2.54, height_cm/2.54), dpi=dpi)
+        fig, ax = self._new_figure((adjusted_width_cm/2.54, height_cm/2.54), dpi)
         
         # 柱状图位置计算
         x = np.arange(num_labels)
@@ -719,15 +510,7 @@ class ChartGenerator:
         ax.set_ylim(0, max_value * 1.2)
         ax.grid(axis='y', alpha=0.3)
         
-        # 保存图片
-        filepath = os.path.join(self.output_dir, f"chart_{uuid.uuid4().hex[:8]}.png")
-        # 设置图表背景色
-        fig.patch.set_facecolor(self.background_color)
-        ax.set_facecolor(self.background_color)
-        fig.savefig(filepath, dpi=dpi, bbox_inches='tight', facecolor=self.background_color)
-        plt.close(fig)
-        
-        return filepath
+        return self._save_figure(fig, ax, dpi)
     
     def generate_line_chart(
         self, 
@@ -736,7 +519,7 @@ class ChartGenerator:
         colors: Optional[List[str]] = None,
         width_cm: float = 14.0,
         dpi: int = 300
-    ) -> str:
+    ) -> io.BytesIO:
         """生成折线图（支持单一数据系列和多个数据系列）
         
         Args:
@@ -749,7 +532,7 @@ class ChartGenerator:
             dpi: 图片分辨率
             
         Returns:
-            生成的图片文件路径
+            PNG图片数据（位于起始位置的 BytesIO）
         """
         if not data or len(data) == 0:
             raise ValueError("数据不能为空")
@@ -772,7 +555,7 @@ class ChartGenerator:
         colors: Optional[List[str]],
         width_cm: float,
         dpi: int
-    ) -> str:
+    ) -> io.BytesIO:
         """生成单一数据系列的折线图"""
         # 准备数据
         labels = list(data.keys())
@@ -787,14 +570,10 @@ class ChartGenerator:
         
         # 创建图形，高度固定
         height_cm = 10.0
-        fig, ax = plt.subplots(figsize=(width_cm/2.54, height_cm/2.54), dpi=dpi)
+        fig, ax = self._new_figure((width_cm/2.54, height_cm/2.54), dpi)
         
         # 设置标题和字体（使用字体文件路径确保中文显示）
-        from matplotlib.font_manager import FontProperties
-        if self._font_file_path:
-            font_prop = FontProperties(fname=self._font_file_path)
-        else:
-            font_prop = None
+        font_prop = self._font_prop
         
         # 绘制折线图
         x_positions = range(len(labels))
@@ -811,11 +590,8 @@ class ChartGenerator:
         
         # 设置x轴标签（确保中文正常显示）
         ax.set_xticks(x_positions)
-        if font_prop:
-            # 为每个标签设置字体属性，确保中文正常显示
-            ax.set_xticklabels(labels, rotation=45, ha='right', fontproperties=font_prop, fontsize=self.font_sizes.get('label', 10))
-        else:
-            ax.set_xticklabels(labels, rotation=45, ha='right', fontsize=self.font_sizes.get('label', 10))
+        # 为每个标签设置字体属性，确保中文正常显示
+        ax.set_xticklabels(labels, rotation=45, ha='right', fontproperties=font_prop, fontsize=self.font_sizes.get('label', 10))
         
         # 计算y轴范围，为数值标签留出空间
         min_value = min(values) if values else 0
@@ -830,38 +606,22 @@ class ChartGenerator:
         for i, (x, y, value) in enumerate(zip(x_positions, values, values)):
             # 在数据点上方显示数值
             label_y = y + value_range * 0.03
-            if font_prop:
-                ax.text(
-                    x,
-                    label_y,
-                    f'{value:.0f}' if value == int(value) else f'{value:.1f}',
-                    ha='center',
-                    va='bottom',
-                    fontsize=self.font_sizes.get('value', 9),
-                    fontweight='bold',
-                    fontproperties=font_prop
-                )
-            else:
-                ax.text(
-                    x,
-                    label_y,
-                    f'{value:.0f}' if value == int(value) else f'{value:.1f}',
-                    ha='center',
-                    va='bottom',
-                    fontsize=self.font_sizes.get('value', 9),
-                    fontweight='bold'
-                )
+            ax.text(
+                x,
+                label_y,
+                f'{value:.0f}' if value == int(value) else f'{value:.1f}',
+                ha='center',
+                va='bottom',
+                fontsize=self.font_sizes.get('value', 9),
+                fontweight='bold',
+                fontproperties=font_prop
+            )
         
-        # 设置标题和轴标签（使用字体文件路径确保中文显示）
-        if font_prop:
-            plt.title(title, fontsize=self.font_sizes.get('title', 14), fontweight='bold', pad=20, fontproperties=font_prop)
-            # 设置y轴标签字体
-            ax.set_ylabel('数值', fontproperties=font_prop, fontsize=self.font_sizes.get('y_axis', 12))
-            ax.set_xlabel('', fontproperties=font_prop, fontsize=self.font_sizes.get('label', 12))
-        else:
-            plt.title(title, fontsize=self.font_sizes.get('title', 14), fontweight='bold', pad=20)
-            ax.set_ylabel('数值', fontsize=self.font_sizes.get('y_axis', 12))
-            ax.set_xlabel('', fontsize=self.font_sizes.get('label', 12))
+        # 设置标题和轴标签（使用字体属性确保中文显示）
+        ax.set_title(title, fontsize=self.font_sizes.get('title', 14), fontweight='bold', pad=20, fontproperties=font_prop)
+        # 设置y轴标签字体
+        ax.set_ylabel('数值', fontproperties=font_prop, fontsize=self.font_sizes.get('y_axis', 12))
+        ax.set_xlabel('', fontproperties=font_prop, fontsize=self.font_sizes.get('label', 12))
         
         # 设置网格
         ax.grid(axis='y', alpha=0.3, linestyle='--')
@@ -872,49 +632,9 @@ class ChartGenerator:
         num_labels = len(labels) if labels else 0
         # 动态计算底部边距：基础0.15 + 标签长度影响 + 标签数量影响
         bottom_margin = max(0.2, 0.15 + max_label_length * 0.015 + num_labels * 0.01)
-        plt.tight_layout(rect=[0, bottom_margin, 1, 0.95])  # 增加底部边距，避免标签被截断
-        
-        # 生成临时文件路径
-        import uuid
-        filename = f"chart_{uuid.uuid4().hex[:8]}.png"
-        filepath = os.path.join(self.output_dir, filename)
+        fig.tight_layout(rect=[0, bottom_margin, 1, 0.95])  # 增加底部边距，避免标签被截断
         
-        # 设置图表背景色
-        fig.patch.set_facecolor(self.background_color)
-        ax.set_facecolor(self.background_color)
-        
-        # 保存图片
-        print(f"正在保存图片到: {filepath}, DPI: {dpi}")
-        plt.savefig(
-            filepath,
-            dpi=dpi,
-            bbox_inches='tight',
-            facecolor=self.background_color,
-            transparent=False
-        )
-        
-        # 关闭图形以释放内存
-        plt.close(fig)
-        
-        # 优化图片文件大小（压缩PNG）
-        try:
-            img = Image.open(filepath)
-            # 如果图片太大，进行压缩
-            original_size = os.path.getsize(filepath)
-            if original_size > 500 * 1024:  # 如果大于500KB
-                print(f"图片文件较大 ({original_size / 1024:.2f} KB)，进行压缩...")
-                # 使用PIL重新保存以压缩
-                img.save(filepath, 'PNG', optimize=True, compress_level=6)
-                new_size = os.path.getsize(filepath)
-                print(f"压缩完成: {original_size / 1024:.2f} KB -> {new_size / 1024:.2f} KB")
-            else:
-                print(f"图片文件大小: {original_size / 1024:.2f} KB")
-            img.close()
-        except Exception as e:
-            print(f"图片压缩失败（继续使用原图）: {e}")
-        
-        print(f"图片保存完成: {filepath}")
-        return filepath
+        return self._save_figure(fig, ax, dpi)
     
     def _generate_multi_line_chart(
         self,
@@ -923,19 +643,13 @@ class ChartGenerator:
         colors: Optional[List[str]],
         width_cm: float,
         dpi: int
-    ) -> str:
+    ) -> io.BytesIO:
         """生成多条折线图（多个数据系列）"""
-        from matplotlib.font_manager import FontProperties
-        import uuid
-        
         # 字号配置（已从配置中读取，这里保留作为备用）
         # FONT_SIZE = {'title': 11, 'tick': 5.5, 'legend': 5.5, 'value': 5}
         
-        # 创建带字号的字体属性（解决 fontsize/fontproperties 冲突问题）
-        def get_font(size: float) -> Optional[FontProperties]:
-            if self._font_file_path:
-                return FontProperties(fname=self._font_file_path, size=size)
-            return None
+        # 带字号的字体属性（解决 fontsize/fontproperties 冲突问题，按字号复用）
+        get_font = self._get_font
         
         # 准备数据
         series_names = list(data.keys())
@@ -960,7 +674,7 @@ class ChartGenerator:
         
         # 创建图形
         height_cm = max(10.0, 8.0 + len(series_names) * 0.3)
-        fig, ax = plt.subplots(figsize=(width_cm/2.54, height_cm/2.54), dpi=dpi)
+        fig, ax = self._new_figure((width_cm/2.54, height_cm/2.54), dpi)
         
         # 收集所有值用于计算Y轴范围
         all_values = []
@@ -1019,31 +733,287 @@ class ChartGenerator:
         # 网格
         ax.grid(axis='both', alpha=0.3, linestyle='--')
         
-        # 保存图片
-        filepath = os.path.join(self.output_dir, f"chart_{uuid.uuid4().hex[:8]}.png")
-        # 设置图表背景色
-        fig.patch.set_facecolor(self.background_color)
-        ax.set_facecolor(self.background_color)
-        fig.savefig(filepath, dpi=dpi, bbox_inches='tight', facecolor=self.background_color)
-        plt.close(fig)
-        
-        # 压缩大图片
-        if os.path.getsize(filepath) > 500 * 1024:
-            img = Image.open(filepath)
-            img.save(filepath, 'PNG', optimize=True, compress_level=6)
-            img.close()
-        
-        return filepath
+        return self._save_figure(fig, ax, dpi)
     
-    def cleanup(self, filepath: str):
-        """清理临时图片文件
+    def generate_chart(
+        self,
+        chart_type: str,
+        title: str,
+        data: Dict,
+        width_cm: float = 14.0,
+        dpi: int = 300
+    ) -> io.BytesIO:
+        """按图表类型生成图表
         
         Args:
-            filepath: 要删除的图片文件路径
+            chart_type: 图表类型（pie/bar/line，未知类型按饼图处理）
+            title: 图表标题
+            data: 数据字典
+            width_cm: 图片宽度（厘米）
+            dpi: 图片分辨率
+            
+        Returns:
+            PNG图片数据（位于起始位置的 BytesIO）
         """
+        if chart_type == 'bar':
+            return self.generate_bar_chart(title=title, data=data, width_cm=width_cm, dpi=dpi)
+        elif chart_type == 'line':
+            return self.generate_line_chart(title=title, data=data, width_cm=width_cm, dpi=dpi)
+        else:
+            return self.generate_pie_chart(title=title, data=data, width_cm=width_cm, dpi=dpi)
+
+
+# 中文字体优先级列表（按可用性排序，排除不支持中文的字体）
+CHINESE_FONTS = [
+    'WenQuanYi Micro Hei',      # 文泉驿微米黑（Linux常用）
+    'WenQuanYi Zen Hei',        # 文泉驿正黑
+    'Noto Sans CJK SC',         # Noto Sans 中文字体
+    'Noto Sans SC',             # Noto Sans 简体中文
+    'Source Han Sans SC',       # 思源黑体
+    'SimHei',                   # 黑体（Windows）
+    'Microsoft YaHei',          # 微软雅黑（Windows）
+    'SimSun',                   # 宋体（Windows）
+    'STHeiti',                  # 华文黑体（macOS）
+    'STSong',                   # 华文宋体（macOS）
+    'Arial Unicode MS',         # Arial Unicode（跨平台）
+]
+
+# 不支持中文的字体（需要排除）
+NON_CHINESE_FONTS = ['DejaVu Sans', 'Arial', 'Helvetica', 'Times New Roman']
+
+# 项目字体目录及支持的字体文件名（多种格式和文件名）
+PROJECT_FONTS_DIR = Path(__file__).resolve().parent.parent / 'assets' / 'fonts'
+PROJECT_FONT_NAMES = [
+    'noto-sans-sc-regular.otf',  # OTF 格式
+    'NotoSansSC-Regular.otf',
+    'NotoSansSC-Regular.ttf',    # TTF 格式
+    'noto-sans-sc-regular.ttf',
+]
+
+# 字体缓存目录（下载的字体和字体解析结果）
+FONT_CACHE_DIR = Path.home() / '.matplotlib' / 'fonts'
+FONT_RESOLUTION_FILE = FONT_CACHE_DIR / 'font_resolution.json'
+
+_font_resolution: Optional[Dict[str, Any]] = None
+_font_lock = threading.Lock()
+
+
+def resolve_chart_font() -> Dict[str, Any]:
+    """解析图表使用的中文字体（每个进程只执行一次）
+    
+    优先读取持久化的解析结果，冷启动时无需扫描系统字体；缓存不可用时
+    执行完整的字体发现并写回缓存。删除 font_resolution.json 可强制重新发现。
+    只持久化找到了中文字体的结果：使用备用字体（如字体下载失败）时下次启动重新发现。
+    
+    Returns:
+        字体解析结果：{"family": 字体名称, "font_file": 字体文件路径或None,
+        "font_list": 字体回退列表, "cjk": 是否找到中文字体}
+    """
+    global _font_resolution
+    if _font_resolution is None:
+        with _font_lock:
+            if _font_resolution is None:
+                resolution = _load_font_resolution()
+                if resolution is None:
+                    resolution = _discover_font()
+                    if resolution.get('cjk'):
+                        _save_font_resolution(resolution)
+                _apply_font_resolution(resolution)
+                _font_resolution = resolution
+    return _font_resolution
+
+
+@lru_cache(maxsize=64)
+def _font_properties(font_file: Optional[str], families: tuple, size: Optional[float]) -> FontProperties:
+    """按（字体文件, 回退列表, 字号）复用 FontProperties（matplotlib 使用时会复制，可安全共享）"""
+    if font_file:
+        return FontProperties(fname=font_file, size=size)
+    # 只保留已安装的字体和通用族名，避免每次查找时对缺失字体重复告警
+    installed = {f.name for f in fm.fontManager.ttflist}
+    generic = {'serif', 'sans-serif', 'cursive', 'fantasy', 'monospace', 'sans', 'sans serif'}
+    available = [name for name in families if name in installed or name in generic]
+    return FontProperties(family=available or None, size=size)
+
+
+def _font_fingerprint() -> Dict[str, Any]:
+    """影响字体解析结果的环境信息，变化时缓存的解析结果失效"""
+    project_fonts = sorted(
+        name for name in PROJECT_FONT_NAMES if (PROJECT_FONTS_DIR / name).exists()
+    )
+    return {
+        'matplotlib': matplotlib.__version__,
+        'project_fonts': project_fonts,
+    }
+
+
+def _load_font_resolution() -> Optional[Dict[str, Any]]:
+    """读取持久化的字体解析结果，无效时返回 None"""
+    try:
+        with open(FONT_RESOLUTION_FILE, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    if not isinstance(cached, dict) or cached.get('fingerprint') != _font_fingerprint():
+        return None
+    
+    resolution = cached.get('resolution')
+    # 未找到中文字体的结果（包括旧版本保存的备用字体）不使用
+    if not isinstance(resolution, dict) or not resolution.get('font_list') or not resolution.get('cjk'):
+        return None
+    
+    # 字体文件被删除时重新发现
+    font_file = resolution.get('font_file')
+    if font_file and not os.path.exists(font_file):
+        return None
+    
+    logger.debug("使用缓存的字体解析结果: %s", resolution.get('family'))
+    return resolution
+
+
+def _save_font_resolution(resolution: Dict[str, Any]):
+    """持久化字体解析结果（失败不影响使用）"""
+    try:
+        FONT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        temp_file = FONT_RESOLUTION_FILE.with_suffix(f'.{os.getpid()}.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': _font_fingerprint(), 'resolution': resolution}, f, ensure_ascii=False)
+        os.replace(temp_file, FONT_RESOLUTION_FILE)
+    except OSError as e:
+        logger.warning("保存字体解析结果失败: %s", e)
+
+
+def _apply_font_resolution(resolution: Dict[str, Any]):
+    """注册字体文件（进程内只执行一次）"""
+    font_file = resolution.get('font_file')
+    if font_file:
         try:
-            if os.path.exists(filepath):
-                os.remove(filepath)
+            # addfont 会直接更新字体列表，无需重建字体缓存
+            fm.fontManager.addfont(font_file)
         except Exception as e:
-            print(f"清理图片文件失败 {filepath}: {e}")
+            logger.warning("注册字体文件失败 %s: %s", font_file, e)
+    
+    # 字体通过 FontProperties 随图形元素传入，这里只关闭 unicode 负号
+    # （中文字体通常缺少该字形）。该设置在进程内只写一次，渲染时只读。
+    matplotlib.rcParams['axes.unicode_minus'] = False
+
 
+def _discover_font() -> Dict[str, Any]:
+    """发现可用的中文字体，支持 Docker 环境，优先使用项目中的字体文件"""
+    # 获取系统中所有可用字体
+    available_fonts = [f.name for f in fm.fontManager.ttflist]
+    
+    selected_font = None
+    selected_font_file = None
+    
+    # 第一步：优先使用项目中的字体文件（最重要！）
+    logger.debug("步骤1: 检查项目中的字体文件...")
+    font_file = None
+    for font_name in PROJECT_FONT_NAMES:
+        candidate = PROJECT_FONTS_DIR / font_name
+        if candidate.exists():
+            font_file = candidate
+            logger.debug("找到字体文件: %s", font_file)
+            break
+    
+    # 如果项目中有字体文件，直接使用
+    if font_file and font_file.exists():
+        try:
+            # 获取字体文件的实际字体名称
+            try:
+                selected_font = FontProperties(fname=str(font_file)).get_name()
+                logger.debug("字体文件实际名称: %s", selected_font)
+            except Exception:
+                selected_font = 'Noto Sans SC'
+            
+            # 保存字体文件路径，用于后续直接使用
+            selected_font_file = str(font_file)
+            logger.debug("成功使用项目中的字体: %s (文件: %s)", selected_font, font_file.name)
+        except Exception as e:
+            logger.warning("注册项目字体失败: %s", e)
+            selected_font = None
+            selected_font_file = None
+    else:
+        logger.warning("项目字体文件不存在: %s", font_file)
+    
+    # 第二步：如果项目字体加载失败，再检查系统字体
+    if selected_font is None:
+        logger.debug("步骤2: 检查系统中的中文字体...")
+        # 查找第一个可用的中文字体（排除不支持中文的字体）
+        for font_name in CHINESE_FONTS:
+            if font_name in available_fonts and font_name not in NON_CHINESE_FONTS:
+                selected_font = font_name
+                logger.debug("找到系统可用中文字体: %s", font_name)
+                break
+        
+        # 如果项目中没有字体文件或注册失败，尝试下载
+        if selected_font is None:
+            downloaded_font_file = _download_font()
+            if downloaded_font_file:
+                # 使用下载的字体
+                selected_font = 'Noto Sans SC'
+                selected_font_file = downloaded_font_file
+                logger.debug("成功使用下载的字体: %s", selected_font)
+    
+    # 如果仍然没有找到中文字体，使用备用方案
+    found_cjk = selected_font is not None
+    if selected_font is None:
+        logger.warning("无法获取中文字体，使用备用字体（中文可能显示为方块）")
+        # 尝试查找任何包含中文的字体
+        noto_fonts = [f for f in available_fonts if 'noto' in f.lower() or 'cjk' in f.lower()]
+        if noto_fonts:
+            selected_font = noto_fonts[0]
+            logger.debug("使用 Noto 字体: %s", selected_font)
+        else:
+            selected_font = 'DejaVu Sans'
+            logger.debug("使用备用字体 %s，中文将显示为方块", selected_font)
+    
+    # 设置字体（确保不使用不支持中文的字体作为主字体）
+    if selected_font and selected_font not in NON_CHINESE_FONTS:
+        font_list = [selected_font] + [f for f in CHINESE_FONTS if f != selected_font] + ['sans-serif']
+    else:
+        # 如果主字体不支持中文，至少尝试使用项目字体
+        font_list = ['Noto Sans SC'] + CHINESE_FONTS + ['sans-serif']
+        logger.warning("主字体可能不支持中文，使用字体列表: %s...", font_list[:3])
+    
+    return {
+        'family': selected_font,
+        'font_file': selected_font_file,
+        'font_list': font_list,
+        'cjk': found_cjk,
+    }
+
+
+def _download_font() -> Optional[str]:
+    """下载 Noto Sans SC 字体到字体缓存目录，返回字体文件路径"""
+    try:
+        # 创建字体缓存目录
+        FONT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        
+        # 尝试下载 Noto Sans SC 字体（Google 提供的免费中文字体）
+        downloaded_font_file = FONT_CACHE_DIR / 'NotoSansSC-Regular.ttf'
+        if not downloaded_font_file.exists():
+            logger.debug("正在从网络下载 Noto Sans SC 字体...")
+            try:
+                # 使用 Google Fonts 的 CDN 下载字体
+                font_url = 'https://github.com/google/fonts/raw/main/ofl/notosanssc/NotoSansSC%5Bwdth%2Cwght%5D.ttf'
+                urlretrieve(font_url, downloaded_font_file)
+                logger.debug("字体下载成功: %s", downloaded_font_file)
+            except Exception as e:
+                logger.warning("字体下载失败: %s，尝试备用方案...", e)
+                # 备用：使用 GitHub 的字体文件
+                try:
+                    font_url = 'https://raw.githubusercontent.com/googlefonts/noto-cjk/main/Sans/Variable/TTF/Subset/NotoSansCJKsc-VF.ttf'
+                    urlretrieve(font_url, downloaded_font_file)
+                    logger.debug("使用备用字体源下载成功: %s", downloaded_font_file)
+                except Exception as e2:
+                    logger.warning("备用字体下载也失败: %s", e2)
+                    return None
+        else:
+            logger.debug("使用已缓存的字体文件: %s", downloaded_font_file)
+        
+        if downloaded_font_file.exists():
+            return str(downloaded_font_file)
+    except Exception as e:
+        logger.warning("字体下载过程出错: %s", e)
+    return None
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图表并行渲染模块
+使用常驻的工作进程池并行渲染图表，工作进程预先导入matplotlib、完成字体注册并预热渲染。
+工作进程数是进程级设置（环境变量 CHART_RENDER_WORKERS 或 ConversionEngine 构造参数），
+不随单个请求的样式配置变化
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .chart_generator import ChartGenerator, resolve_chart_font
+
+logger = logging.getLogger('smart_doc.chart_pool')
+
+# 工作进程内按配置复用的图表生成器（最近使用的排在末尾）{配置JSON: ChartGenerator}
+_worker_generators: 'OrderedDict[str, ChartGenerator]' = OrderedDict()
+_MAX_WORKER_GENERATORS = 16
+
+# 进程级工作进程数的环境变量
+RENDER_WORKERS_ENV = 'CHART_RENDER_WORKERS'
+
+
+def resolve_render_workers(workers: Optional[int] = None) -> int:
+    """确定图表渲染的工作进程数
+
+    Args:
+        workers: 指定的工作进程数，None 时读取环境变量 CHART_RENDER_WORKERS（默认 0）
+
+    Returns:
+        工作进程数（不超过 CPU 核数），0 或 1 表示在当前进程中顺序渲染
+    """
+    if workers is None:
+        value = os.environ.get(RENDER_WORKERS_ENV, '0')
+        try:
+            workers = int(value)
+        except ValueError:
+            logger.warning("%s 的值无效，按顺序渲染图表: %s", RENDER_WORKERS_ENV, value)
+            workers = 0
+    return max(0, min(workers, os.cpu_count() or 1))
+
+
+def _init_worker():
+    """工作进程初始化：完成字体解析和注册，并用默认配置渲染一张小图，
+    预先加载 Agg 后端、PNG 编码和字体缓存，第一个图表不再承担这部分开销"""
+    resolve_chart_font()
+    try:
+        _get_worker_generator({}).generate_chart('pie', '预热', {'预热': 1}, width_cm=2, dpi=36)
+    except Exception as e:
+        # 初始化函数抛出异常会使整个进程池损坏，预热失败只记录日志
+        logger.debug("图表工作进程预热失败: %s", e)
+
+
+def _get_worker_generator(generator_config: Dict[str, Any]) -> ChartGenerator:
+    """获取（必要时创建）指定配置的图表生成器，超出上限时淘汰最久未使用的一个"""
+    config_key = json.dumps(generator_config, sort_keys=True, ensure_ascii=False, default=str)
+    generator = _worker_generators.get(config_key)
+    if generator is not None:
+        _worker_generators.move_to_end(config_key)
+        return generator
+    if len(_worker_generators) >= _MAX_WORKER_GENERATORS:
+        _worker_generators.popitem(last=False)
+    generator = ChartGenerator(config=generator_config)
+    _worker_generators[config_key] = generator
+    return generator
+
+
+def _render_in_worker(generator_config: Dict[str, Any], chart_type: str, title: str,
+                      data: Dict[str, Any], width_cm: float, dpi: int) -> bytes:
+    """在工作进程中渲染单个图表，返回PNG数据"""
+    generator = _get_worker_generator(generator_config)
+    return generator.generate_chart(chart_type, title, data, width_cm=width_cm, dpi=dpi).getvalue()
+
+
+def _worker_context():
+    """工作进程的启动方式
+
+    插件进程同时处理多个请求（多线程），直接 fork 时子进程可能继承其他线程持有的锁而挂起，
+    因此不使用 fork。优先使用 forkserver：工作进程由单线程的 forkserver 进程 fork 而来，
+    forkserver 只预先导入本模块（连同 matplotlib），不导入插件入口模块；
+    不支持 forkserver 的平台使用 spawn。
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+class ChartRenderPool:
+    """图表渲染进程池"""
+
+    def __init__(self, max_workers: int):
+        """初始化进程池
+
+        Args:
+            max_workers: 工作进程数
+        """
+        self.max_workers = max_workers
+        # 正在使用进程池的调用数，以及进程池是否已被替换（由 _render_pool_lock 保护）
+        self.users = 0
+        self.retired = False
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=_worker_context(),
+            initializer=_init_worker
+        )
+
+    def render_all(
+        self,
+        generator_config: Dict[str, Any],
+        jobs: List[Tuple[str, str, Dict[str, Any]]],
+        width_cm: float,
+        dpi: int
+    ) -> List[Tuple[Optional[bytes], Optional[BaseException]]]:
+        """并行渲染一组图表
+
+        Args:
+            generator_config: ChartGenerator 配置字典
+            jobs: 图表列表，每项为 (chart_type, title, data)
+            width_cm: 图片宽度（厘米）
+            dpi: 图片分辨率
+
+        Returns:
+            与 jobs 顺序一致的结果列表，每项为 (PNG数据, 异常)，单个图表失败不影响其他图表
+
+        Raises:
+            BrokenProcessPool: 进程池已损坏（工作进程异常退出）
+        """
+        futures = [
+            self._executor.submit(
+                _render_in_worker, generator_config, chart_type, title, data, width_cm, dpi
+            )
+            for chart_type, title, data in jobs
+        ]
+
+        results = []
+        for future in futures:
+            try:
+                results.append((future.result(), None))
+            except BrokenProcessPool:
+                raise
+            except Exception as e:
+                results.append((None, e))
+        return results
+
+    def shutdown(self):
+        """关闭进程池（已提交的任务仍会完成）"""
+        self._executor.shutdown(wait=False)
+
+
+_render_pool: Optional[ChartRenderPool] = None
+_render_pool_lock = threading.Lock()
+
+
+def _retire(pool: ChartRenderPool):
+    """停止向进程池分配新调用，没有调用在使用时立即关闭（调用方持有 _render_pool_lock）"""
+    pool.retired = True
+    if not pool.users:
+        pool.shutdown()
+
+
+@contextmanager
+def acquire_render_pool(max_workers: int) -> Iterator[ChartRenderPool]:
+    """借用进程级共享的渲染进程池
+
+    工作进程数与当前进程池不同时创建新的进程池，旧进程池在最后一个使用者归还后才关闭，
+    其他请求已提交的图表不会被取消。
+
+    Args:
+        max_workers: 工作进程数（见 resolve_render_workers）
+    """
+    global _render_pool
+    with _render_pool_lock:
+        pool = _render_pool
+        if pool is None or pool.max_workers != max_workers:
+            if pool is not None:
+                _retire(pool)
+            # 先在主进程完成字体解析并持久化，工作进程启动时直接读取解析结果
+            resolve_chart_font()
+            pool = _render_pool = ChartRenderPool(max_workers)
+        pool.users += 1
+    try:
+        yield pool
+    finally:
+        with _render_pool_lock:
+            pool.users -= 1
+            if pool.retired and not pool.users:
+                pool.shutdown()
+
+
+def reset_render_pool(pool: Optional[ChartRenderPool] = None):
+    """丢弃进程池（进程池损坏后调用，下次使用时重建）
+
+    Args:
+        pool: 损坏的进程池；已被替换时不影响当前进程池。为 None 时丢弃当前进程池
+    """
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None and (pool is None or pool is _render_pool):
+            _retire(_render_pool)
+            _render_pool = None
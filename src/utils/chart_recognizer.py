@@ -6,15 +6,18 @@
 """
 
 import json
+import logging
 from typing import Dict, List, Any
 
+logger = logging.getLogger('smart_doc.chart_recognizer')
+
 
 class ChartRecognizer:
     """图表数据识别器"""
     
     def __init__(self):
         """初始化识别器"""
-        print("图表识别器初始化成功")
+        logger.debug("图表识别器初始化成功")
     
     def recognize(self, chart_data: str) -> List[Dict[str, Any]]:
         """解析图表数据
@@ -27,20 +30,18 @@ class ChartRecognizer:
         """
         # 如果未提供图表数据，直接返回空数组
         if not chart_data or not chart_data.strip():
-            print("未提供图表数据，直接返回空数组")
+            logger.debug("未提供图表数据，直接返回空数组")
             return []
         
         try:
-            print("正在解析图表数据...")
+            logger.debug("正在解析图表数据...")
             # 直接解析传入的JSON数据
             charts = self._parse_response(chart_data)
-            print(f"解析得到 {len(charts)} 个图表")
+            logger.debug("解析得到 %d 个图表", len(charts))
             return charts
             
-        except Exception as e:
-            print(f"解析图表数据失败: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.warning("解析图表数据失败", exc_info=True)
             return []
     
     def _parse_response(self, response_text: str) -> List[Dict[str, Any]]:
@@ -55,23 +56,23 @@ class ChartRecognizer:
                 end = text.find("```", start)
                 if end != -1:
                     text = text[start:end].strip()
-                    print(f"检测到 ```json 代码块，已提取其中的JSON内容")
+                    logger.debug("检测到 ```json 代码块，已提取其中的JSON内容")
                 else:
                     # 没有找到结束标记，尝试从开始位置提取到末尾
                     text = text[start:].strip()
-                    print(f"检测到 ```json 开始标记，但未找到结束标记，尝试解析剩余内容")
+                    logger.debug("检测到 ```json 开始标记，但未找到结束标记，尝试解析剩余内容")
             elif "```" in text:
                 start = text.find("```") + 3
                 end = text.find("```", start)
                 if end != -1:
                     text = text[start:end].strip()
-                    print(f"检测到 ``` 代码块，已提取其中的JSON内容")
+                    logger.debug("检测到 ``` 代码块，已提取其中的JSON内容")
                 else:
                     # 没有找到结束标记，尝试从开始位置提取到末尾
                     text = text[start:].strip()
-                    print(f"检测到 ``` 开始标记，但未找到结束标记，尝试解析剩余内容")
+                    logger.debug("检测到 ``` 开始标记，但未找到结束标记，尝试解析剩余内容")
             else:
-                print("未检测到代码块标记，直接解析整个文本")
+                logger.debug("未检测到代码块标记，直接解析整个文本")
             
             # 解析JSON
             result = json.loads(text)
@@ -93,14 +94,14 @@ class ChartRecognizer:
             return valid_charts
             
         except json.JSONDecodeError as e:
-            print(f"解析JSON失败: {e}")
-            print(f"原始内容（前500字符）: {response_text[:500]}")
+            logger.warning("解析JSON失败: %s", e)
+            logger.debug("原始内容（前500字符）: %s", response_text[:500])
             # 如果原始内容包含代码块标记，提示用户
             if "```" in response_text:
-                print("提示: 检测到代码块标记，但JSON解析失败。请确保代码块内的内容是有效的JSON格式。")
+                logger.warning("提示: 检测到代码块标记，但JSON解析失败。请确保代码块内的内容是有效的JSON格式。")
             return []
         except Exception as e:
-            print(f"解析响应失败: {e}")
+            logger.warning("解析响应失败: %s", e)
             return []
     
     def _validate_chart(self, chart: Dict[str, Any]) -> bool:
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+代码高亮模块
+使用 Pygments 将代码切分为带类别的片段，供 Word 生成器按字符样式输出，
+每种语言的词法分析器只创建一次，相同代码的切分结果按内容摘要缓存
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from pygments.lexers import get_lexer_by_name
+    from pygments.styles import get_style_by_name
+    from pygments.token import Token
+    from pygments.util import ClassNotFound
+    PYGMENTS_AVAILABLE = True
+except ImportError:
+    PYGMENTS_AVAILABLE = False
+
+
+# 高亮类别：(类别名, Pygments 词法类型)，按从具体到宽泛的顺序匹配
+if PYGMENTS_AVAILABLE:
+    TOKEN_CATEGORIES: List[Tuple[str, object]] = [
+        ('Comment', Token.Comment),
+        ('String', Token.Literal.String),
+        ('Number', Token.Literal.Number),
+        ('Keyword', Token.Keyword),
+        ('Builtin', Token.Name.Builtin),
+        ('Function', Token.Name.Function),
+        ('Class', Token.Name.Class),
+        ('Decorator', Token.Name.Decorator),
+        ('Tag', Token.Name.Tag),
+        ('Attribute', Token.Name.Attribute),
+        ('Variable', Token.Name.Variable),
+        ('Constant', Token.Name.Constant),
+        ('Operator', Token.Operator),
+        ('Error', Token.Error),
+    ]
+else:
+    TOKEN_CATEGORIES = []
+
+# 代码片段：(高亮类别，无需高亮时为 None, 文本)
+CodeSegment = Tuple[Optional[str], str]
+
+
+@lru_cache(maxsize=64)
+def get_lexer(language: str):
+    """获取语言对应的词法分析器（按语言名缓存）
+
+    Args:
+        language: 语言名称或别名（如 python、js、sql）
+
+    Returns:
+        词法分析器，Pygments 不可用或语言未知时返回 None
+    """
+    if not PYGMENTS_AVAILABLE or not language:
+        return None
+    try:
+        # 保留代码首尾的空行和换行，切分结果拼接后与原文一致
+        return get_lexer_by_name(language.lower(), stripnl=False, ensurenl=False)
+    except ClassNotFound:
+        return None
+
+
+@lru_cache(maxsize=256)
+def _token_category(token_type) -> Optional[str]:
+    """Pygments 词法类型对应的高亮类别"""
+    for category, category_type in TOKEN_CATEGORIES:
+        if token_type in category_type:
+            return category
+    return None
+
+
+@lru_cache(maxsize=16)
+def get_token_styles(style_name: str) -> Dict[str, Dict[str, object]]:
+    """从 Pygments 配色方案提取各高亮类别的字符格式
+
+    Args:
+        style_name: Pygments 配色方案名称（如 default、friendly、monokai）
+
+    Returns:
+        {类别: {'color': 'RRGGBB' 或 None, 'bold': bool, 'italic': bool}}，
+        配色方案中没有设置格式的类别不包含在内
+    """
+    if not PYGMENTS_AVAILABLE:
+        return {}
+    try:
+        style = get_style_by_name(style_name)
+    except ClassNotFound:
+        style = get_style_by_name('default')
+
+    token_styles = {}
+    for category, token_type in TOKEN_CATEGORIES:
+        definition = style.style_for_token(token_type)
+        if definition['color'] or definition['bold'] or definition['italic']:
+            token_styles[category] = {
+                'color': definition['color'] or None,
+                'bold': bool(definition['bold']),
+                'italic': bool(definition['italic']),
+            }
+    return token_styles
+
+
+class CodeHighlighter:
+    """代码切分器（线程安全）
+
+    切分结果按 (语言, 代码摘要) 缓存，文档中重复出现的代码片段不会重复做词法分析。
+    """
+
+    def __init__(self, max_entries: int = 512):
+        """初始化切分器
+
+        Args:
+            max_entries: 缓存的代码片段数量上限（LRU 淘汰）
+        """
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[CodeSegment, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+
+    def tokenize(self, language: str, code: str) -> Optional[Tuple[CodeSegment, ...]]:
+        """将代码切分为带高亮类别的片段
+
+        Args:
+            language: 语言名称
+            code: 代码文本
+
+        Returns:
+            片段元组（相邻的同类别片段已合并），语言不支持时返回 None
+        """
+        lexer = get_lexer(language)
+        if lexer is None:
+            return None
+
+        key = (language.lower(), hashlib.sha256(code.encode('utf-8')).hexdigest())
+        with self._lock:
+            segments = self._cache.get(key)
+            if segments is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return segments
+            self.misses += 1
+
+        segments = self._lex(lexer, code)
+
+        with self._lock:
+            self._cache[key] = segments
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return segments
+
+    @staticmethod
+    def _lex(lexer, code: str) -> Tuple[CodeSegment, ...]:
+        """词法分析并合并相邻的同类别片段"""
+        segments: List[List] = []
+        for token_type, text in lexer.get_tokens(code):
+            if not text:
+                continue
+            # 空白不需要单独着色，并入前一个片段
+            category = None if text.isspace() else _token_category(token_type)
+            if segments and (segments[-1][0] == category or text.isspace()):
+                segments[-1][1] += text
+            else:
+                segments.append([category, text])
+        return tuple((category, text) for category, text in segments)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._cache.clear()
+
+
+_default_highlighter: Optional[CodeHighlighter] = None
+_default_highlighter_lock = threading.Lock()
+
+
+def get_code_highlighter() -> CodeHighlighter:
+    """获取进程级共享的代码切分器"""
+    global _default_highlighter
+    if _default_highlighter is None:
+        with _default_highlighter_lock:
+            if _default_highlighter is None:
+                _default_highlighter = CodeHighlighter()
+    return _default_highlighter
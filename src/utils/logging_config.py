@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志配置模块
+各模块使用 smart_doc.* 命名的日志记录器，级别由入口统一配置
+"""
+
+import logging
+import os
+import sys
+from typing import Optional, Union
+
+
+# 所有模块日志记录器的公共前缀
+LOGGER_NAME = 'smart_doc'
+
+# 日志级别环境变量（DEBUG/INFO/WARNING/ERROR），默认 WARNING
+LOG_LEVEL_ENV = 'SMART_DOC_LOG_LEVEL'
+DEFAULT_LOG_LEVEL = logging.WARNING
+
+_configured = False
+
+
+def setup_logging(level: Optional[Union[int, str]] = None) -> logging.Logger:
+    """配置 smart_doc 日志记录器（重复调用只更新级别）
+
+    运行在 Dify 插件中时使用插件 SDK 的日志处理器，日志会作为插件事件
+    交给守护进程；否则输出到标准错误。
+
+    Args:
+        level: 日志级别，不提供时读取环境变量 SMART_DOC_LOG_LEVEL
+
+    Returns:
+        smart_doc 根日志记录器
+    """
+    global _configured
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(_resolve_level(level if level is not None else os.environ.get(LOG_LEVEL_ENV)))
+
+    if not _configured:
+        try:
+            # 与插件 SDK 的日志处理器格式一致（不复用其实例，它固定过滤 DEBUG）
+            from dify_plugin.config.logger_format import DifyPluginLoggerFormatter
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(DifyPluginLoggerFormatter())
+        except ImportError:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+        logger.addHandler(handler)
+        logger.propagate = False
+        _configured = True
+
+    return logger
+
+
+def _resolve_level(level: Optional[Union[int, str]]) -> int:
+    """解析日志级别，无效值回退到默认级别"""
+    if isinstance(level, int):
+        return level
+    if level:
+        resolved = logging.getLevelName(str(level).strip().upper())
+        if isinstance(resolved, int):
+            return resolved
+    return DEFAULT_LOG_LEVEL
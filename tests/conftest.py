@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试配置
+与 tools/markdown_to_word.py 相同，将 src 目录加入模块搜索路径
+"""
+
+import sys
+from pathlib import Path
+
+src_path = Path(__file__).resolve().parent.parent / 'src'
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
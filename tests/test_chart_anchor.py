@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""图表插入位置索引测试"""
+
+from utils.chart_anchor import ChartAnchorIndex
+
+
+def test_match_keeps_index_order():
+    positions = ['after:销售', 'before:利润', 'after:利润', 'after:季度销售额']
+    index = ChartAnchorIndex(positions)
+
+    # 命中顺序与关键词在段落中出现的顺序无关，按构建索引时的顺序返回
+    assert index.match('利润与季度销售额') == positions
+    assert index.match('季度销售额') == ['after:销售', 'after:季度销售额']
+    assert index.match('利润') == ['before:利润', 'after:利润']
+
+
+def test_match_reports_each_position_once():
+    index = ChartAnchorIndex(['after:增长', 'before:增长率'])
+    assert index.match('增长率增长率，增长') == ['after:增长', 'before:增长率']
+
+
+def test_overlapping_keywords():
+    # 关键词互为后缀/前缀时依赖失败指针合并输出
+    index = ChartAnchorIndex(['after:abcd', 'after:bc', 'after:c', 'after:bcx'])
+    assert index.match('xabcd') == ['after:abcd', 'after:bc', 'after:c']
+    assert index.match('abcx') == ['after:bc', 'after:c', 'after:bcx']
+
+
+def test_invalid_positions_are_ignored():
+    index = ChartAnchorIndex(['end', 'after:', 'before:  ', 'inside:图表', 'after: 图表 '])
+    assert len(index) == 1
+    assert index.match('图表') == ['after: 图表 ']
+    assert index.match('') == []
+    assert ChartAnchorIndex([]).match('图表') == []
+
+
+def test_parse_position():
+    assert ChartAnchorIndex.parse_position('after: 关键词 ') == ('after', '关键词')
+    assert ChartAnchorIndex.parse_position('before:关键词') == ('before', '关键词')
+    assert ChartAnchorIndex.parse_position('关键词') == (None, '')
+
+
+def test_match_parts_equals_joined_text():
+    index = ChartAnchorIndex(['after:华东', 'before:b\nc', 'after:利润', 'after:ab'])
+    cells = ['a', 'b', 'c', '华', '东', '', '利润']
+    assert index.match_parts(cells) == index.match('\n'.join(cells))
+    assert index.match_parts(cells) == ['before:b\nc', 'after:利润']
+    assert index.match_parts(iter(['xa', 'b'])) == []
+    assert index.match_parts(['xa', 'b'], separator='') == ['after:ab']
+    assert index.match_parts([]) == []
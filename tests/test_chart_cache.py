@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图表渲染缓存测试
+"""
+
+import os
+
+from utils.chart_cache import ChartRenderCache
+
+
+def _key(title, **overrides):
+    spec = dict(chart_type='pie', title=title, data={'a': 1, 'b': 2}, width_cm=14, dpi=150,
+                style={'background_color': '#FFFFFF'})
+    spec.update(overrides)
+    return ChartRenderCache.make_key(**spec)
+
+
+def test_key_covers_render_inputs():
+    key = _key('图表')
+    assert key == _key('图表', width_cm=14.0)
+    assert key != _key('图表', dpi=72)
+    assert key != _key('图表', style={'background_color': '#000000'})
+    # 数据的键顺序决定标签顺序，不同顺序是不同的图表
+    assert key != _key('图表', data={'b': 2, 'a': 1})
+
+
+def test_memory_lru_bounded_by_bytes():
+    cache = ChartRenderCache(max_memory_bytes=10)
+    cache.put('a', b'1234')
+    cache.put('b', b'1234')
+    # 访问 a 后，超出容量时淘汰的是 b
+    assert cache.get('a') == b'1234'
+    cache.put('c', b'1234')
+    assert cache.get('b') is None
+    assert cache.get('a') == b'1234' and cache.get('c') == b'1234'
+    assert cache._memory_bytes == 8
+
+    # 超过整个容量的图片不进入内存层，覆盖写入时按新大小计算
+    cache.put('huge', b'x' * 11)
+    assert cache.get('huge') is None
+    cache.put('a', b'12')
+    assert cache._memory_bytes == 6
+    assert (cache.hits, cache.misses) == (3, 2)
+
+
+def test_disk_layer_survives_memory_clear(tmp_path):
+    cache = ChartRenderCache(max_memory_bytes=0, cache_dir=str(tmp_path))
+    cache.put('a', b'png-a')
+    assert not cache._memory
+    assert cache.get('a') == b'png-a'
+
+    # 新的缓存实例（如重启后）直接读取磁盘层
+    assert ChartRenderCache(cache_dir=str(tmp_path)).get('a') == b'png-a'
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_disk_eviction_removes_least_recently_used(tmp_path):
+    cache = ChartRenderCache(max_memory_bytes=0, cache_dir=str(tmp_path), max_disk_bytes=10)
+    cache.put('a', b'1234')
+    cache.put('b', b'1234')
+    os.utime(tmp_path / 'a.png', (1000, 1000))
+    os.utime(tmp_path / 'b.png', (2000, 2000))
+    # 读取 a 会更新其访问时间，b 成为最久未访问的文件
+    assert cache.get('a') == b'1234'
+
+    cache.put('c', b'1234')
+    assert sorted(path.stem for path in tmp_path.glob('*.png')) == ['a', 'c']
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图表字体解析结果持久化测试
+"""
+
+import json
+
+import pytest
+
+from utils import chart_generator
+
+
+CJK_RESOLUTION = {'family': 'Noto Sans SC', 'font_file': None,
+                  'font_list': ['Noto Sans SC', 'sans-serif'], 'cjk': True}
+FALLBACK_RESOLUTION = {'family': 'DejaVu Sans', 'font_file': None,
+                       'font_list': ['Noto Sans SC', 'sans-serif'], 'cjk': False}
+
+
+@pytest.fixture
+def font_cache(tmp_path, monkeypatch):
+    """使用临时的字体缓存目录，返回每次字体发现使用的结果列表"""
+    monkeypatch.setattr(chart_generator, 'FONT_CACHE_DIR', tmp_path)
+    monkeypatch.setattr(chart_generator, 'FONT_RESOLUTION_FILE', tmp_path / 'font_resolution.json')
+    monkeypatch.setattr(chart_generator, '_apply_font_resolution', lambda resolution: None)
+    monkeypatch.setattr(chart_generator, '_font_resolution', None)
+    results, discovered = [], []
+
+    def discover():
+        discovered.append(results.pop(0))
+        return discovered[-1]
+
+    monkeypatch.setattr(chart_generator, '_discover_font', discover)
+    return results, discovered
+
+
+def _cold_start(monkeypatch):
+    monkeypatch.setattr(chart_generator, '_font_resolution', None)
+    return chart_generator.resolve_chart_font()
+
+
+def test_fallback_resolution_not_persisted(font_cache, monkeypatch):
+    results, discovered = font_cache
+    results.extend([FALLBACK_RESOLUTION, CJK_RESOLUTION])
+
+    assert _cold_start(monkeypatch) == FALLBACK_RESOLUTION
+    assert not chart_generator.FONT_RESOLUTION_FILE.exists()
+
+    # 下次启动重新发现，找到中文字体后持久化，之后直接读取
+    assert _cold_start(monkeypatch) == CJK_RESOLUTION
+    assert chart_generator.FONT_RESOLUTION_FILE.exists()
+    assert _cold_start(monkeypatch) == CJK_RESOLUTION
+    assert len(discovered) == 2
+
+
+def test_cached_fallback_ignored(font_cache, monkeypatch):
+    results, discovered = font_cache
+    results.append(CJK_RESOLUTION)
+    # 旧版本保存的备用字体结果（没有 cjk 标记）
+    legacy = {key: value for key, value in FALLBACK_RESOLUTION.items() if key != 'cjk'}
+    chart_generator.FONT_RESOLUTION_FILE.write_text(json.dumps({
+        'fingerprint': chart_generator._font_fingerprint(), 'resolution': legacy,
+    }), encoding='utf-8')
+
+    assert _cold_start(monkeypatch) == CJK_RESOLUTION
+    assert len(discovered) == 1
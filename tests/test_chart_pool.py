@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图表渲染进程池测试
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import chart_pool
+
+
+def test_worker_context_does_not_fork():
+    assert chart_pool._worker_context().get_start_method() in ('forkserver', 'spawn')
+
+
+def test_worker_generators_evict_least_recently_used(monkeypatch):
+    monkeypatch.setattr(chart_pool, '_worker_generators', chart_pool.OrderedDict())
+    monkeypatch.setattr(chart_pool, '_MAX_WORKER_GENERATORS', 2)
+
+    first = chart_pool._get_worker_generator({'background_color': '#000000'})
+    chart_pool._get_worker_generator({'background_color': '#111111'})
+    # 再次使用第一个配置后，淘汰的是第二个
+    assert chart_pool._get_worker_generator({'background_color': '#000000'}) is first
+    chart_pool._get_worker_generator({'background_color': '#222222'})
+
+    keys = list(chart_pool._worker_generators)
+    assert len(keys) == 2
+    assert '#111111' not in ''.join(keys)
+    assert chart_pool._get_worker_generator({'background_color': '#000000'}) is first
+
+
+def test_resolve_render_workers_clamped(monkeypatch):
+    monkeypatch.setattr(chart_pool.os, 'cpu_count', lambda: 4)
+    monkeypatch.delenv(chart_pool.RENDER_WORKERS_ENV, raising=False)
+    assert chart_pool.resolve_render_workers() == 0
+    assert chart_pool.resolve_render_workers(64) == 4
+    assert chart_pool.resolve_render_workers(-1) == 0
+    monkeypatch.setenv(chart_pool.RENDER_WORKERS_ENV, '3')
+    assert chart_pool.resolve_render_workers() == 3
+    monkeypatch.setenv(chart_pool.RENDER_WORKERS_ENV, 'many')
+    assert chart_pool.resolve_render_workers() == 0
+
+
+class _FakePool:
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self.users = 0
+        self.retired = False
+        self.closed = False
+
+    def shutdown(self):
+        self.closed = True
+
+
+def test_replaced_pool_closed_after_last_user(monkeypatch):
+    monkeypatch.setattr(chart_pool, 'ChartRenderPool', _FakePool)
+    monkeypatch.setattr(chart_pool, 'resolve_chart_font', lambda: None)
+    monkeypatch.setattr(chart_pool, '_render_pool', None)
+
+    with chart_pool.acquire_render_pool(2) as first:
+        with chart_pool.acquire_render_pool(3) as second:
+            # 工作进程数变化时新建进程池，仍在使用的旧进程池不关闭
+            assert second is not first
+            assert first.retired and not first.closed
+        assert not second.closed
+    assert first.closed
+
+    # 已被替换的进程池损坏时不影响当前进程池
+    chart_pool.reset_render_pool(first)
+    with chart_pool.acquire_render_pool(3) as pool:
+        assert pool is second
+    chart_pool.reset_render_pool(second)
+    assert second.closed
+
+
+def test_concurrent_requests_with_mixed_worker_counts():
+    jobs = [('pie', f'图表{i}', {'a': i + 1, 'b': 2}) for i in range(6)]
+
+    def convert(workers):
+        with chart_pool.acquire_render_pool(workers) as pool:
+            return pool.render_all({}, jobs, width_cm=4, dpi=36)
+
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            outcomes = list(executor.map(convert, [2, 3, 2, 3]))
+    finally:
+        chart_pool.reset_render_pool()
+
+    for results in outcomes:
+        assert [error for _, error in results] == [None] * len(jobs)
+        assert all(image.startswith(b'\x89PNG') for image, _ in results)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配置管理器缓存测试
+"""
+
+import os
+
+import pytest
+
+from config import ConfigManager
+
+
+STYLE_YAML = "body:\n  font:\n    family: \"宋体\"\n    size: 14\n"
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    (tmp_path / 'style.yaml').write_text(STYLE_YAML, encoding='utf-8')
+    themes = tmp_path / 'themes'
+    themes.mkdir()
+    (themes / 'report.yaml').write_text("body:\n  font:\n    size: 12\n", encoding='utf-8')
+    return tmp_path
+
+
+def _rewrite(path, text):
+    """改写配置文件，并确保修改时间变化"""
+    mtime = path.stat().st_mtime_ns
+    path.write_text(text, encoding='utf-8')
+    os.utime(path, ns=(mtime + 10 ** 9, mtime + 10 ** 9))
+
+
+def test_returns_isolated_copies(config_dir):
+    manager = ConfigManager(config_dir)
+    first = manager.load_config(theme='report')
+    first.body.font.size = 99
+    first.chart.colors.append('#000000')
+
+    second = manager.load_config(theme='report')
+    assert second is not first
+    assert second.body.font.size == 12
+    assert '#000000' not in second.chart.colors
+
+
+def test_json_digest_ignores_formatting(config_dir):
+    manager = ConfigManager(config_dir)
+    a = manager.load_config(json_config='{"body": {"font": {"size": 16, "bold": true}}}')
+    b = manager.load_config(json_config=' {"body":{"font":{"bold":true,"size":16}}} ')
+    assert a.body.font.size == b.body.font.size == 16
+    assert len(manager._config_cache) == 1
+
+
+def test_file_change_invalidates(config_dir):
+    manager = ConfigManager(config_dir)
+    assert manager.load_config(theme='report').body.font.size == 12
+
+    # 主题文件修改后，合并结果和基础配置都重新加载
+    _rewrite(config_dir / 'themes' / 'report.yaml', "body:\n  font:\n    size: 10.5\n")
+    assert manager.load_config(theme='report').body.font.size == 10.5
+
+    # 系统配置修改同样使所有主题的缓存失效
+    _rewrite(config_dir / 'style.yaml', STYLE_YAML.replace('宋体', '黑体'))
+    assert manager.load_config(theme='report').body.font.family == '黑体'
+    assert manager.load_config().body.font.family == '黑体'
+
+
+def test_lru_eviction(config_dir):
+    manager = ConfigManager(config_dir, cache_size=2)
+    configs = ['{"body": {"font": {"size": %d}}}' % size for size in (10, 11, 12)]
+    manager.load_config(json_config=configs[0])
+    manager.load_config(json_config=configs[1])
+    # 再次使用第一个配置后，淘汰的是第二个
+    manager.load_config(json_config=configs[0])
+    manager.load_config(json_config=configs[2])
+
+    cached = {manager._json_config_digest(config) for config in configs}
+    keys = {digest for _, digest in manager._config_cache}
+    assert len(keys) == 2
+    assert keys == cached - {manager._json_config_digest(configs[1])}
+
+
+def test_cache_disabled(config_dir):
+    manager = ConfigManager(config_dir, cache_size=0)
+    assert manager.load_config(json_config='{"body": {"font": {"size": 9}}}').body.font.size == 9
+    assert not manager._config_cache
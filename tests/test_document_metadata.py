@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档元数据测试
+两种解析引擎在解析时记录的标题、大纲和表格清单一致
+"""
+
+import pytest
+
+from converters.markdown_parser import DocumentMetadata, MarkdownParser
+
+
+DOCUMENT = """> # 引用中的标题
+
+# 年度报告
+
+正文含[链接](http://example.com)和![图标](icon.png)。
+
+## 销售
+
+| 地区 | 季度 | 销售额 |
+|------|------|--------|
+| 华东 | Q1 | 100 |
+| 华北 | Q1 | 80 |
+
+- 列表项
+
+    ### 列表项中的标题
+
+```python
+print(1)
+```
+
+## 附录
+
+| a | b |
+|---|---|
+| 1 | 2 |
+"""
+
+
+@pytest.fixture(params=['native', 'markdown'])
+def parser(request):
+    return MarkdownParser({'engine': request.param})
+
+
+def test_title_and_outline(parser):
+    metadata = parser.parse(DOCUMENT).attributes['metadata']
+    # 标题取第一个一级标题（包括引用中的标题，与早期按行查找一致）
+    assert metadata.title == '引用中的标题'
+    assert [(h['level'], h['title'], h['top_level']) for h in metadata.headings] == [
+        (1, '引用中的标题', False),
+        (1, '年度报告', True),
+        (2, '销售', True),
+        (3, '列表项中的标题', False),
+        (2, '附录', True),
+    ]
+    blocks = [h['block'] for h in metadata.headings]
+    assert blocks == sorted(blocks) and blocks[0] == 0 and blocks[1] == 1
+
+
+def test_inventories(parser):
+    metadata = parser.parse(DOCUMENT).attributes['metadata']
+    assert metadata.tables == [{'rows': 3, 'cols': 3}, {'rows': 2, 'cols': 2}]
+    assert metadata.links == [{'text': '链接', 'url': 'http://example.com'}]
+    assert metadata.images == [{'alt': '图标', 'src': 'icon.png'}]
+    assert metadata.code_blocks == [{'language': 'python', 'code': 'print(1)'}]
+
+
+def test_engines_agree():
+    native = MarkdownParser({'engine': 'native'}).extract_metadata(DOCUMENT)
+    html = MarkdownParser({'engine': 'markdown'}).extract_metadata(DOCUMENT)
+    assert native == html
+
+
+def test_streaming_matches_parse(parser):
+    metadata = DocumentMetadata()
+    for _ in parser.iter_blocks(DOCUMENT, metadata):
+        pass
+    assert metadata.to_dict() == parser.parse(DOCUMENT).attributes['metadata'].to_dict()
+
+
+def test_extract_metadata_reuses_parse_result(parser):
+    document = parser.parse(DOCUMENT)
+    metadata = document.attributes['metadata']
+    parse_count = parser.parse_count
+
+    assert parser.extract_metadata(document) == metadata.to_dict()
+    assert parser.extract_metadata(metadata) == metadata.to_dict()
+    assert parser.parse_count == parse_count
+
+
+def test_streaming_fallback_skips_unrequested_metadata(monkeypatch):
+    from converters import markdown_parser
+
+    def fail_add_block(self, block):
+        raise AssertionError('未请求元数据时不应记录')
+
+    monkeypatch.setattr(markdown_parser.DocumentMetadata, 'add_block', fail_add_block)
+    # 含原始 HTML 的文档由HTML解析处理
+    text = DOCUMENT + '\n<p>原始段落</p>\n'
+    for engine in ('native', 'markdown'):
+        blocks = list(MarkdownParser({'engine': engine}).iter_blocks(text))
+        assert blocks
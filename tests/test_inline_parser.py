@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""行内解析测试"""
+
+from converters.inline_parser import inline_text, parse_inline
+
+
+def _shape(nodes):
+    """节点树的简写：文字为字符串，其余为 (类型, 子节点或文字)"""
+    result = []
+    for node in nodes:
+        if node.kind == 'text':
+            result.append(node.text)
+        elif node.children is not None:
+            result.append((node.kind, _shape(node.children)))
+        else:
+            result.append((node.kind, node.text))
+    return result
+
+
+def test_rule_of_three():
+    # 单个 * 既能开启又能闭合，与 ** 的长度之和为 3，不能配对
+    assert _shape(parse_inline('**a*b**')) == [('strong', ['a*b'])]
+    assert inline_text('**a*b**') == 'a*b'
+    assert _shape(parse_inline('**foo*bar*baz**')) == [('strong', ['foo', ('em', ['bar']), 'baz'])]
+    # 两者都是 3 的倍数时可以配对
+    assert _shape(parse_inline('***a***')) == [('em', [('strong', ['a'])])]
+
+
+def test_emphasis_nesting():
+    assert _shape(parse_inline('***a** b*')) == [('em', [('strong', ['a']), ' b'])]
+    assert _shape(parse_inline('a ***b* c**')) == ['a ', ('strong', [('em', ['b']), ' c'])]
+    assert _shape(parse_inline('snake_case_name')) == ['snake_case_name']
+    assert inline_text('**未闭合') == '**未闭合'
+
+
+def test_links():
+    link, = parse_inline('[文字](http://example.com "标题")')
+    assert link.kind == 'link' and link.url == 'http://example.com'
+    assert _shape(link.children) == ['文字']
+
+    # 引用式链接由HTML解析处理（见 markdown_parser.native_supported），这里按原文输出
+    assert _shape(parse_inline('[x][1] 和 [y][]')) == ['[x][1] 和 [y][]']
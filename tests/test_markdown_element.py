@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档元素测试
+"""
+
+import pytest
+
+from converters.markdown_parser import MarkdownElement
+
+
+def test_empty_element_allocates_nothing():
+    element = MarkdownElement(element_type='paragraph', content='文字')
+    assert element.attributes == {}
+    assert not element.children
+    assert element._attributes is None and element._children is None
+
+    # 读取空容器不分配新对象，所有元素共享同一个只读空容器
+    other = MarkdownElement(element_type='quote', content='')
+    assert element.attributes is other.attributes
+    assert element.children is other.children
+
+
+def test_empty_containers_are_read_only():
+    element = MarkdownElement(element_type='paragraph', content='文字')
+    with pytest.raises(TypeError):
+        element.attributes['language'] = 'python'
+    with pytest.raises(AttributeError):
+        element.children.append(MarkdownElement(element_type='paragraph', content='a'))
+    assert element._attributes is None and element._children is None
+
+
+def test_writes_through_setters_are_kept():
+    element = MarkdownElement(element_type='paragraph', content='文字')
+    # 先后取得的两个引用不会各自持有一份属性，写入都记录在元素上
+    first = element.attributes
+    second = element.attributes
+    assert first is second
+    element.set_attribute('x', 1)
+    element.set_attribute('y', 2)
+    assert element.attributes == {'x': 1, 'y': 2}
+
+    element.attributes = {'language': 'text'}
+    element.set_attribute('style', 'Normal')
+    assert element.attributes == {'language': 'text', 'style': 'Normal'}
+
+
+def test_children_added_through_methods():
+    parent = MarkdownElement(element_type='quote', content='')
+    parent.add_child(MarkdownElement(element_type='paragraph', content='a'))
+    parent.extend_children([MarkdownElement(element_type='paragraph', content='b')])
+    assert [element.content for element in parent.children] == ['a', 'b']
+
+    parent.children = parent.children[1:]
+    parent.add_child(MarkdownElement(element_type='paragraph', content='c'))
+    assert [element.content for element in parent.children] == ['b', 'c']
+
+    parent.children = ()
+    assert parent._children is None
+
+
+def test_equality_ignores_allocation():
+    empty = MarkdownElement(element_type='paragraph', content='a', attributes={}, children=[])
+    assert empty == MarkdownElement(element_type='paragraph', content='a')
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""按需加载扩展（profile=auto）与加载全部扩展（profile=full）的解析结果一致性测试"""
+
+import pytest
+
+from converters.markdown_parser import _FULL_EXTENSIONS, MarkdownParser
+
+
+# 覆盖每个扩展对应的语法及其组合
+CORPUS = [
+    "# 标题\n\n普通段落，含**粗体**、*斜体*和`代码`。\n\n- 列表一\n- 列表二\n    - 嵌套\n\n1. 第一\n2. 第二\n",
+    "| 列1 | 列2 |\n|-----|-----|\n| a | b |\n| c |\n\n段落 a | b 中的竖线\n",
+    "```python\ndef f(x):\n    return x\n```\n\n~~~\n无语言\n~~~\n",
+    "段落\n\n    缩进代码块\n    第二行\n\n- 列表\n\n        列表中的缩进代码\n",
+    "[TOC]\n\n# 一级\n\n## 二级\n\n### 三级\n",
+    "# 标题 {#custom-id}\n\n段落 {: .note }\n\n花括号 {不是属性} 文本\n",
+    "术语\n:   定义内容\n\n另一个术语\n: 定义二\n",
+    "正文引用脚注[^1]和[^note]。\n\n[^1]: 脚注一\n[^note]: 脚注二\n    续行\n",
+    "<div markdown=\"1\">\n**块内 Markdown**\n</div>\n\n<div>\n原样 HTML\n</div>\n",
+    "> 引用 **强调**\n>\n> - 引用中的列表\n\n图片 ![示意图](a.png) 与公式 $E=mc^2$ 和 $$x^2$$\n",
+    "<details>\n<summary>摘要</summary>\n\n内容\n</details>\n\n<p>原始段落</p>\n",
+    "混合 | 表格\n---|---\n`a|b` | {x}\n\n```\n[^1] {: .x } | [TOC]\n```\n",
+    "列表前没有空行\n- 项目\n* 项目\n+ 项目\n\n结束\n",
+]
+
+
+def tree_signature(element):
+    """文档树的可比较表示"""
+    return (
+        element.element_type,
+        element.content,
+        sorted(element.attributes.items(), key=lambda item: item[0]),
+        [tree_signature(child) for child in element.children],
+    )
+
+
+@pytest.fixture(scope='module')
+def auto_parser():
+    return MarkdownParser({'engine': 'markdown', 'profile': 'auto'})
+
+
+@pytest.fixture(scope='module')
+def full_parser():
+    return MarkdownParser({'engine': 'markdown', 'profile': 'full'})
+
+
+@pytest.mark.parametrize('text', CORPUS)
+def test_auto_profile_matches_full(auto_parser, full_parser, text):
+    assert tree_signature(auto_parser.parse(text)) == tree_signature(full_parser.parse(text))
+
+
+def test_corpus_exercises_every_extension(auto_parser):
+    # 语料必须让每个扩展至少被按需加载一次，否则上面的比较覆盖不到它
+    selected = set()
+    for text in CORPUS:
+        selected.update(auto_parser.select_extensions(auto_parser._preprocess(text)))
+    assert selected == set(_FULL_EXTENSIONS)
+
+
+def test_plain_text_loads_no_extension(auto_parser):
+    assert auto_parser.select_extensions(auto_parser._preprocess(CORPUS[0])) == ()
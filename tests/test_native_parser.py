@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+原生解析器一致性测试
+原生解析器与 Python-Markdown + BeautifulSoup 解析路径对同一文档应得到相同的文档树
+"""
+
+import pytest
+
+from converters.markdown_parser import MarkdownParser, native_supported
+
+
+# 原生解析器支持的语法及其组合
+NATIVE_CORPUS = [
+    "# 标题\n\n普通段落，含**粗体**、*斜体*和`代码`。\n\n- 列表一\n- 列表二\n    - 嵌套\n\n1. 第一\n2. 第二\n",
+    "| 列1 | 列2 |\n|-----|-----|\n| a | b |\n| c |\n\n段落 a | b 中的竖线\n",
+    "```python\ndef f(x):\n    return x\n```\n\n~~~\n无语言\n~~~\n",
+    "段落\n\n    缩进代码块\n    第二行\n\n- 列表\n\n        列表中的缩进代码\n",
+    "> 引用 **强调**\n>\n> - 引用中的列表\n\n图片 ![示意图](a.png) 与公式 $E=mc^2$ 和 $$x^2$$\n",
+    "混合 | 表格\n---|---\n`a|b` | x\n",
+    "列表前没有空行\n- 项目\n* 项目\n+ 项目\n\n结束\n",
+    # 列表分组：有序无序混排、缩进不足 4 个空格的列表项、只隔空行的列表
+    "- a\n  - b\n1. c\n",
+    "- a\n\n\n1. b\n",
+    "- a\n  - b\n    - c\n",
+    "- a\n    - b\n\n        深层段落\n- c\n",
+    "1. a\n   续行\n\n   不属于列表\n",
+    "- a\n    b\n- c\n",
+    "- a\n> 列表项中的引用\n",
+    "- a\n* * *\n",
+    # 引用：惰性续行、只隔空行的引用合并、引用内的列表标记不打断段落
+    "> a\n续行\n\n> b\n",
+    "> 正文\n> - 不是列表\n",
+    # 段落与标题
+    "a\n  b \nc  \nd\n",
+    "a\nb\n---\n",
+    "  # 不是标题\n",
+    "a\n| x | y |\n|---|---|\n",
+    # 图片
+    "![a](x.png)\n![b](y.png)\n\n正文 ![c](z.png)\n",
+    "- ![a](x.png)\n- [![b](y.png)](https://example.com)\n",
+    "> ![a](x.png)\n",
+    # 强调（“3 的倍数”规则）与链接
+    "**a*b**\n\n**foo*bar*baz**\n\n***a** b*\n",
+    "[链接](http://example.com) 与没有定义的引用式链接 [x][1]、[y][]\n",
+]
+
+# 原生解析器不支持、改用HTML解析的语法
+FALLBACK_CORPUS = [
+    "[TOC]\n\n# 一级\n\n## 二级\n",
+    "# 标题 {#custom-id}\n\n段落\n",
+    "术语\n:   定义内容\n",
+    "正文引用脚注[^1]。\n\n[^1]: 脚注一\n",
+    "<div markdown=\"1\">\n**块内 Markdown**\n</div>\n",
+    "<details>\n<summary>摘要</summary>\n\n内容\n</details>\n\n<p>原始段落</p>\n",
+    "段落中的 <b>HTML</b> 标签\n",
+    "混合 | 表格\n---|---\n`a|b` | {x}\n",
+    "引用式链接 [x][1] 和 [示例][]\n\n[1]: http://example.com/1\n[示例]: http://example.com \"标题\"\n",
+]
+
+
+def tree_signature(element):
+    """文档树的可比较表示"""
+    return (
+        element.element_type,
+        element.content,
+        sorted(element.attributes.items(), key=lambda item: item[0]),
+        [tree_signature(child) for child in element.children],
+    )
+
+
+@pytest.fixture(scope='module')
+def parsers():
+    return MarkdownParser({'engine': 'native'}), MarkdownParser({'engine': 'markdown'})
+
+
+@pytest.mark.parametrize('text', NATIVE_CORPUS)
+def test_native_matches_html(parsers, text):
+    native, html = parsers
+    assert native_supported(text)
+    assert tree_signature(native.parse(text)) == tree_signature(html.parse(text))
+
+
+@pytest.mark.parametrize('text', FALLBACK_CORPUS)
+def test_unsupported_syntax_falls_back(parsers, text):
+    native, html = parsers
+    assert not native_supported(text)
+    assert tree_signature(native.parse(text)) == tree_signature(html.parse(text))
+
+
+@pytest.mark.parametrize('text', NATIVE_CORPUS + FALLBACK_CORPUS)
+def test_iter_blocks_matches_parse(parsers, text):
+    native, _ = parsers
+    blocks = [tree_signature(block) for block in native.iter_blocks(text)]
+    assert blocks == [tree_signature(block) for block in native.parse(text).children]
+
+
+def test_list_grouping(parsers):
+    native, _ = parsers
+    document = native.parse("- a\n  - b\n1. c\n")
+    assert [child.element_type for child in document.children] == ['list']
+    assert [item.content for item in document.children[0].children] == ['a', 'b', 'c']
+
+
+def test_document_root_does_not_keep_source(parsers):
+    for parser in parsers:
+        document = parser.parse(NATIVE_CORPUS[0])
+        assert 'original_text' not in document.attributes
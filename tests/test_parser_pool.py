@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Markdown解析器池测试
+"""
+
+from converters.parser_pool import MarkdownParserPool
+
+
+def test_parsers_reused_and_prebuilt():
+    pool = MarkdownParserPool(size=2)
+    assert pool.created == 2
+    with pool.acquire() as first:
+        first.parse('# 标题')
+    with pool.acquire() as second:
+        assert second is first
+    assert pool.created == 2
+
+
+def test_empty_pool_creates_temporary_parser():
+    pool = MarkdownParserPool(size=1)
+    with pool.acquire() as first:
+        with pool.acquire() as second:
+            assert second is not first
+            assert pool.created == 2
+    # 池已满时多出的解析器不放回
+    assert pool._pool.qsize() == 1
+
+
+def test_recycle_after_max_uses():
+    pool = MarkdownParserPool(size=1, max_uses=2, max_parsed_chars=0)
+    for _ in range(2):
+        with pool.acquire() as parser:
+            parser.parse('段落')
+    assert pool.recycled == 1
+    with pool.acquire() as replacement:
+        assert replacement is not parser
+        assert replacement.parse_count == 0
+    assert pool.created == 2
+
+
+def test_recycle_after_max_parsed_chars():
+    pool = MarkdownParserPool(size=1, max_uses=0, max_parsed_chars=10)
+    with pool.acquire() as parser:
+        parser.parse('短')
+    with pool.acquire() as same:
+        assert same is parser
+        same.parse('足够长的一段文字，超过上限')
+    assert pool.recycled == 1
+    with pool.acquire() as replacement:
+        assert replacement is not parser
+
+
+def test_reset_failure_discards_parser(monkeypatch):
+    pool = MarkdownParserPool(size=1)
+    with pool.acquire() as parser:
+        def fail():
+            raise RuntimeError('reset failed')
+        monkeypatch.setattr(parser, 'reset', fail)
+    assert pool._pool.qsize() == 0
+    with pool.acquire() as replacement:
+        assert replacement is not parser
+
+
+def test_parser_config_passed_through():
+    pool = MarkdownParserPool(size=1, parser_config={'engine': 'markdown'})
+    with pool.acquire() as parser:
+        assert parser.engine == 'markdown'
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""单遍预处理（preprocess_markdown）与逐步预处理的一致性测试"""
+
+import random
+
+import pytest
+
+from converters.markdown_parser import MarkdownParser
+from converters.preprocessor import normalize_newlines, preprocess_markdown
+
+
+CASES = [
+    '',
+    '普通段落，没有任何标记',
+    '第一行\\n第二行\r\n第三行\r第四行',
+    '质能方程 $E=mc^2$ 与 $a$ 和 $b$',
+    '$$x$$',
+    '![趋势图](images/trend.png)',
+    '说明文字\n- 列表项一\n- 列表项二',
+    '说明文字\n1. 第一\n12. 第十二\n* 星号\n+\t加号',
+    '- 已是列表\n- 不补空行',
+    '> 引用\n- 列表',
+    '公式跨行 $a\n- b$ 结束',
+    '![跨行\n- 替代](x.png)',
+    '指标 $a^2$\r\n- 指标二 ![图标](icon.png)\r\n\r\n',
+]
+
+# 公式与图片相互嵌套，或出现连续三个 $：单遍处理交给逐步处理
+FALLBACK_CASES = [
+    '$$$x$$$',
+    '$![a](b.png)$',
+    '![$a$](b.png)',
+]
+
+# 随机语料的组成片段（与 benchmarks/bench_preprocess.py 相同）
+FUZZ_PIECES = [
+    '$', '$$', '![', '](', ')', ']', '[', '\n', '\r', '\r\n', '\\n', '\\',
+    '- ', '-', '1. ', '12.', '* ', '+\t', ' ', '  ', '\t', '\x0b', '　',
+    'a', 'x', '中',
+]
+
+
+@pytest.fixture(scope='module')
+def stepwise():
+    return MarkdownParser({'engine': 'markdown'})._preprocess_stepwise
+
+
+@pytest.mark.parametrize('text', CASES)
+def test_matches_stepwise(stepwise, text):
+    assert preprocess_markdown(text) == stepwise(text)
+
+
+@pytest.mark.parametrize('text', FALLBACK_CASES)
+def test_nested_markup_falls_back(text):
+    assert preprocess_markdown(text) is None
+
+
+def test_fuzz_matches_stepwise(stepwise):
+    rng = random.Random(0)
+    for _ in range(3000):
+        text = ''.join(rng.choice(FUZZ_PIECES) for _ in range(rng.randint(0, 30)))
+        result = preprocess_markdown(text)
+        if result is not None:
+            assert result == stepwise(text), repr(text)
+
+
+def test_normalize_newlines():
+    assert normalize_newlines('a\\nb\r\nc\rd') == 'a\nb\nc\nd'
+    text = '没有需要处理的换行'
+    assert normalize_newlines(text) is text
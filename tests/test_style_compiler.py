@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""主题样式编译测试：代码高亮字符样式随主题样式写入 styles.xml，编译好的模板按主题配置缓存"""
+
+import io
+
+from docx import Document
+from docx.oxml.ns import qn
+
+from config.models import StyleConfig
+from converters.style_compiler import (
+    THEME_STYLE_IDS, CompiledTemplateCache, code_token_style_id, compile_theme_styles, theme_style_key,
+)
+from utils.code_highlighter import get_token_styles
+
+
+def _style_ids(document):
+    return {
+        style.get(qn('w:styleId'))
+        for style in document.styles.element.iterchildren(qn('w:style'))
+    }
+
+
+def test_code_token_styles_compiled():
+    config = StyleConfig()
+    document = Document()
+    compile_theme_styles(document, config)
+
+    style_ids = _style_ids(document)
+    for category in get_token_styles(config.code_highlight.style):
+        assert code_token_style_id(category) in style_ids
+
+
+def test_code_token_styles_skipped_when_disabled():
+    config = StyleConfig()
+    config.code_highlight.enabled = False
+    document = Document()
+    compile_theme_styles(document, config)
+
+    assert not any(style_id.startswith('SmartCode') and style_id != 'SmartCodeBlock'
+                   for style_id in _style_ids(document) if style_id)
+
+
+def test_highlight_scheme_changes_cache_key():
+    config = StyleConfig()
+    key = theme_style_key(config)
+    config.code_highlight.style = 'monokai'
+    assert theme_style_key(config) != key
+
+
+def _base_template():
+    buffer = io.BytesIO()
+    Document().save(buffer)
+    return buffer.getvalue()
+
+
+def _body_font_size(template):
+    """模板中正文样式的字号（磅）"""
+    document = Document(io.BytesIO(template))
+    for style in document.styles.element.iterchildren(qn('w:style')):
+        if style.get(qn('w:styleId')) == THEME_STYLE_IDS['body']:
+            return int(style.find('.//' + qn('w:sz')).get(qn('w:val'))) / 2
+
+
+def test_template_cache_keyed_by_compiled_fields():
+    cache = CompiledTemplateCache(_base_template())
+    config = StyleConfig()
+    template = cache.get(config)
+    assert cache.get(StyleConfig()) is template
+
+    # 不参与样式编译的配置（页面、图表）共用同一个模板
+    other = StyleConfig()
+    other.page.margin_top = 1.0
+    other.chart.dpi = 72
+    assert cache.get(other) is template
+
+    # 参与编译的配置变化时重新编译
+    larger = StyleConfig()
+    larger.body.font.size = config.body.font.size + 4
+    compiled = cache.get(larger)
+    assert compiled is not template
+    assert _body_font_size(compiled) == larger.body.font.size
+    assert _body_font_size(template) == config.body.font.size
+
+
+def test_template_cache_lru_eviction():
+    cache = CompiledTemplateCache(_base_template(), max_entries=2)
+    configs = []
+    for size in (10, 11, 12):
+        config = StyleConfig()
+        config.body.font.size = size
+        configs.append(config)
+
+    first = cache.get(configs[0])
+    cache.get(configs[1])
+    # 再次使用第一个配置后，淘汰的是第二个
+    assert cache.get(configs[0]) is first
+    cache.get(configs[2])
+    assert list(cache._templates) == [theme_style_key(configs[0]), theme_style_key(configs[2])]
+
+
+def test_documents_from_cached_template_are_independent():
+    cache = CompiledTemplateCache(_base_template())
+    template = cache.get(StyleConfig())
+    first = Document(io.BytesIO(template))
+    first.add_paragraph('只在第一个文档中')
+    second = Document(io.BytesIO(cache.get(StyleConfig())))
+    assert not any(p.text for p in second.paragraphs)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""表格构建测试：首列纵向合并、单元格内容、列宽、大表格拆分与重复标题行、工作内存"""
+
+import tracemalloc
+
+import pytest
+from docx.oxml.ns import qn
+from docx.shared import Cm
+
+from converters import table_builder
+from converters.markdown_parser import TableData
+from converters.table_builder import build_tables, column_widths_cm
+
+
+def _rows(tbl):
+    return tbl.findall(qn('w:tr'))
+
+
+def _cells(tr):
+    return tr.findall(qn('w:tc'))
+
+
+def _cell_text(tc):
+    return ''.join(t.text or '' for t in tc.iter(qn('w:t')))
+
+
+def _first_column_merges(tbl):
+    """每行首列单元格的 vMerge 取值（None 为不合并）"""
+    merges = []
+    for tr in _rows(tbl):
+        v_merge = _cells(tr)[0].find(qn('w:tcPr') + '/' + qn('w:vMerge'))
+        merges.append(None if v_merge is None else v_merge.get(qn('w:val'), ''))
+    return merges
+
+
+def _build_one(rows, cols, **kwargs):
+    tables = list(build_tables(rows, cols, 'SmartTable', **kwargs))
+    assert len(tables) == 1
+    return tables[0]
+
+
+ROWS = [
+    ['地区', '季度', '销售额'],
+    ['华东', 'Q1', '100'],
+    ['华东 ', 'Q2', '120'],
+    ['华北', 'Q1', '80'],
+    ['', 'Q2', '90'],
+    ['', 'Q3', '95'],
+    ['华南', 'Q1', '60'],
+]
+
+
+def test_first_column_vmerge():
+    tbl = _build_one(ROWS, 3)
+    # 表头不参与合并，首尾空白不影响比较，空单元格不合并
+    assert _first_column_merges(tbl) == [None, 'restart', '', None, None, None, None]
+
+    # 合并区域只在第一行保留文字
+    first_column = [_cell_text(_cells(tr)[0]) for tr in _rows(tbl)]
+    assert first_column == ['地区', '华东', '', '华北', '', '', '华南']
+
+
+def test_merge_can_be_disabled():
+    tbl = _build_one(ROWS, 3, merge_first_column=False)
+    assert _first_column_merges(tbl) == [None] * len(ROWS)
+
+
+def test_cells_padded_to_column_count():
+    tbl = _build_one([['a', 'b', 'c'], ['1'], ['2', 'x\ty', 'l1\nl2']], 3, merge_first_column=False)
+    rows = _rows(tbl)
+    assert [len(_cells(tr)) for tr in rows] == [3, 3, 3]
+    assert [_cell_text(tc) for tc in _cells(rows[1])] == ['1', '', '']
+
+    last = _cells(rows[2])
+    assert last[1].find('.//' + qn('w:tab')) is not None
+    assert last[2].find('.//' + qn('w:br')) is not None
+    assert _cell_text(last[2]) == 'l1l2'
+
+
+def test_table_style_reference():
+    tbl = _build_one(ROWS, 3)
+    style = tbl.find(qn('w:tblPr') + '/' + qn('w:tblStyle'))
+    assert style.get(qn('w:val')) == 'SmartTable'
+
+
+def _grid_widths_cm(tbl):
+    grid = tbl.find(qn('w:tblGrid'))
+    return [int(col.get(qn('w:w'))) / Cm(1).twips for col in grid.findall(qn('w:gridCol'))]
+
+
+def test_column_widths_follow_content():
+    widths = column_widths_cm([0.5, 2.0, 4.0], min_table_width_cm=0, max_table_width_cm=100)
+    # 内容宽度加单元格边距，窄列不小于最小列宽
+    assert widths == pytest.approx([1.2, 2.38, 4.38])
+
+
+def test_column_widths_clamped_and_scaled():
+    # 超长内容不超过单列最大宽度
+    assert column_widths_cm([20.0], min_table_width_cm=0) == [6.0]
+    # 总宽度不足时按比例放大
+    assert sum(column_widths_cm([1.0, 1.0], min_table_width_cm=8.0)) == pytest.approx(8.0)
+    # 超出最大宽度时窄列保持原宽，较宽的列按比例缩小
+    widths = column_widths_cm([1.0, 5.0, 5.0, 5.0], max_table_width_cm=12.0)
+    assert widths[0] == pytest.approx(1.38)
+    assert sum(widths) == pytest.approx(12.0)
+    assert widths[1] == pytest.approx(widths[2]) == pytest.approx(widths[3])
+    # 没有内容时平分默认宽度
+    assert column_widths_cm([0, 0]) == [6.0, 6.0]
+    assert column_widths_cm([]) == []
+
+
+def test_grid_widths_measure_cell_text():
+    rows = [['序号', '说明'], ['1', '这是一段明显比序号列更长的说明文字']]
+    tbl = _build_one(rows, 2, merge_first_column=False)
+    widths = _grid_widths_cm(tbl)
+    assert len(widths) == 2
+    assert widths[1] > widths[0]
+    assert max(widths) <= 6.0
+
+    # 中文字符比同样数量的西文字符宽
+    narrow, wide = _grid_widths_cm(_build_one([['iiiiiiiiii', '中中中中中中中中中中']], 2,
+                                              merge_first_column=False, min_table_width_cm=0))
+    assert wide > narrow
+
+
+def _is_header(tr):
+    return tr.find(qn('w:trPr') + '/' + qn('w:tblHeader')) is not None
+
+
+def _floating(tbl):
+    return tbl.find(qn('w:tblPr') + '/' + qn('w:tblpPr')) is not None
+
+
+def test_split_tables_repeat_header():
+    rows = [['分组', '编号']] + [[f'组{i // 4}', str(i)] for i in range(10)]
+    tables = list(build_tables(rows, 2, 'SmartTable', repeat_header=True, split_rows=4))
+    assert len(tables) == 3
+
+    for tbl in tables:
+        table_rows = _rows(tbl)
+        # 每个表格都以标记为重复标题行的表头开始，数据行不标记
+        assert [_cell_text(tc) for tc in _cells(table_rows[0])] == ['分组', '编号']
+        assert [_is_header(tr) for tr in table_rows] == [True] + [False] * (len(table_rows) - 1)
+        # 重复标题行的表格不能浮动
+        assert not _floating(tbl)
+
+    numbers = [_cell_text(_cells(tr)[1]) for tbl in tables for tr in _rows(tbl)[1:]]
+    assert numbers == [str(i) for i in range(10)]
+    # 拆分后的各表格列宽一致
+    assert len({tuple(_grid_widths_cm(tbl)) for tbl in tables}) == 1
+
+
+def test_first_column_merge_does_not_cross_tables():
+    rows = [['分组', '编号']] + [['相同', str(i)] for i in range(5)]
+    first, second = build_tables(rows, 2, 'SmartTable', repeat_header=True, split_rows=3)
+    assert _first_column_merges(first) == [None, 'restart', '', '']
+    assert _first_column_merges(second) == [None, 'restart', '']
+    assert _cell_text(_cells(_rows(second)[1])[0]) == '相同'
+
+
+def test_small_table_not_split():
+    rows = [['h'], ['1'], ['2']]
+    tbl = _build_one(rows, 1, split_rows=2)
+    assert len(_rows(tbl)) == 3
+    # 不重复标题行时表格保持文字环绕，不标记标题行
+    assert _floating(tbl)
+    assert not any(_is_header(tr) for tr in _rows(tbl))
+
+
+def test_merge_across_chunks(monkeypatch):
+    monkeypatch.setattr(table_builder, '_CHUNK_ROWS', 2)
+    rows = [['分组', '编号']] + [['相同', str(i)] for i in range(5)] + [['其他', '5']]
+    tbl = _build_one(rows, 2)
+    assert _first_column_merges(tbl) == [None, 'restart', '', '', '', '', None]
+    assert [_cell_text(_cells(tr)[1]) for tr in _rows(tbl)][1:] == [str(i) for i in range(6)]
+
+
+def _peak_memory(row_count):
+    """生成 row_count 个数据行的表格时Python分配内存的峰值（不含输入数据）"""
+    data = TableData([['分组', '编号', '说明']] +
+                     [[f'组{i // 3}', str(i), '说明文字' * 3] for i in range(row_count)])
+    tracemalloc.start()
+    try:
+        for _ in build_tables(data, 3, 'SmartTable', repeat_header=True):
+            pass
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_working_memory_bounded_by_chunk():
+    chunk = table_builder._CHUNK_ROWS
+    _peak_memory(chunk)  # 预热字体度量缓存
+    small = _peak_memory(2 * chunk)
+    large = _peak_memory(40 * chunk)
+    # 行数增加 20 倍，工作内存只与块大小有关
+    assert large < small * 1.5
@@ -1,6 +1,5 @@
 import os
 import re
-import tempfile
 from collections.abc import Generator
 from typing import Any
 from pathlib import Path
@@ -16,10 +15,13 @@ src_path = current_file.parent.parent / 'src'
 if str(src_path) not in os.sys.path:
     os.sys.path.insert(0, str(src_path))
 
-# 导入新配置系统
-from config import ConfigManager, StyleConfig
-from converters.markdown_parser import MarkdownParser
-from converters.word_generator import WordGenerator
+# 导入常驻转换引擎（跨请求复用配置、解析器和模板）
+from converters.conversion_engine import get_engine
+from converters.markdown_parser import DocumentMetadata
+from utils.logging_config import setup_logging
+
+# 日志级别默认 WARNING，可通过环境变量 SMART_DOC_LOG_LEVEL 调整
+setup_logging()
 
 
 class SmartDocGeneratorTool(Tool):
@@ -38,66 +40,43 @@ class SmartDocGeneratorTool(Tool):
             enable_charts = tool_parameters.get('enable_charts', False)
             chart_data = tool_parameters.get('chart_data', '')
             
-            # 2. 加载配置（统一入口）
-            config_manager = ConfigManager()
-            config = config_manager.load_config(
-                json_config=style_config_json,
-                theme=theme
-            )
+            # 2. 获取常驻转换引擎
+            engine = get_engine()
             
-            # 3. 提取标题作为文件名
-            output_file = self._extract_filename(markdown_text)
+            # 3. 解析和生成（文档直接在内存中生成，不经过临时文件），同时记录文档元数据
+            metadata = DocumentMetadata()
+            file_content = engine.convert_to_bytes(
+                markdown_text,
+                theme=theme,
+                style_config=style_config_json,
+                enable_charts=enable_charts,
+                chart_data=chart_data,
+                metadata=metadata
+            )
             
-            # 4. 创建临时文件
-            with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as temp_file:
-                temp_output_path = temp_file.name
+            # 4. 提取标题作为文件名
+            output_file = self._extract_filename(metadata)
             
-            try:
-                # 5. 初始化生成器
-                markdown_parser = MarkdownParser()
-                word_generator = WordGenerator(
-                    config=config,
-                    enable_charts=enable_charts,
-                    chart_data=chart_data
+            if file_content is not None:
+                # 返回文件
+                yield self.create_blob_message(
+                    blob=file_content,
+                    meta={
+                        "mime_type": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                        "filename": output_file
+                    }
                 )
                 
-                # 6. 解析和生成
-                parsed_content = markdown_parser.parse(markdown_text)
-                success = word_generator.generate(
-                    parsed_content,
-                    temp_output_path,
-                    markdown_text=markdown_text
-                )
-                
-                if success:
-                    # 读取生成的文件
-                    with open(temp_output_path, 'rb') as f:
-                        file_content = f.read()
-                    
-                    # 返回文件
-                    yield self.create_blob_message(
-                        blob=file_content,
-                        meta={
-                            "mime_type": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                            "filename": output_file
-                        }
-                    )
-                    
-                    # 返回成功结果
-                    yield self.create_json_message({
-                        "result": "Word文档生成成功",
-                        "output_file": output_file,
-                        "file_size": len(file_content),
-                        "theme": theme,
-                        "charts_enabled": enable_charts
-                    })
-                else:
-                    yield self.create_json_message({"error": "Word文档生成失败"})
-                    
-            finally:
-                # 清理临时文件
-                if os.path.exists(temp_output_path):
-                    os.unlink(temp_output_path)
+                # 返回成功结果
+                yield self.create_json_message({
+                    "result": "Word文档生成成功",
+                    "output_file": output_file,
+                    "file_size": len(file_content),
+                    "theme": theme,
+                    "charts_enabled": enable_charts
+                })
+            else:
+                yield self.create_json_message({"error": "Word文档生成失败"})
                     
         except Exception as e:
             import traceback
@@ -107,33 +86,33 @@ class SmartDocGeneratorTool(Tool):
                 "detail": error_detail
             })
     
-    def _extract_filename(self, markdown_text: str) -> str:
-        """从 markdown 文本中提取第一个一级标题作为文件名
+    def _extract_filename(self, metadata: DocumentMetadata) -> str:
+        """使用文档开头的一级标题作为文件名
+        
+        标题取自解析时记录的元数据，不再重新扫描 Markdown 文本；
+        只考虑前10个顶层块中的顶层标题，引用和列表项中的标题不作为文件名。
         
         Args:
-            markdown_text: Markdown 文本
+            metadata: 解析时记录的文档元数据
         
         Returns:
             文件名（包含 .docx 扩展名）
         """
-        # 处理转义的换行符
-        text = markdown_text.replace('\\n', '\n')
-        
-        # 按行分割，只检查前10行
-        lines = text.split('\n')
-        for line in lines[:10]:
-            line = line.strip()
-            # 严格匹配：行首必须是 # 后跟空格，且不是 ##
-            if line.startswith('# ') and not line.startswith('##'):
-                title = line[2:].strip()
-                # 确保标题不为空，且长度合理
-                if title and '\n' not in title and '\r' not in title and len(title) <= 200:
-                    # 如果标题中包含 ##，截取到 ## 之前
-                    if '##' in title:
-                        title = title.split('##')[0].strip()
-                    
-                    # 清理文件名
-                    return self._sanitize_filename(title) + '.docx'
+        for heading in metadata.headings:
+            # 只看文档开头的前10个块
+            if heading['block'] >= 10:
+                break
+            if heading['level'] != 1 or not heading['top_level']:
+                continue
+            title = heading['title'].strip()
+            # 确保标题不为空，且长度合理
+            if title and '\n' not in title and '\r' not in title and len(title) <= 200:
+                # 如果标题中包含 ##，截取到 ## 之前
+                if '##' in title:
+                    title = title.split('##')[0].strip()
+                
+                # 清理文件名
+                return self._sanitize_filename(title) + '.docx'
         
         # 如果没有找到标题，使用默认文件名
         return 'output.docx'